@@ -0,0 +1,272 @@
+"""
+sync 性能基准：在进程内的假 CDN 上运行 ``VendorManager.sync()``。
+
+用法::
+
+    python -m benchmarks.bench_sync --files 10 100 1000 --latency 0.02 -o result.json
+    python -m benchmarks.bench_sync --compare baseline.json result.json
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+from django_js_vendor.core import VendorManager
+
+from .fake_cdn import FakeCDN, FakeCDNConfig
+
+if sys.platform != "win32":
+    import resource
+else:
+    resource = None
+
+CDN_URL = "https://cdn.bench"
+# 每个合成包包含的文件数
+FILES_PER_PACKAGE = 10
+
+
+class BenchManager(VendorManager):
+    """所有请求都发送到假 CDN 的 VendorManager"""
+
+    def __init__(self, project_root: Path, cdn: FakeCDN):
+        super().__init__(project_root)
+        self.cdn = cdn
+
+    def make_client(self, **kwargs: Any) -> httpx.AsyncClient:
+        return super().make_client(
+            transport=httpx.ASGITransport(app=self.cdn), **kwargs
+        )
+
+
+def write_config(
+    project_root: Path, files: int, concurrency: int | None = None
+) -> None:
+    """
+    生成包含 files 个文件的 pyproject.toml (每个包 FILES_PER_PACKAGE 个文件)。
+
+    :param project_root: 项目目录
+    :param files: 文件总数
+    :param concurrency: 下载并发数，为空时使用默认值
+    """
+    lines = [
+        "[tool.django-js-vendor]",
+        f'default_provider = "{CDN_URL}"',
+    ]
+    if concurrency:
+        lines.append(f"concurrency = {concurrency}")
+    lines += [
+        "",
+        "[tool.django-js-vendor.retry]",
+        "backoff = 0.01",
+        "",
+        "[tool.django-js-vendor.dependencies]",
+    ]
+    for pkg in range(0, files, FILES_PER_PACKAGE):
+        names = [f"f{i}.js" for i in range(min(FILES_PER_PACKAGE, files - pkg))]
+        lines.append(f'pkg{pkg} = {{ version = "1.0.0", files = {json.dumps(names)} }}')
+    (project_root / "pyproject.toml").write_text("\n".join(lines) + "\n")
+
+
+def peak_rss() -> int | None:
+    """当前进程的峰值常驻内存 (字节)"""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 以 KB 为单位，macOS 以字节为单位
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+async def run_sync(manager: VendorManager, cdn: FakeCDN, label: str) -> dict[str, Any]:
+    """运行一次 sync 并收集指标"""
+    cdn.reset_stats()
+    # 屏蔽进度条与提示输出
+    with (
+        contextlib.redirect_stdout(io.StringIO()),
+        contextlib.redirect_stderr(io.StringIO()),
+    ):
+        start = time.perf_counter()
+        await manager.sync()
+        wall = time.perf_counter() - start
+    return {
+        "phase": label,
+        "wall_time": round(wall, 4),
+        "requests": cdn.total_requests,
+        "requests_by_status": {str(k): v for k, v in sorted(cdn.requests.items())},
+        "bytes": cdn.bytes_sent,
+        "throughput_bytes_per_s": round(cdn.bytes_sent / wall) if wall else None,
+    }
+
+
+def run_phase(project_root: Path, phase: str, cdn_config: FakeCDNConfig) -> dict:
+    """
+    在子进程中运行一个阶段。
+
+    每个阶段使用独立的进程，``peak_rss`` 只包含该阶段 (以及解释器本身)，
+    不受之前运行的阶段与场景影响，也不会拖慢被测的 sync。
+
+    :param project_root: 已生成配置的项目目录，热启动沿用冷启动下载的文件
+    :param phase: 阶段名称
+    :param cdn_config: 假 CDN 的行为参数
+    """
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "benchmarks.bench_sync",
+            "--run-phase",
+            str(project_root),
+            phase,
+            json.dumps(asdict(cdn_config)),
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=Path(__file__).parent.parent,
+    )
+    return json.loads(result.stdout)
+
+
+def _phase_main(project_root: str, phase: str, cdn_json: str) -> None:
+    """子进程入口：运行一次 sync，输出包含本进程峰值内存的 JSON"""
+    cdn = FakeCDN(FakeCDNConfig(**json.loads(cdn_json)))
+    manager = BenchManager(Path(project_root), cdn)
+    result = asyncio.run(run_sync(manager, cdn, phase))
+    print(json.dumps({**result, "peak_rss": peak_rss()}))
+
+
+def run_scenario(
+    files: int,
+    cdn_config: FakeCDNConfig,
+    workdir: Path | None = None,
+    concurrency: int | None = None,
+) -> list[dict[str, Any]]:
+    """
+    对 files 个文件依次运行冷启动 (空目录) 与热启动 (已安装) 的 sync。
+
+    :param files: 文件总数
+    :param cdn_config: 假 CDN 的行为参数
+    :param workdir: 工作目录，为空时使用临时目录
+    :param concurrency: 下载并发数
+    """
+    with contextlib.ExitStack() as stack:
+        if workdir is None:
+            workdir = Path(stack.enter_context(tempfile.TemporaryDirectory()))
+        project_root = workdir / f"files-{files}"
+        project_root.mkdir(parents=True)
+        write_config(project_root, files, concurrency)
+
+        results = []
+        for phase in ("cold", "warm"):
+            result = run_phase(project_root, phase, cdn_config)
+            results.append({"files": files, **result})
+        return results
+
+
+def environment() -> dict[str, Any]:
+    """记录运行环境，便于比较不同版本的结果"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+    }
+
+
+def compare(baseline: dict[str, Any], current: dict[str, Any]) -> list[str]:
+    """
+    按 (文件数, 阶段) 比较两次结果的耗时。
+
+    :return: 每个场景一行的文本
+    """
+    before = {(r["files"], r["phase"]): r for r in baseline["results"]}
+    lines = []
+    for result in current["results"]:
+        key = (result["files"], result["phase"])
+        if key not in before:
+            continue
+        old, new = before[key]["wall_time"], result["wall_time"]
+        ratio = new / old if old else float("inf")
+        lines.append(
+            f"{key[0]:>6} files {key[1]:<5} {old:8.3f}s -> {new:8.3f}s ({ratio:.2f}x)"
+        )
+    return lines
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--files", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--bandwidth", type=float, help="Bytes per second per response")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--file-size", type=int, default=16 * 1024)
+    parser.add_argument("--concurrency", type=int)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", type=Path, help="Write results as JSON")
+    parser.add_argument(
+        "--compare",
+        nargs=2,
+        metavar=("BASELINE", "CURRENT"),
+        type=Path,
+        help="Compare two saved result files instead of running",
+    )
+    # run_phase 启动的子进程使用
+    parser.add_argument("--run-phase", nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.run_phase:
+        _phase_main(*args.run_phase)
+        return 0
+
+    if args.compare:
+        baseline, current = (json.loads(p.read_text()) for p in args.compare)
+        print("\n".join(compare(baseline, current)))
+        return 0
+
+    cdn_config = FakeCDNConfig(
+        latency=args.latency,
+        bandwidth=args.bandwidth,
+        error_rate=args.error_rate,
+        file_size=args.file_size,
+        seed=args.seed,
+    )
+    results = []
+    for files in args.files:
+        results += run_scenario(files, cdn_config, concurrency=args.concurrency)
+
+    report = {
+        "environment": environment(),
+        "cdn": asdict(cdn_config),
+        "concurrency": args.concurrency,
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(output + "\n")
+    print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+import asyncio
+import hashlib
+import random
+from collections import Counter
+from dataclasses import dataclass
+
+
+@dataclass
+class FakeCDNConfig:
+    """假 CDN 的行为参数"""
+
+    # 每个响应的首字节延迟 (秒)
+    latency: float = 0.0
+    # 每个响应的传输速率 (字节/秒)，为空时不限速
+    bandwidth: float | None = None
+    # 返回 503 的概率
+    error_rate: float = 0.0
+    # 每个文件的大小 (字节)
+    file_size: int = 16 * 1024
+    # 随机数种子，保证错误分布可复现
+    seed: int = 0
+
+
+class FakeCDN:
+    """
+    进程内的 ASGI 假 CDN，布局与 unpkg 相同 (``/{name}@{version}/{file}``)。
+
+    文件内容由路径确定性地生成，支持 ETag、条件请求与 Range，
+    并统计请求数与发送的字节数。通过 ``httpx.ASGITransport(app=cdn)`` 使用。
+    """
+
+    CHUNK_SIZE = 16 * 1024
+
+    def __init__(self, config: FakeCDNConfig | None = None):
+        self.config = config or FakeCDNConfig()
+        self.random = random.Random(self.config.seed)
+        self.requests: Counter[int] = Counter()
+        self.bytes_sent = 0
+        self._cache: dict[str, bytes] = {}
+
+    @property
+    def total_requests(self) -> int:
+        return sum(self.requests.values())
+
+    def reset_stats(self) -> None:
+        self.requests.clear()
+        self.bytes_sent = 0
+
+    def content(self, path: str) -> bytes:
+        """根据路径生成固定大小的文件内容"""
+        if path not in self._cache:
+            block = hashlib.sha256(path.encode("utf-8")).digest()
+            repeat = self.config.file_size // len(block) + 1
+            self._cache[path] = (block * repeat)[: self.config.file_size]
+        return self._cache[path]
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            return
+        headers = {k.decode().lower(): v.decode() for k, v in scope["headers"]}
+
+        if self.config.latency:
+            await asyncio.sleep(self.config.latency)
+
+        if self.random.random() < self.config.error_rate:
+            await self._respond(send, 503, {}, b"")
+            return
+
+        body = self.content(scope["path"])
+        etag = f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+        response_headers = {"ETag": etag, "Accept-Ranges": "bytes"}
+
+        if headers.get("if-none-match") == etag:
+            await self._respond(send, 304, response_headers, b"")
+            return
+
+        status = 200
+        range_header = headers.get("range", "")
+        if range_header.startswith("bytes=") and headers.get("if-range") in (
+            None,
+            etag,
+        ):
+            start = int(range_header[6:].split("-")[0])
+            if start >= len(body):
+                await self._respond(send, 416, response_headers, b"")
+                return
+            response_headers["Content-Range"] = (
+                f"bytes {start}-{len(body) - 1}/{len(body)}"
+            )
+            body = body[start:]
+            status = 206
+
+        await self._respond(send, status, response_headers, body)
+
+    async def _respond(
+        self, send, status: int, headers: dict[str, str], body: bytes
+    ) -> None:
+        self.requests[status] += 1
+        raw_headers = [(k.encode(), v.encode()) for k, v in headers.items()]
+        raw_headers.append((b"content-length", str(len(body)).encode()))
+        await send(
+            {"type": "http.response.start", "status": status, "headers": raw_headers}
+        )
+        for offset in range(0, len(body), self.CHUNK_SIZE):
+            chunk = body[offset : offset + self.CHUNK_SIZE]
+            if self.config.bandwidth:
+                await asyncio.sleep(len(chunk) / self.config.bandwidth)
+            self.bytes_sent += len(chunk)
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
@@ -0,0 +1,256 @@
+import hashlib
+import json
+import os
+import posixpath
+import re
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from .lockfile import file_matches
+
+# bundle 文件所在的子目录 (npm 包名不能以 "_" 开头，不会与包目录冲突)
+BUNDLE_DIR = "_bundles"
+# lock 文件中记录 bundle 的保留键
+LOCK_KEY = "$bundles"
+# bundle = true 时未分组的包所在的分组
+DEFAULT_BUNDLE = "vendor"
+
+KINDS = {"js": ".js", "css": ".css"}
+# bundle 内容的生成规则变化时递增，使已有的 bundle 重新生成
+BUNDLE_FORMAT = 2
+
+# 原文件中的 source map 注释在合并后指向错误的位置，替换为空行
+_SOURCE_MAP_RE = {
+    "js": re.compile(rb"^[ \t]*//[#@][ \t]*sourceMappingURL=[^\n]*$", re.M),
+    "css": re.compile(rb"/\*[#@][ \t]*sourceMappingURL=.*?\*/", re.S),
+}
+
+
+def strip_source_map(data: bytes, kind: str) -> bytes:
+    """
+    删除 source map 注释 (文件被合并或内联后相对路径不再正确)。
+
+    :param data: 文件内容
+    :param kind: js 或 css
+    """
+    return _SOURCE_MAP_RE[kind].sub(b"", data)
+
+
+# CSS 中的 url() 引用，引号可选
+_CSS_URL_RE = re.compile(rb"""url\(\s*(['"]?)([^'"()\s]+)\1\s*\)""", re.I)
+# 不需要改写的 URL：带协议 (data:、https: 等)、绝对路径、协议相对路径与片段
+_ABSOLUTE_URL_RE = re.compile(r"^(?:[a-z][a-z0-9+.-]*:|/|#)", re.I)
+
+
+def rewrite_css_urls(data: bytes, base: str, replace: Callable[[str], str]) -> bytes:
+    """
+    改写 CSS 中相对路径的 url() 引用，用于文件被合并或内联到其他位置时。
+
+    ``data:``、带协议的 URL、绝对路径与协议相对路径保持不变，查询参数与片段保留。
+
+    :param data: CSS 内容
+    :param base: CSS 文件所在的目录 (相对于项目根目录，POSIX 格式)
+    :param replace: 接收被引用文件相对于项目根目录的路径，返回新的 URL
+    """
+
+    def sub(match: re.Match) -> bytes:
+        quote = match.group(1)
+        url = match.group(2).decode("utf-8", "surrogateescape")
+        if _ABSOLUTE_URL_RE.match(url):
+            return match.group(0)
+        path, suffix = re.match(r"([^?#]*)(.*)", url).groups()
+        new = replace(posixpath.normpath(posixpath.join(base, path))) + suffix
+        return b"url(" + quote + new.encode("utf-8", "surrogateescape") + quote + b")"
+
+    return _CSS_URL_RE.sub(sub, data)
+
+
+def bundle_key(sources: dict[str, list[dict[str, Any]]]) -> str:
+    """
+    根据输入文件的路径与哈希计算分组的指纹，指纹不变时无需重新生成。
+
+    :param sources: {类型: [lock 文件记录]}
+    """
+    data: dict[str, Any] = {
+        kind: [(e["path"], e.get("integrity")) for e in entries]
+        for kind, entries in sources.items()
+    }
+    data["format"] = BUNDLE_FORMAT
+    encoded = json.dumps(data, sort_keys=True).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def _line_mappings(lines: int) -> str:
+    """生成逐行对应原文件的 mappings (每行第 0 列映射到原文件同一行)"""
+    if lines <= 0:
+        return ""
+    # AAAA: 第一行对应原文件第 0 行；AACA: 下一行对应原文件的下一行
+    return "AAAA" + ";AACA" * (lines - 1)
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _file_entry(project_root: Path, path: Path, data: bytes) -> dict[str, Any]:
+    st = path.stat()
+    return {
+        "path": path.relative_to(project_root).as_posix(),
+        "integrity": f"sha256-{hashlib.sha256(data).hexdigest()}",
+        "size": st.st_size,
+        "mtime": st.st_mtime_ns,
+    }
+
+
+def write_bundle(
+    project_root: Path,
+    bundle_dir: Path,
+    name: str,
+    kind: str,
+    paths: list[str],
+) -> list[dict[str, Any]]:
+    """
+    按顺序合并文件，生成带内容哈希的 bundle 与 index source map。
+
+    source map 的每个 section 把 bundle 中的行逐行映射回原文件，原文件自带的
+    source map 不会被串联。CSS 中相对路径的 url() 改写为相对于 bundle 目录。
+
+    :param project_root: 项目根目录
+    :param bundle_dir: bundle 目录
+    :param name: 分组名
+    :param kind: js 或 css
+    :param paths: 按顺序合并的文件 (相对于项目根目录)
+    :return: [bundle 记录, source map 记录]
+    """
+    bundle_rel = bundle_dir.relative_to(project_root).as_posix()
+    parts: list[bytes] = []
+    sections = []
+    line = 0
+    for rel in paths:
+        data = strip_source_map((project_root / rel).read_bytes(), kind)
+        if kind == "css":
+            data = rewrite_css_urls(
+                data,
+                posixpath.dirname(rel),
+                lambda path: posixpath.relpath(path, bundle_rel),
+            )
+        if data and not data.endswith(b"\n"):
+            data += b"\n"
+        lines = data.count(b"\n")
+        if lines:
+            sections.append(
+                {
+                    "offset": {"line": line, "column": 0},
+                    "map": {
+                        "version": 3,
+                        "sources": [posixpath.relpath(rel, bundle_rel)],
+                        "names": [],
+                        "mappings": _line_mappings(lines),
+                    },
+                }
+            )
+        if kind == "js":
+            # 避免上一个文件缺少结尾分号时与下一个文件连在一起
+            data += b";\n"
+        parts.append(data)
+        line += data.count(b"\n")
+
+    body = b"".join(parts)
+    digest = hashlib.sha256(body).hexdigest()[:12]
+    filename = f"{name}.{digest}{KINDS[kind]}"
+    if kind == "js":
+        comment = f"//# sourceMappingURL={filename}.map\n"
+    else:
+        comment = f"/*# sourceMappingURL={filename}.map */\n"
+    body += comment.encode("utf-8")
+    source_map = json.dumps(
+        {"version": 3, "file": filename, "sections": sections}
+    ).encode("utf-8")
+
+    bundle_dir.mkdir(parents=True, exist_ok=True)
+    bundle_path = bundle_dir / filename
+    map_path = bundle_dir / f"{filename}.map"
+    _write_atomic(map_path, source_map)
+    _write_atomic(bundle_path, body)
+    return [
+        _file_entry(project_root, bundle_path, body),
+        _file_entry(project_root, map_path, source_map),
+    ]
+
+
+def _intact(project_root: Path, entries: list[dict[str, Any]]) -> bool:
+    return all(file_matches(project_root / e["path"], e) for e in entries)
+
+
+def build_bundles(
+    project_root: Path,
+    destination: str,
+    groups: dict[str, list[str]],
+    lock_data: dict[str, Any],
+    previous: dict[str, Any] | None = None,
+) -> dict[str, Any] | None:
+    """
+    为每个分组生成 JS 与 CSS bundle，输入未变化且文件完整的分组沿用上次的结果。
+
+    :param project_root: 项目根目录
+    :param destination: vendor 目录
+    :param groups: {分组名: 按依赖顺序排列的包名}
+    :param lock_data: 新的 lock 数据 (路径为最终路径)
+    :param previous: 上次 lock 文件中的 bundle 记录
+    :return: 写入 lock 文件的 bundle 记录，没有分组时返回 None
+    """
+    bundle_dir = project_root / destination / BUNDLE_DIR
+    old_groups = (previous or {}).get("groups", {})
+    old_files = {e["path"]: e for e in (previous or {}).get("files", [])}
+
+    record: dict[str, Any] = {"groups": {}, "files": []}
+    for name, packages in groups.items():
+        packages = [p for p in packages if isinstance(lock_data.get(p), dict)]
+        sources: dict[str, list[dict[str, Any]]] = {kind: [] for kind in KINDS}
+        for pkg in packages:
+            for entry in lock_data[pkg].get("files", []):
+                for kind, suffix in KINDS.items():
+                    if entry.get("path", "").endswith(suffix):
+                        sources[kind].append(entry)
+        if not any(sources.values()):
+            continue
+
+        key = bundle_key(sources)
+        old = old_groups.get(name) or {}
+        group: dict[str, Any] = {"packages": packages, "key": key}
+        for kind, entries in sources.items():
+            if not entries:
+                group[kind] = None
+                continue
+            reused = None
+            if old.get("key") == key and old.get(kind):
+                files = [old_files.get(old[kind]), old_files.get(old[kind] + ".map")]
+                if all(files) and _intact(project_root, files):
+                    reused = files
+            files = reused or write_bundle(
+                project_root, bundle_dir, name, kind, [e["path"] for e in entries]
+            )
+            group[kind] = files[0]["path"]
+            record["files"].extend(files)
+        record["groups"][name] = group
+    return record if record["groups"] else None
+
+
+def remove_stale(bundle_dir: Path, keep: set[Path]) -> None:
+    """
+    删除 bundle 目录中不再被 lock 文件引用的文件，目录为空时一并删除。
+
+    :param bundle_dir: bundle 目录
+    :param keep: 需要保留的文件
+    """
+    if not bundle_dir.is_dir():
+        return
+    for path in bundle_dir.iterdir():
+        if path.is_file() and path not in keep:
+            path.unlink()
+    if not any(bundle_dir.iterdir()):
+        bundle_dir.rmdir()
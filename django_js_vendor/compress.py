@@ -0,0 +1,91 @@
+import gzip
+import hashlib
+import os
+from pathlib import Path
+from typing import Any
+
+# 预压缩的文件类型 (图片、字体等已压缩的格式收益很小)
+COMPRESSIBLE_SUFFIXES = (".js", ".mjs", ".cjs", ".css", ".svg", ".map")
+
+# 格式名 -> 文件后缀，与 WhiteNoise / nginx gzip_static 使用的命名一致
+EXTENSIONS = {"gzip": ".gz", "br": ".br"}
+
+
+def has_brotli() -> bool:
+    """是否安装了 brotli (pip install django-js-vendor[brotli])"""
+    try:
+        import brotli  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def is_compressible(path: str | Path) -> bool:
+    """文件类型是否值得预压缩"""
+    return str(path).lower().endswith(COMPRESSIBLE_SUFFIXES)
+
+
+def variant_path(path: str, fmt: str) -> str:
+    """
+    压缩文件的路径，与原文件位于同一目录。
+
+    :param path: 原文件路径
+    :param fmt: 压缩格式 (gzip 或 br)
+    """
+    return path + EXTENSIONS[fmt]
+
+
+def _compress(data: bytes, fmt: str) -> bytes:
+    if fmt == "br":
+        import brotli
+
+        return brotli.compress(data, quality=11)
+    # mtime=0 使相同的输入得到相同的输出
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def compress_file(path: str, formats: list[str]) -> dict[str, dict[str, Any] | None]:
+    """
+    为文件生成压缩版本 (在进程池中执行)。
+
+    压缩后没有变小的格式不写入文件 (已有的旧文件会被删除)，结果中记为 None，
+    这样后续 sync 不会重复尝试。
+
+    :param path: 原文件路径
+    :param formats: 压缩格式列表
+    :return: {格式: {"integrity", "size", "mtime"} 或 None}
+    """
+    data = Path(path).read_bytes()
+    result: dict[str, dict[str, Any] | None] = {}
+    for fmt in formats:
+        out = variant_path(path, fmt)
+        payload = _compress(data, fmt)
+        if len(payload) >= len(data):
+            Path(out).unlink(missing_ok=True)
+            result[fmt] = None
+            continue
+        tmp = out + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(payload)
+        os.replace(tmp, out)
+        st = os.stat(out)
+        result[fmt] = {
+            "integrity": f"sha256-{hashlib.sha256(payload).hexdigest()}",
+            "size": st.st_size,
+            "mtime": st.st_mtime_ns,
+        }
+    return result
+
+
+def variant_paths(entry: dict[str, Any]) -> dict[str, dict[str, Any]]:
+    """
+    lock 文件记录中已生成的压缩文件。
+
+    :param entry: lock 文件中的单个文件记录
+    :return: {压缩文件路径: 记录}
+    """
+    variants = {}
+    for fmt, variant in (entry.get("compressed") or {}).items():
+        if variant and fmt in EXTENSIONS:
+            variants[variant_path(entry["path"], fmt)] = variant
+    return variants
@@ -1,7 +1,15 @@
+import os
+import sys
 from dataclasses import dataclass, field
 from pathlib import Path
 
-import tomlkit
+if sys.version_info >= (3, 11):
+    import tomllib
+else:
+    import tomli as tomllib
+
+# 注意: tomlkit 仅在修改 pyproject.toml 时才导入，
+# 运行时 (模板标签) 只需要 tomllib 读取配置。
 
 
 @dataclass
@@ -13,6 +21,76 @@ class DependencyConfig:
     url: str | None = None
     filename: str | None = None
     files: list[str] = field(default_factory=list)
+    # 覆盖全局的 default_provider，例如 "npm"；列表表示按顺序回退
+    provider: str | list[str] | None = None
+    # ES module 包：记录 package.json exports 中的入口，生成 import map
+    esm: bool = False
+    # 内联到 HTML 中：True 总是内联，False 从不内联，None 按 inline_threshold 判断
+    inline: bool | None = None
+
+
+@dataclass
+class HttpConfig:
+    """HTTP 客户端配置"""
+
+    # 连接池大小，为空时与 concurrency 一致
+    max_connections: int | None = None
+    max_keepalive_connections: int | None = None
+    keepalive_expiry: float = 30.0
+    timeout: float = 30.0
+    connect_timeout: float = 60.0
+    # 需要安装 httpx[http2]
+    http2: bool = False
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "HttpConfig":
+        """
+        从 [tool.django-js-vendor.http] 表创建配置。
+
+        :param data: 配置表
+        """
+        defaults = cls()
+        return cls(
+            max_connections=data.get("max_connections", defaults.max_connections),
+            max_keepalive_connections=data.get(
+                "max_keepalive_connections", defaults.max_keepalive_connections
+            ),
+            keepalive_expiry=data.get("keepalive_expiry", defaults.keepalive_expiry),
+            timeout=data.get("timeout", defaults.timeout),
+            connect_timeout=data.get("connect_timeout", defaults.connect_timeout),
+            http2=data.get("http2", defaults.http2),
+        )
+
+
+@dataclass
+class RetryConfig:
+    """下载重试配置"""
+
+    # 每个来源的最大尝试次数 (包含第一次)
+    attempts: int = 3
+    # 指数退避的初始等待时间 (秒)，第 n 次重试等待 backoff * 2 ** (n - 1)
+    backoff: float = 0.5
+    max_backoff: float = 30.0
+    # 在 [0, 退避时间] 之间随机等待，避免大量任务同时重试
+    jitter: bool = True
+    # 整个 sync 的时间上限 (秒)，为空时不限制
+    deadline: float | None = None
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "RetryConfig":
+        """
+        从 [tool.django-js-vendor.retry] 表创建配置。
+
+        :param data: 配置表
+        """
+        defaults = cls()
+        return cls(
+            attempts=data.get("attempts", defaults.attempts),
+            backoff=data.get("backoff", defaults.backoff),
+            max_backoff=data.get("max_backoff", defaults.max_backoff),
+            jitter=data.get("jitter", defaults.jitter),
+            deadline=data.get("deadline", defaults.deadline),
+        )
 
 
 @dataclass
@@ -20,8 +98,36 @@ class VendorConfig:
     """全局配置"""
 
     destination: str
-    default_provider: str
+    # 单个 provider 或按顺序回退的 provider 列表
+    default_provider: str | list[str]
     dependencies: dict[str, DependencyConfig]
+    # 下载并发控制
+    concurrency: int = 16
+    per_host_concurrency: int = 6
+    adaptive_concurrency: bool = False
+    # 全局内容寻址存储目录，为空时不使用；环境变量 DJANGO_JS_VENDOR_STORE 优先
+    store_dir: str | None = None
+    # 从存储放置文件的方式: auto / hardlink / reflink / copy
+    store_link: str = "auto"
+    http: HttpConfig = field(default_factory=HttpConfig)
+    retry: RetryConfig = field(default_factory=RetryConfig)
+    # npm 模式使用的 registry 地址
+    registry: str = "https://registry.npmjs.org"
+    # 命名的 provider，例如 internal = "https://mirror.internal/unpkg"
+    providers: dict[str, str] = field(default_factory=dict)
+    # 同时请求前 N 个 provider 并采用最先成功的响应，0 或 1 表示依次回退
+    race_providers: int = 0
+    # 同步时生成的预压缩格式 (gzip、br)，compress = true 表示全部
+    compress: list[str] = field(default_factory=list)
+    # 合并为 bundle 的分组 (分组名 -> 包名)；bundle = true 时未分组的包合并为 vendor
+    bundle: bool = False
+    bundles: dict[str, list[str]] = field(default_factory=dict)
+    # 同步时计算的 SRI 算法 (sha256 / sha384 / sha512)，为空时不计算
+    sri: str | None = None
+    # 为 JS/CSS 文件生成带内容哈希的文件名 (如 htmx.min.1a2b3c4d5e6f.js)
+    hashed_filenames: bool = False
+    # 不超过该大小 (字节) 的 JS/CSS 文件由模板标签内联，0 表示不内联
+    inline_threshold: int = 0
 
     @classmethod
     def from_toml(cls, path: Path = Path("pyproject.toml")) -> "VendorConfig":
@@ -34,11 +140,14 @@ class VendorConfig:
         if not path.exists():
             # 默认配置
             return cls(
-                destination="static/vendor", default_provider="unpkg", dependencies={}
+                destination="static/vendor",
+                default_provider="unpkg",
+                dependencies={},
+                store_dir=os.environ.get("DJANGO_JS_VENDOR_STORE"),
             )
 
-        with open(path, "r", encoding="utf-8") as f:
-            data = tomlkit.load(f)
+        with open(path, "rb") as f:
+            data = tomllib.load(f)
 
         tool_config = data.get("tool", {}).get("django-js-vendor", {})
 
@@ -46,6 +155,16 @@ class VendorConfig:
         default_provider = tool_config.get("default_provider", "unpkg")
         raw_deps = tool_config.get("dependencies", {})
 
+        compress = tool_config.get("compress", False)
+        if compress is True:
+            compress = ["gzip", "br"]
+        elif isinstance(compress, str):
+            compress = [compress]
+
+        sri = tool_config.get("sri")
+        if sri is True:
+            sri = "sha384"
+
         dependencies = {}
         for name, value in raw_deps.items():
             if isinstance(value, str):
@@ -59,12 +178,35 @@ class VendorConfig:
                     url=value.get("url"),
                     filename=value.get("filename"),
                     files=value.get("files", []),
+                    provider=value.get("provider"),
+                    esm=value.get("esm", False),
+                    inline=value.get("inline"),
                 )
 
         return cls(
             destination=destination,
             default_provider=default_provider,
             dependencies=dependencies,
+            concurrency=tool_config.get("concurrency", 16),
+            per_host_concurrency=tool_config.get("per_host_concurrency", 6),
+            adaptive_concurrency=tool_config.get("adaptive_concurrency", False),
+            store_dir=os.environ.get("DJANGO_JS_VENDOR_STORE")
+            or tool_config.get("store_dir"),
+            store_link=tool_config.get("store_link", "auto"),
+            http=HttpConfig.from_dict(tool_config.get("http", {})),
+            retry=RetryConfig.from_dict(tool_config.get("retry", {})),
+            registry=tool_config.get("registry", "https://registry.npmjs.org"),
+            providers=dict(tool_config.get("providers", {})),
+            race_providers=tool_config.get("race_providers", 0),
+            compress=list(compress or []),
+            bundle=tool_config.get("bundle", False),
+            bundles={
+                name: list(packages)
+                for name, packages in tool_config.get("bundles", {}).items()
+            },
+            sri=sri or None,
+            hashed_filenames=tool_config.get("hashed_filenames", False),
+            inline_threshold=tool_config.get("inline_threshold", 0),
         )
 
     @staticmethod
@@ -76,6 +218,8 @@ class VendorConfig:
         :param name: 包名
         :param version: 版本号
         """
+        import tomlkit
+
         if not path.exists():
             # Create new file if not exists? Or raise?
             # Usually pyproject.toml exists. If not, create minimal.
@@ -106,6 +250,8 @@ class VendorConfig:
         :param path: 文件路径
         :param name: 包名
         """
+        import tomlkit
+
         if not path.exists():
             return
 
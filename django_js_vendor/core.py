@@ -1,20 +1,240 @@
 import asyncio
+import hashlib
 import json
 import logging
+import os
 import re
 import shutil
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterable
+from contextlib import asynccontextmanager, nullcontext
+from dataclasses import dataclass, replace
+from functools import partial
 from pathlib import Path
-from typing import Any
+from typing import Any, TypeVar
 from urllib.parse import urlparse
 
 import httpx
 from tqdm import tqdm
 
+from . import staging, tracing
+from .bundle import BUNDLE_DIR, DEFAULT_BUNDLE, LOCK_KEY, build_bundles, remove_stale
+from .compress import (
+    EXTENSIONS,
+    compress_file,
+    has_brotli,
+    is_compressible,
+    variant_path,
+    variant_paths,
+)
 from .config import DependencyConfig, VendorConfig
-from .utils import calculate_content_sha256
+from .esm import file_specifiers, module_exports
+from .hashed import hashed_paths, link_hashed
+from .lockfile import (
+    LOCKFILE_NAME,
+    file_matches,
+    integrity_matches,
+    read_lockfile,
+    stat_matches,
+    write_lockfile,
+)
+from .providers import (
+    NpmProvider,
+    Provider,
+    ProviderError,
+    file_url_to_path,
+    get_provider,
+)
+from .retry import RetryPolicy
+from .scheduler import DownloadScheduler
+from .store import ContentStore
+from .tarball import (
+    default_entry_file,
+    expected_tarball_digest,
+    extract_files,
+    is_safe_path,
+    metadata_url,
+)
+from .utils import (
+    calculate_sri,
+    is_immutable_url,
+    make_process_pool,
+    sri_from_integrity,
+)
+from .verify import VerifyReport, locked_files, verify_files
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+# 流式下载时每个块的大小，内存占用上限约为 CHUNK_SIZE * 并发数
+CHUNK_SIZE = 64 * 1024
+
+# 浏览器支持的 SRI 算法，以及模板标签会引用 (需要 SRI) 的文件类型
+SRI_ALGORITHMS = ("sha256", "sha384", "sha512")
+SRI_SUFFIXES = (".js", ".mjs", ".css")
+
+
+def _write_chunk(f, hasher, chunk: bytes) -> tuple[float, float]:
+    """在线程池中更新 hash 并写入数据块，返回两者各自的耗时"""
+    start = time.perf_counter()
+    hasher.update(chunk)
+    hashed = time.perf_counter()
+    f.write(chunk)
+    return hashed - start, time.perf_counter() - hashed
+
+
+def _stat_or_none(path: Path) -> os.stat_result | None:
+    """获取文件状态，文件不存在时返回 None"""
+    try:
+        return path.stat()
+    except FileNotFoundError:
+        return None
+
+
+def _check_package_paths(name: str, files: list[str]) -> None:
+    """
+    确认包内的文件路径不会写到包目录之外。
+
+    :param name: 包名
+    :param files: 相对于包目录的路径
+    :raises VendorError: 存在绝对路径或包含 ``..`` 的路径
+    """
+    unsafe = [f for f in files if not is_safe_path(f)]
+    if unsafe:
+        raise VendorError(f"Unsafe file paths for {name}: {', '.join(unsafe)}")
+
+
+def _copy_with_hash(src: Path, dest: Path) -> str:
+    """在线程池中复制文件并计算 SHA256"""
+    hasher = hashlib.sha256()
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    with open(src, "rb") as s, open(dest, "wb") as d:
+        for chunk in iter(lambda: s.read(CHUNK_SIZE), b""):
+            hasher.update(chunk)
+            d.write(chunk)
+    return hasher.hexdigest()
+
+
+def _replace_if_exists(src: Path, dest: Path) -> None:
+    """在线程池中替换文件 (304 响应没有写入文件)"""
+    if src.exists():
+        os.replace(src, dest)
+
+
+def _open_for_write(path: Path, mode: str = "wb"):
+    """在线程池中创建父目录并打开文件"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    return open(path, mode)
+
+
+def _partial_meta_path(path: Path) -> Path:
+    """可续传的 .part 文件对应的元数据文件 (记录 URL 与 If-Range 验证器)"""
+    return path.with_name(path.name + ".json")
+
+
+def _load_partial(path: Path, url: str, algorithm: str) -> tuple[int, str | None, Any]:
+    """
+    在线程池中读取可续传的 .part 文件，重新计算已下载部分的哈希。
+
+    :return: (已下载字节数, If-Range 验证器, 哈希对象)，不可续传时字节数为 0
+    """
+    hasher = hashlib.new(algorithm)
+    try:
+        with open(_partial_meta_path(path), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return 0, None, hasher
+    if meta.get("url") != url or not meta.get("validator"):
+        return 0, None, hasher
+    offset = 0
+    try:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                hasher.update(chunk)
+                offset += len(chunk)
+    except OSError:
+        return 0, None, hashlib.new(algorithm)
+    return offset, meta["validator"], hasher
+
+
+def _save_partial_meta(path: Path, url: str, validator: str | None) -> None:
+    """在线程池中记录或删除 .part 文件的续传信息"""
+    meta_path = _partial_meta_path(path)
+    if validator is None:
+        meta_path.unlink(missing_ok=True)
+        return
+    meta_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(meta_path, "w", encoding="utf-8") as f:
+        json.dump({"url": url, "validator": validator}, f)
+
+
+def discard_partial(path: Path) -> None:
+    """删除 .part 文件及其续传信息"""
+    path.unlink(missing_ok=True)
+    _partial_meta_path(path).unlink(missing_ok=True)
+
+
+def is_resumable(path: Path) -> bool:
+    """.part 文件是否保留了续传信息"""
+    return path.exists() and _partial_meta_path(path).exists()
+
+
+def _range_validator(response: httpx.Response) -> str | None:
+    """
+    获取可用于 If-Range 的验证器：服务器支持 Range 时使用强 ETag 或 Last-Modified。
+
+    压缩传输时 Range 针对的是压缩后的字节，无法与已解码的 .part 文件对应。
+    """
+    if response.headers.get("Accept-Ranges", "").lower() != "bytes":
+        return None
+    if response.headers.get("Content-Encoding", "identity") != "identity":
+        return None
+    etag = response.headers.get("ETag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return response.headers.get("Last-Modified")
+
+
+def _content_range_start(response: httpx.Response) -> int | None:
+    """解析 206 响应 Content-Range 的起始位置"""
+    match = re.match(r"bytes (\d+)-", response.headers.get("Content-Range", ""))
+    return int(match.group(1)) if match else None
+
+
+@dataclass
+class FetchResult:
+    """一次下载请求的结果"""
+
+    url: str
+    status: int
+    digest: str | None
+    etag: str | None = None
+    last_modified: str | None = None
+    # 多来源下载时实际使用的候选 URL (重定向前)
+    source: str | None = None
+
+    @classmethod
+    def from_response(
+        cls, response: httpx.Response, digest: str | None
+    ) -> "FetchResult":
+        return cls(
+            url=str(response.url),
+            status=response.status_code,
+            digest=digest,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+        )
+
+    def cache_fields(self) -> dict[str, str]:
+        """需要写入 lock 文件的缓存验证字段"""
+        fields = {}
+        if self.etag:
+            fields["etag"] = self.etag
+        if self.last_modified:
+            fields["last_modified"] = self.last_modified
+        return fields
+
 
 class VendorError(Exception):
     """Base exception for vendor errors."""
@@ -28,24 +248,19 @@ class VendorManager:
     def __init__(self, project_root: Path = Path(".")):
         self.project_root = project_root
         self.config_path = project_root / "pyproject.toml"
-        self.lock_path = project_root / "js-vendor.lock"
+        self.lock_path = project_root / LOCKFILE_NAME
         self.config = VendorConfig.from_toml(self.config_path)
+        self._client: httpx.AsyncClient | None = None
+        # 设置后记录每个文件的下载时间线 (见 tracing.Tracer)
+        self.tracer: tracing.Tracer | None = None
 
     def load_lockfile(self) -> dict[str, Any]:
         """读取 Lock 文件"""
-        if not self.lock_path.exists():
-            return {}
-        try:
-            with open(self.lock_path, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except json.JSONDecodeError:
-            logger.warning("Lock file is corrupted. Ignoring.")
-            return {}
+        return read_lockfile(self.lock_path)
 
     def save_lockfile(self, lock_data: dict[str, Any]) -> None:
         """保存 Lock 文件"""
-        with open(self.lock_path, "w", encoding="utf-8") as f:
-            json.dump(lock_data, f, indent=2, sort_keys=True)
+        write_lockfile(self.lock_path, lock_data)
 
     async def download_file(
         self,
@@ -62,129 +277,1153 @@ class VendorManager:
         :param dest_path: 本地目标路径
         :param expected_hash: 期望的 SHA256 哈希值
         """
+        tmp_path = dest_path.with_name(dest_path.name + ".part")
         try:
-            response = await client.get(url, follow_redirects=True)
-            response.raise_for_status()
-            content = response.content
+            result = await self.stream_to_file(client, url, tmp_path)
         except httpx.HTTPError as e:
+            tmp_path.unlink(missing_ok=True)
             raise VendorError(f"Failed to download {url}: {e}")
 
         # Hash Check
-        content_hash = calculate_content_sha256(content)
+        content_hash = result.digest
         if expected_hash and content_hash != expected_hash:
+            tmp_path.unlink(missing_ok=True)
             raise VendorError(
                 f"Hash mismatch for {url}. Expected {expected_hash}, got {content_hash}"
             )
 
         # Save file
-        dest_path.parent.mkdir(parents=True, exist_ok=True)
-        with open(dest_path, "wb") as f:
-            f.write(content)
+        os.replace(tmp_path, dest_path)
 
         return content_hash
 
+    async def stream_to_file(
+        self,
+        client: httpx.AsyncClient,
+        url: str,
+        dest_path: Path,
+        headers: dict[str, str] | None = None,
+        algorithm: str = "sha256",
+        resume: bool = False,
+    ) -> FetchResult:
+        """
+        流式下载文件，边下载边计算哈希，磁盘写入在线程池中执行。
+
+        ``resume`` 为 True 时，如果服务器支持 Range (``Accept-Ranges: bytes``)，
+        中断的下载会保留在 dest_path 中，下次调用时通过 ``Range`` 与 ``If-Range``
+        从已下载的位置继续；服务器返回完整内容 (200) 时从头开始。
+
+        :param client: HTTPX 客户端
+        :param url: 下载链接
+        :param dest_path: 写入路径
+        :param headers: 额外的请求头 (如条件请求头)
+        :param algorithm: 哈希算法，默认为 sha256
+        :param resume: 是否允许断点续传
+        :return: FetchResult，304 时不写入文件且 digest 为 None
+        """
+        loop = asyncio.get_running_loop()
+        offset, validator, hasher = 0, None, hashlib.new(algorithm)
+        if resume:
+            offset, validator, hasher = await loop.run_in_executor(
+                None, _load_partial, dest_path, url, algorithm
+            )
+        request_headers = dict(headers or {})
+        if offset:
+            request_headers["Range"] = f"bytes={offset}-"
+            request_headers["If-Range"] = validator
+
+        # 追踪时通过 httpx 的 trace 扩展记录建立连接与发送请求的时间
+        trace = tracing.current()
+        events: dict[str, float] = {}
+        extensions = None
+        if trace is not None:
+
+            async def on_event(event: str, info: dict[str, Any]) -> None:
+                events.setdefault(event, time.monotonic())
+
+            extensions = {"trace": on_event}
+
+        requested = time.monotonic()
+        async with client.stream(
+            "GET",
+            url,
+            headers=request_headers,
+            follow_redirects=True,
+            extensions=extensions,
+        ) as response:
+            if trace is not None:
+                tracing.record_request(
+                    trace, events, requested, status=response.status_code
+                )
+            if response.status_code == 304:
+                return FetchResult.from_response(response, None)
+            if response.status_code == 416 and offset:
+                # 已下载的部分与服务器内容不一致，重新下载
+                await loop.run_in_executor(None, discard_partial, dest_path)
+                return await self.stream_to_file(
+                    client, url, dest_path, headers, algorithm, resume
+                )
+            if (
+                response.status_code == 206
+                and offset
+                and _content_range_start(response) != offset
+            ):
+                # 返回的范围与请求的不一致，丢弃已下载的部分后不带 Range 重新请求
+                logger.debug(f"Unexpected Content-Range from {url}, restarting")
+                await loop.run_in_executor(None, discard_partial, dest_path)
+                return await self.stream_to_file(
+                    client, url, dest_path, headers, algorithm, resume
+                )
+            response.raise_for_status()
+
+            mode = "wb"
+            if offset and response.status_code == 206:
+                mode = "ab"
+                logger.debug(f"Resuming {url} from byte {offset}")
+            if mode == "wb":
+                hasher = hashlib.new(algorithm)
+            if resume:
+                # 记录续传信息后再写入，传输中断时保留已下载的部分
+                validator = _range_validator(response) or (
+                    validator if mode == "ab" else None
+                )
+                await loop.run_in_executor(
+                    None, _save_partial_meta, dest_path, url, validator
+                )
+
+            f = await loop.run_in_executor(None, _open_for_write, dest_path, mode)
+            transfer_start = time.monotonic()
+            received, hash_time, write_time = 0, 0.0, 0.0
+            try:
+                async for chunk in response.aiter_bytes(CHUNK_SIZE):
+                    hashed, written = await loop.run_in_executor(
+                        None, _write_chunk, f, hasher, chunk
+                    )
+                    received += len(chunk)
+                    hash_time += hashed
+                    write_time += written
+            finally:
+                await loop.run_in_executor(None, f.close)
+                if trace is not None:
+                    # hash 与写入和传输交错进行，只记录累计耗时
+                    trace.bytes += received
+                    trace.add_duration("hash", hash_time)
+                    trace.add_duration("write", write_time)
+                    trace.add_span(
+                        "transfer",
+                        transfer_start,
+                        time.monotonic(),
+                        bytes=received,
+                        offset=offset if mode == "ab" else 0,
+                        hash_time=hash_time,
+                        write_time=write_time,
+                    )
+        if resume:
+            await loop.run_in_executor(None, _save_partial_meta, dest_path, url, None)
+        return FetchResult.from_response(response, hasher.hexdigest())
+
+    async def copy_from_mirror(self, url: str, dest_path: Path) -> FetchResult:
+        """
+        从本地目录镜像复制文件 (file:// URL)，复制与哈希在线程池中执行。
+
+        :param url: file URL
+        :param dest_path: 写入路径
+        """
+        src = file_url_to_path(url)
+        if not src.is_file():
+            raise VendorError(f"{url} not found in local mirror")
+        loop = asyncio.get_running_loop()
+        digest = await loop.run_in_executor(None, _copy_with_hash, src, dest_path)
+        return FetchResult(url=url, status=200, digest=digest)
+
+    async def fetch_json(self, client: httpx.AsyncClient, url: str) -> Any:
+        """
+        请求 JSON 数据 (如 registry 元数据)。
+
+        :param client: HTTPX 客户端
+        :param url: 请求地址
+        """
+        response = await client.get(
+            url, headers={"Accept": "application/json"}, follow_redirects=True
+        )
+        response.raise_for_status()
+        return response.json()
+
+    async def with_retry(
+        self,
+        url: str,
+        request: Callable[[], Awaitable[T]],
+        scheduler: DownloadScheduler | None = None,
+        retry: RetryPolicy | None = None,
+    ) -> T:
+        """
+        在调度器槽位中执行请求，按重试策略处理可恢复的错误。
+
+        :param url: 请求地址，用于按主机限流
+        :param request: 每次尝试时调用，返回新的协程
+        :param scheduler: 下载调度器，为空时不限制并发
+        :param retry: 重试策略，为空时使用配置创建新的策略
+        """
+        retry = retry or RetryPolicy(self.config.retry)
+        for attempt in range(1, retry.attempts + 1):
+            remaining = retry.remaining()
+            if remaining is not None and remaining <= 0:
+                raise VendorError(f"Sync deadline exceeded before requesting {url}")
+
+            start = time.monotonic()
+            try:
+                # 只在实际请求期间占用槽位，重试等待时释放
+                slot = scheduler.slot(url) if scheduler else nullcontext()
+                async with slot:
+                    tracing.record("queue", start, url=url)
+                    if remaining is None:
+                        return await request()
+                    return await asyncio.wait_for(request(), remaining)
+            except asyncio.TimeoutError:
+                retry.record_failure(time.monotonic() - start, retried=False)
+                raise VendorError(f"Sync deadline exceeded while requesting {url}")
+            except httpx.HTTPError as e:
+                elapsed = time.monotonic() - start
+                if attempt == retry.attempts or not retry.is_retryable(e):
+                    retry.record_failure(elapsed, retried=False)
+                    raise
+                delay = retry.delay(attempt, e)
+                remaining = retry.remaining()
+                if remaining is not None and delay >= remaining:
+                    retry.record_failure(elapsed, retried=False)
+                    raise
+                logger.debug(f"Retrying {url} in {delay:.2f}s after error: {e}")
+                trace = tracing.current()
+                if trace is not None:
+                    trace.retries += 1
+                with tracing.span("backoff", url=url, attempt=attempt, error=str(e)):
+                    await asyncio.sleep(delay)
+                retry.record_failure(elapsed + delay)
+        raise VendorError(f"Failed to download {url}")
+
+    async def fetch_one(
+        self,
+        client: httpx.AsyncClient,
+        url: str,
+        tmp_path: Path,
+        headers: dict[str, str] | None = None,
+        scheduler: DownloadScheduler | None = None,
+        retry: RetryPolicy | None = None,
+        resume: bool = True,
+    ) -> FetchResult:
+        """
+        从单个来源下载文件：file:// 从本地镜像复制，其他 URL 流式下载并重试。
+
+        :param client: HTTPX 客户端
+        :param url: 下载链接
+        :param tmp_path: 写入路径
+        :param headers: 额外的请求头
+        :param scheduler: 下载调度器
+        :param retry: 重试策略
+        :param resume: 是否允许断点续传
+        """
+        if urlparse(url).scheme == "file":
+            return await self.copy_from_mirror(url, tmp_path)
+        return await self.with_retry(
+            url,
+            lambda: self.stream_to_file(
+                client, url, tmp_path, headers=headers, resume=resume
+            ),
+            scheduler,
+            retry,
+        )
+
+    async def fetch_with_fallback(
+        self,
+        client: httpx.AsyncClient,
+        name: str,
+        urls: list[str],
+        tmp_path: Path,
+        *,
+        headers: dict[str, str] | None = None,
+        expected_hash: str | None = None,
+        scheduler: DownloadScheduler | None = None,
+        retry: RetryPolicy | None = None,
+        race: int = 0,
+    ) -> FetchResult:
+        """
+        依次尝试多个来源，网络错误或哈希不一致时使用下一个来源。
+
+        ``race`` 大于 1 时同时请求前 race 个来源，采用最先成功 (且哈希一致) 的响应，
+        取消其余请求；全部失败后再依次尝试剩余来源。
+        条件请求头只发送给第一个来源 (etag 属于该服务器)。
+
+        :param client: HTTPX 客户端
+        :param name: 包名，用于错误信息
+        :param urls: 候选 URL，第一个为主 URL
+        :param tmp_path: 写入路径
+        :param headers: 发送给主 URL 的额外请求头
+        :param expected_hash: ``sha256-<hex>`` 格式的期望哈希，为空时不校验
+        :param scheduler: 下载调度器
+        :param retry: 重试策略
+        :param race: 同时请求的来源数
+        :return: 成功来源的 FetchResult，``url`` 为实际响应的地址
+        """
+        last_error: Exception | None = None
+
+        async def attempt(index: int, path: Path) -> FetchResult:
+            try:
+                result = await self.fetch_one(
+                    client,
+                    urls[index],
+                    path,
+                    headers=headers if index == 0 else None,
+                    scheduler=scheduler,
+                    retry=retry,
+                    # 竞速时各来源写入独立的临时文件，不保留
+                    resume=path == tmp_path,
+                )
+                integrity = f"sha256-{result.digest}"
+                if result.digest and expected_hash and integrity != expected_hash:
+                    raise VendorError(
+                        f"Integrity check failed for {name}. "
+                        f"Expected {expected_hash}, got {integrity}"
+                    )
+                result.source = urls[index]
+                return result
+            except VendorError:
+                discard_partial(path)
+                raise
+            except BaseException:
+                # 传输中断时保留可续传的部分，下次重试或 sync 时继续
+                if not is_resumable(path):
+                    discard_partial(path)
+                raise
+
+        start = 0
+        if race > 1 and len(urls) > 1:
+            start = min(race, len(urls))
+            paths = [tmp_path.with_name(f"{tmp_path.name}.{i}") for i in range(start)]
+            tasks = {
+                asyncio.ensure_future(attempt(i, paths[i])): i for i in range(start)
+            }
+            try:
+                pending = set(tasks)
+                while pending:
+                    done, pending = await asyncio.wait(
+                        pending, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    for task in done:
+                        if task.exception() is None:
+                            winner = tasks[task]
+                            await asyncio.get_running_loop().run_in_executor(
+                                None, _replace_if_exists, paths[winner], tmp_path
+                            )
+                            return task.result()
+                        last_error = task.exception()
+                        logger.warning(
+                            f"Source {urls[tasks[task]]} failed for {name}: "
+                            f"{last_error}"
+                        )
+            finally:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                for path in paths:
+                    discard_partial(path)
+
+        for index in range(start, len(urls)):
+            try:
+                return await attempt(index, tmp_path)
+            except (httpx.HTTPError, VendorError) as e:
+                last_error = e
+                if index + 1 < len(urls):
+                    logger.warning(
+                        f"Source {urls[index]} failed for {name}: {e}, "
+                        f"trying {urls[index + 1]}"
+                    )
+        raise last_error or VendorError(f"No source available for {name}")
+
+    def get_providers(self, dep: DependencyConfig | None = None) -> list[Provider]:
+        """
+        获取依赖对应的 Provider 列表 (依赖自身的 provider 优先于 default_provider)，
+        第一个为主 Provider，其余按顺序作为回退。
+
+        :param dep: 依赖配置对象，为空时返回默认 Provider 列表
+        """
+        specs = (dep.provider if dep else None) or self.config.default_provider
+        if isinstance(specs, str):
+            specs = [specs]
+        if not specs:
+            raise VendorError("No provider configured")
+        try:
+            return [
+                get_provider(
+                    spec,
+                    registry=self.config.registry,
+                    aliases=self.config.providers,
+                    project_root=self.project_root,
+                )
+                for spec in specs
+            ]
+        except ProviderError as e:
+            raise VendorError(str(e))
+
+    def get_provider(self, dep: DependencyConfig | None = None) -> Provider:
+        """
+        获取依赖的主 Provider。
+
+        :param dep: 依赖配置对象，为空时返回默认 Provider
+        """
+        return self.get_providers(dep)[0]
+
     def resolve_cdn_url(self, dep: DependencyConfig) -> list[tuple[str, str]]:
         """
         将依赖配置解析为 (URL, 相对路径) 的列表。
 
         :param dep: 依赖配置对象
         """
-        urls = []
-
-        # 1. 显式 URL
-        if dep.url:
-            filename = dep.filename or Path(urlparse(dep.url).path).name
-            urls.append((dep.url, filename))
-            return urls
-
-        # 2. Files 列表 (通常配合 unpkg)
-        if dep.files:
-            version_part = f"@{dep.version}" if dep.version else ""
-            base_url = f"https://unpkg.com/{dep.name}{version_part}"
-            for file_rel_path in dep.files:
-                # unpkg 路径拼接
-                url = f"{base_url}/{file_rel_path}"
-                urls.append((url, file_rel_path))
-            return urls
-
-        # 3. 默认推导 (Main file from unpkg)
-        # 如果没有指定 files，我们假设用户想要这个包的主文件
-        # 这对于像 htmx 这样的单文件库很有用
-        # 但对于多文件库，这可能不够准确。
-        # 简单起见，我们尝试获取 `https://unpkg.com/{name}@{version}`
-        # 注意：unpkg 会重定向到主文件。我们需要在下载时处理重定向并确定文件名。
-        version_part = f"@{dep.version}" if dep.version else ""
-        url = f"https://unpkg.com/{dep.name}{version_part}"
-        # 文件名暂时未知，下载时决定，或者默认为 name.js
-        # 这里我们标记文件名为空，下载器需要处理
-        urls.append((url, f"{dep.name}.js"))
-        return urls
-
-    async def sync(self) -> None:
-        """同步所有依赖"""
+        return self.get_provider(dep).resolve(dep)
+
+    def resolve_sources(
+        self, dep: DependencyConfig
+    ) -> list[tuple[str, str, list[str]]]:
+        """
+        将依赖配置解析为 (主 URL, 相对路径, 备用 URL 列表) 的列表。
+
+        按顺序使用第一个能解析出文件的 Provider 作为主来源；
+        无法提供任何文件的 Provider (如没有版本的 cdnjs) 视为失败，由下一个接替。
+        备用 URL 来自其后的 Provider 中相对路径相同的文件。
+
+        :param dep: 依赖配置对象
+        :raises VendorError: 所有 Provider 都无法解析出文件
+        """
+        resolved = [
+            files
+            for provider in self.get_providers(dep)
+            # tarball 模式无法提供单个文件 (显式 url 与 Provider 无关)
+            if dep.url or not isinstance(provider, NpmProvider)
+            if (files := provider.resolve(dep))
+        ]
+        if not resolved:
+            raise VendorError(f"No provider can resolve files for {dep.name}")
+        primary, *fallbacks = resolved
+        mirrors: dict[str, list[str]] = {}
+        for files in fallbacks:
+            for url, filename in files:
+                mirrors.setdefault(filename, []).append(url)
+
+        sources = []
+        for url, filename in primary:
+            candidates = [u for u in mirrors.get(filename, []) if u != url]
+            sources.append((url, filename, list(dict.fromkeys(candidates))))
+        return sources
+
+    def make_client(self, **kwargs: Any) -> httpx.AsyncClient:
+        """
+        根据 [tool.django-js-vendor.http] 配置创建 HTTP 客户端。
+
+        :param kwargs: 传递给 httpx.AsyncClient 的额外参数
+        """
+        http = self.config.http
+        max_connections = http.max_connections or self.config.concurrency
+        limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=(
+                http.max_keepalive_connections or max_connections
+            ),
+            keepalive_expiry=http.keepalive_expiry,
+        )
+        timeout = httpx.Timeout(http.timeout, connect=http.connect_timeout)
+
+        http2 = http.http2
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logger.warning(
+                    "HTTP/2 requires the 'h2' package "
+                    "(pip install django-js-vendor[http2]). Falling back to HTTP/1.1."
+                )
+                http2 = False
+
+        return httpx.AsyncClient(limits=limits, timeout=timeout, http2=http2, **kwargs)
+
+    @asynccontextmanager
+    async def session(self) -> AsyncIterator[httpx.AsyncClient]:
+        """
+        获取管理器级别的 HTTP 客户端。
+
+        嵌套调用时复用已打开的客户端，这样 add/update/sync 在一次命令运行中
+        共享同一个连接池 (TLS 握手与 keepalive 连接)。
+        """
+        if self._client is not None:
+            yield self._client
+            return
+
+        async with self.make_client() as client:
+            self._client = client
+            try:
+                yield client
+            finally:
+                self._client = None
+
+    def make_scheduler(self) -> DownloadScheduler:
+        """根据配置创建下载调度器"""
+        return DownloadScheduler(
+            limit=self.config.concurrency,
+            per_host=self.config.per_host_concurrency,
+            adaptive=self.config.adaptive_concurrency,
+        )
+
+    def get_store(self) -> ContentStore | None:
+        """根据配置获取全局内容存储，未配置时返回 None"""
+        if not self.config.store_dir:
+            return None
+        return ContentStore(Path(self.config.store_dir), self.config.store_link)
+
+    def prune_store(self) -> tuple[int, int]:
+        """
+        清理全局存储中未被引用的文件。
+
+        :return: (删除的文件数, 释放的字节数)
+        """
+        store = self.get_store()
+        if store is None:
+            raise VendorError(
+                "Content store is not configured. Set 'store_dir' in "
+                "[tool.django-js-vendor] or DJANGO_JS_VENDOR_STORE."
+            )
+        return store.prune()
+
+    def package_fingerprint(self, dep: DependencyConfig) -> str:
+        """
+        计算依赖解析配置 (版本、URL、文件列表与 provider) 的指纹，记录在 lock 文件中。
+
+        :param dep: 依赖配置对象
+        """
+        specs = dep.provider or self.config.default_provider
+        if isinstance(specs, str):
+            specs = [specs]
+        # 展开命名的 provider，修改别名指向的地址同样视为变化
+        providers = [self.config.providers.get(spec, spec) for spec in specs]
+        data = {
+            "version": dep.version,
+            "url": dep.url,
+            "filename": dep.filename,
+            "files": list(dep.files),
+            "providers": providers,
+            "destination": self.config.destination,
+        }
+        if "npm" in providers:
+            data["registry"] = self.config.registry
+        formats = self.compress_formats()
+        if formats:
+            # 启用或修改压缩格式时重新处理已安装的包
+            data["compress"] = formats
+        if self.config.sri:
+            data["sri"] = self.config.sri
+        if dep.esm:
+            data["esm"] = True
+        if self.config.hashed_filenames:
+            data["hashed_filenames"] = True
+        encoded = json.dumps(data, sort_keys=True).encode("utf-8")
+        return hashlib.sha256(encoded).hexdigest()
+
+    def is_package_current(
+        self, lock_pkg: dict[str, Any] | None, fingerprint: str
+    ) -> bool:
+        """
+        判断包是否无需处理：指纹未变化，且 lock 中的所有文件 size/mtime 一致。
+
+        :param lock_pkg: lock 文件中该包的记录
+        :param fingerprint: 当前配置的指纹
+        """
+        if not lock_pkg or lock_pkg.get("fingerprint") != fingerprint:
+            return False
+        if not lock_pkg.get("files"):
+            return False
+        for entry in lock_pkg["files"]:
+            # 预压缩文件与原文件一样需要存在且未被修改
+            for path, record in [
+                (entry.get("path", ""), entry),
+                *variant_paths(entry).items(),
+                *hashed_paths(entry).items(),
+            ]:
+                if not file_matches(self.project_root / path, record):
+                    return False
+        return True
+
+    def compress_formats(self) -> list[str]:
+        """
+        配置中启用且当前环境可用的压缩格式 (未安装 brotli 时不生成 .br)。
+        """
+        unknown = [fmt for fmt in self.config.compress if fmt not in EXTENSIONS]
+        if unknown:
+            raise VendorError(
+                f"Unknown compression formats: {', '.join(unknown)}. "
+                f"Supported: {', '.join(EXTENSIONS)}"
+            )
+        return [fmt for fmt in self.config.compress if fmt != "br" or has_brotli()]
+
+    def sri_algorithm(self) -> str | None:
+        """配置中的 SRI 算法，未启用时返回 None"""
+        algorithm = self.config.sri
+        if algorithm and algorithm not in SRI_ALGORITHMS:
+            raise VendorError(
+                f"Unsupported SRI algorithm: {algorithm}. "
+                f"Supported: {', '.join(SRI_ALGORITHMS)}"
+            )
+        return algorithm
+
+    async def post_process_files(
+        self,
+        items: list[tuple[dict[str, Any], str]],
+        previous: dict[str, dict[str, Any]],
+    ) -> None:
+        """
+        为下载完成的文件计算 SRI 并生成预压缩文件 (均按配置启用)。
+
+        :param items: [(lock 记录, 最终路径)]
+        :param previous: 上次 lock 文件中的记录 ({最终路径: 记录})
+        """
+        algorithm = self.sri_algorithm()
+        if algorithm:
+            await self.compute_sri(items, previous, algorithm)
+        formats = self.compress_formats()
+        if formats:
+            await self.compress_files(items, previous, formats)
+
+    def link_hashed_files(self, entries: list[dict[str, Any]]) -> None:
+        """
+        为 JS 与 CSS 文件创建带内容哈希的硬链接，并记录为 lock 记录的 ``hashed_path``。
+
+        文件名随内容变化，模板标签引用带哈希的 URL 后可以设置永久缓存。
+
+        :param entries: lock 记录，路径可能位于 staging 目录
+        """
+        for entry in entries:
+            link_hashed(self.project_root, entry)
+
+    async def compute_sri(
+        self,
+        items: list[tuple[dict[str, Any], str]],
+        previous: dict[str, dict[str, Any]],
+        algorithm: str,
+    ) -> None:
+        """
+        为 JS 与 CSS 文件计算 base64 编码的 SRI 哈希，记录为 lock 记录的 ``sri``，
+        模板标签据此输出 ``integrity`` 属性。
+
+        原文件哈希未变化时沿用上次的结果；sha256 直接由 lock 中的 integrity 转换，
+        无需读取文件。
+
+        :param items: [(lock 记录, 最终路径)]，记录中的路径可能位于 staging 目录
+        :param previous: 上次 lock 文件中的记录 ({最终路径: 记录})
+        :param algorithm: SRI 算法
+        """
+        loop = asyncio.get_running_loop()
+        pending = []
+        for entry, final_path in items:
+            if not entry["path"].endswith(SRI_SUFFIXES):
+                continue
+            old = previous.get(final_path) or {}
+            if old.get("integrity") == entry["integrity"] and str(
+                old.get("sri", "")
+            ).startswith(f"{algorithm}-"):
+                entry["sri"] = old["sri"]
+                continue
+            sri = sri_from_integrity(entry["integrity"])
+            if algorithm == "sha256" and sri:
+                entry["sri"] = sri
+                continue
+            pending.append(entry)
+        digests = await asyncio.gather(
+            *(
+                loop.run_in_executor(
+                    None, calculate_sri, self.project_root / entry["path"], algorithm
+                )
+                for entry in pending
+            )
+        )
+        for entry, sri in zip(pending, digests):
+            entry["sri"] = sri
+
+    async def compress_files(
+        self,
+        items: list[tuple[dict[str, Any], str]],
+        previous: dict[str, dict[str, Any]],
+        formats: list[str],
+    ) -> None:
+        """
+        为可压缩的文件生成 .gz / .br 文件，并记录在 lock 记录的 ``compressed`` 中。
+
+        原文件的哈希与上次 lock 记录相同且压缩文件未被修改时沿用上次的结果，
+        其余文件在进程池中并行压缩。
+
+        :param items: [(lock 记录, 替换后的最终路径)]，记录中的路径位于 staging 目录
+        :param previous: 上次 lock 文件中的记录 ({最终路径: 记录})
+        :param formats: 压缩格式
+        """
+        loop = asyncio.get_running_loop()
+        pending = []
+        for entry, final_path in items:
+            if not is_compressible(entry["path"]):
+                continue
+            old = previous.get(final_path) or {}
+            old_variants = old.get("compressed") or {}
+            if (
+                old.get("integrity") == entry["integrity"]
+                and all(fmt in old_variants for fmt in formats)
+                and self._variants_intact(entry["path"], old_variants, formats)
+            ):
+                entry["compressed"] = {fmt: old_variants[fmt] for fmt in formats}
+                continue
+            pending.append(entry)
+        if not pending:
+            return
+
+        print(f"Compressing {len(pending)} files...")
+        with make_process_pool() as pool:
+            results = await asyncio.gather(
+                *(
+                    loop.run_in_executor(
+                        pool,
+                        compress_file,
+                        str(self.project_root / entry["path"]),
+                        formats,
+                    )
+                    for entry in pending
+                )
+            )
+        for entry, variants in zip(pending, results):
+            entry["compressed"] = variants
+
+    def _variants_intact(
+        self, path: str, variants: dict[str, Any], formats: list[str]
+    ) -> bool:
+        """压缩文件 (已链接到 staging 目录) 的 size/mtime 是否与记录一致"""
+        for fmt in formats:
+            record = variants[fmt]
+            if record is None:
+                continue
+            if not file_matches(self.project_root / variant_path(path, fmt), record):
+                return False
+        return True
+
+    def bundle_groups(self) -> dict[str, list[str]]:
+        """
+        配置中的 bundle 分组，分组内的包按 pyproject.toml 中的依赖顺序排列。
+        """
+        order = list(self.config.dependencies)
+        groups: dict[str, list[str]] = {}
+        grouped: dict[str, str] = {}
+        for name, members in self.config.bundles.items():
+            unknown = [m for m in members if m not in self.config.dependencies]
+            if unknown:
+                logger.warning(
+                    f"Ignoring unknown packages in bundle {name}: {', '.join(unknown)}"
+                )
+            for member in members:
+                dep = self.config.dependencies.get(member)
+                if dep and dep.esm:
+                    raise VendorError(
+                        f"Package {member} is an ES module and cannot be bundled"
+                    )
+                if member in grouped and grouped[member] != name:
+                    raise VendorError(
+                        f"Package {member} is in both bundles "
+                        f"{grouped[member]} and {name}"
+                    )
+                grouped[member] = name
+            groups[name] = [n for n in order if n in members]
+        if self.config.bundle:
+            # ES module 通过 import map 加载，不能与普通脚本合并
+            rest = {
+                n
+                for n in order
+                if n not in grouped and not self.config.dependencies[n].esm
+            }
+            members = set(groups.get(DEFAULT_BUNDLE, [])) | rest
+            groups[DEFAULT_BUNDLE] = [n for n in order if n in members]
+        return {name: members for name, members in groups.items() if members}
+
+    async def update_bundles(
+        self, new_lock_data: dict[str, Any], lock_data: dict[str, Any]
+    ) -> set[Path]:
+        """
+        按配置重新生成 bundle，记录写入 new_lock_data 的保留键。
+
+        旧的 bundle 文件在新的 lock 文件保存后才能删除 (模板可能仍在引用)。
+
+        :param new_lock_data: 新的 lock 数据，路径为最终路径
+        :param lock_data: 上次的 lock 数据
+        :return: bundle 目录中需要保留的文件
+        """
+        loop = asyncio.get_running_loop()
+        groups = self.bundle_groups()
+        previous = lock_data.get(LOCK_KEY)
+        new_lock_data.pop(LOCK_KEY, None)
+        if not groups:
+            return set()
+        record = await loop.run_in_executor(
+            None,
+            build_bundles,
+            self.project_root,
+            self.config.destination,
+            groups,
+            new_lock_data,
+            previous if isinstance(previous, dict) else None,
+        )
+        if record is None:
+            return set()
+
+        await self.post_process_files(
+            [(entry, entry["path"]) for entry in record["files"]],
+            locked_files(lock_data),
+        )
+        new_lock_data[LOCK_KEY] = record
+        keep = set()
+        for entry in record["files"]:
+            keep.add(self.project_root / entry["path"])
+            keep.update(self.project_root / p for p in variant_paths(entry))
+        return keep
+
+    def select_packages(self, packages: Iterable[str] | str | None) -> set[str]:
+        """
+        校验并返回需要同步的包名，为空时返回全部依赖。
+
+        :param packages: 包名或包名列表
+        """
+        if packages is None:
+            return set(self.config.dependencies)
+        if isinstance(packages, str):
+            packages = [packages]
+        selected = set(packages)
+        unknown = sorted(selected - set(self.config.dependencies))
+        if unknown:
+            raise VendorError(f"Unknown packages: {', '.join(unknown)}")
+        return selected
+
+    async def sync(
+        self,
+        packages: Iterable[str] | str | None = None,
+        paranoid: bool = False,
+        revalidate: bool = False,
+    ) -> None:
+        """
+        同步依赖。
+
+        配置指纹未变化且文件完整的包直接沿用 lock 记录；指定 packages 时只处理这些包，
+        其他包的 lock 记录保持不变。
+
+        :param packages: 需要同步的包名，为空时同步全部依赖
+        :param paranoid: 为 True 时忽略 size/mtime 快速路径，重新计算所有已有文件的哈希
+        :param revalidate: 为 True 时对可变 URL 发送条件请求，获取服务器上的新内容
+        """
+        selected = self.select_packages(packages)
         lock_data = self.load_lockfile()
         new_lock_data = {}
+        fingerprints: dict[str, str] = {}
+        scheduler = self.make_scheduler()
+        store = self.get_store()
+        retry = RetryPolicy(self.config.retry)
+        options = {
+            "paranoid": paranoid,
+            "scheduler": scheduler,
+            "store": store,
+            "retry": retry,
+        }
 
-        tasks = []
-        timeout = httpx.Timeout(30.0, connect=60.0)
-        async with httpx.AsyncClient(timeout=timeout) as client:
-            for name, dep in self.config.dependencies.items():
-                resolved_items = self.resolve_cdn_url(dep)
-
-                for url, filename in resolved_items:
-                    # 确定目标路径
-                    # 如果是默认推导的 url (unpkg root)，我们需要先 HEAD 请求获取真实 URL 吗？
-                    # 为了并发效率，直接 GET 并 follow redirects 是最简单的。
-
-                    # 检查 Lock 文件中是否有此 URL
-                    expected_hash = None
-                    if name in lock_data:
-                        files = lock_data[name].get("files", [])
-                        for f in files:
-                            if f.get("url") == url:
-                                expected_hash = f.get("integrity")
-                                # 如果在 lock 文件中找到，使用 lock 中的路径作为目标路径
-                                # 这样可以确保幂等性检查时使用的是正确的文件名（处理过重定向后的）
-                                lock_path = f.get("path")
-                                if lock_path:
-                                    # lock_path 是相对路径，转换为绝对路径
-                                    filename = Path(lock_path).name
-                                break
-
-                    dest_dir = self.project_root / self.config.destination / name
-                    dest_path = dest_dir / filename
-
-                    # 创建下载任务
-                    tasks.append(
-                        self.download_task(client, name, url, dest_path, expected_hash)
+        # 先生成下载计划；只有存在远程 URL 时才需要 HTTP 客户端
+        loop = asyncio.get_running_loop()
+        jobs: list[
+            tuple[str, str, Callable[[httpx.AsyncClient | None], Awaitable[Any]]]
+        ] = []
+        stage_dirs: dict[str, Path] = {}
+        errors: dict[str, BaseException] = {}
+        needs_http = False
+        for name, dep in self.config.dependencies.items():
+            if name not in selected:
+                if name in lock_data:
+                    new_lock_data[name] = lock_data[name]
+                continue
+            fingerprint = self.package_fingerprint(dep)
+            if (
+                not paranoid
+                and not revalidate
+                and self.is_package_current(lock_data.get(name), fingerprint)
+            ):
+                new_lock_data[name] = lock_data[name]
+                continue
+            fingerprints[name] = fingerprint
+
+            # 所有文件写入同级的 staging 目录，全部校验通过后再整体替换包目录
+            live_dir = self.project_root / self.config.destination / name
+            stage_dirs[name] = await loop.run_in_executor(
+                None, staging.prepare, live_dir
+            )
+
+            if isinstance(self.get_provider(dep), NpmProvider) and not dep.url:
+                # npm tarball 模式：每个包一个任务
+                needs_http = True
+                jobs.append(
+                    (
+                        name,
+                        f"npm:{name}@{dep.version or 'latest'}",
+                        partial(
+                            self.tarball_task,
+                            name=name,
+                            dep=dep,
+                            lock_pkg=lock_data.get(name),
+                            dest_dir=stage_dirs[name],
+                            **options,
+                        ),
+                    )
+                )
+                continue
+
+            if dep.esm:
+                # ES module：先读取 package.json 确定入口，再下载文件
+                needs_http = True
+                jobs.append(
+                    (
+                        name,
+                        f"esm:{name}@{dep.version or 'latest'}",
+                        partial(
+                            self.module_task,
+                            name=name,
+                            dep=dep,
+                            lock_pkg=lock_data.get(name),
+                            dest_dir=stage_dirs[name],
+                            revalidate=revalidate,
+                            **options,
+                        ),
+                    )
+                )
+                continue
+
+            try:
+                sources = self.resolve_sources(dep)
+            except VendorError as e:
+                errors[name] = e
+                continue
+            for url, filename, mirrors in sources:
+                # 确定目标路径
+                # 如果是默认推导的 url (unpkg root)，我们需要先 HEAD 请求获取真实 URL 吗？
+                # 为了并发效率，直接 GET 并 follow redirects 是最简单的。
+                needs_http = needs_http or any(
+                    urlparse(u).scheme != "file" for u in [url, *mirrors]
+                )
+
+                # 检查 Lock 文件中是否有此 URL
+                lock_entry, filename = self.find_lock_entry(
+                    name, url, filename, lock_data.get(name)
+                )
+                dest_path = stage_dirs[name] / filename
+
+                # 创建下载任务
+                jobs.append(
+                    (
+                        name,
+                        url,
+                        partial(
+                            self.download_task,
+                            name=name,
+                            url=url,
+                            dest_path=dest_path,
+                            lock_entry=lock_entry,
+                            mirrors=mirrors,
+                            revalidate=revalidate,
+                            **options,
+                        ),
                     )
+                )
+
+        unchanged = len(selected) - len(fingerprints)
+        if unchanged:
+            print(f"{unchanged} packages up to date.")
 
-            # 执行所有下载任务
+        results = []
+        session = self.session() if needs_http and jobs else nullcontext()
+        async with session as client:
+            tasks = [
+                self._run_job(name, label, job, client) for name, label, job in jobs
+            ]
+
+            # 执行所有下载任务；某个包失败时不影响其他包
             print(f"Downloading {len(tasks)} files...")
-            results = []
             for f in tqdm(asyncio.as_completed(tasks), total=len(tasks)):
-                results.append(await f)
-
-            # 构建新的 lock 数据
-            for res in results:
-                name, url, dest_rel, integrity = res
-                if name not in new_lock_data:
-                    new_lock_data[name] = {"files": []}
-                new_lock_data[name]["files"].append(
-                    {"url": url, "path": dest_rel.as_posix(), "integrity": integrity}
+                name, res, error = await f
+                if error is not None:
+                    errors.setdefault(name, error)
+                    continue
+                # tarball 任务返回整个包的文件列表
+                results.extend(res if isinstance(res, list) else [res])
+
+        # 构建新的 lock 数据
+        for name, entry in results:
+            if name in errors:
+                continue
+            if name not in new_lock_data:
+                new_lock_data[name] = {"fingerprint": fingerprints[name], "files": []}
+            new_lock_data[name]["files"].append(entry)
+
+        # 声明了 files 却没有得到任何文件时不替换包目录
+        for name in stage_dirs:
+            dep = self.config.dependencies[name]
+            if name not in errors and dep.files and name not in new_lock_data:
+                errors[name] = VendorError(f"No files resolved for {name}")
+
+        # 失败的包保留原来的文件与 lock 记录 (staging 中的 .part 文件留待续传)
+        for name in errors:
+            if name in lock_data:
+                new_lock_data[name] = lock_data[name]
+            live_dir = self.project_root / self.config.destination / name
+            await loop.run_in_executor(None, staging.abandon, live_dir)
+
+        # 为成功的包计算 SRI 并生成预压缩文件 (在 staging 目录中，与包一起替换)
+        if "br" in self.config.compress and "br" not in self.compress_formats():
+            logger.warning(
+                "brotli is not installed (pip install django-js-vendor[brotli]); "
+                "skipping .br files."
+            )
+        items = []
+        for name, stage_dir in stage_dirs.items():
+            if name in errors or name not in new_lock_data:
+                continue
+            stage_rel = stage_dir.relative_to(self.project_root).as_posix()
+            live_rel = (Path(self.config.destination) / name).as_posix()
+            for entry in new_lock_data[name]["files"]:
+                final = live_rel + entry["path"][len(stage_rel) :]
+                items.append((entry, final))
+        if items:
+            await self.post_process_files(items, locked_files(lock_data))
+            if self.config.hashed_filenames:
+                await loop.run_in_executor(
+                    None, self.link_hashed_files, [entry for entry, _ in items]
                 )
 
+        # 替换包目录，lock 中的路径从 staging 目录改为包目录
+        for name, stage_dir in stage_dirs.items():
+            if name in errors:
+                continue
+            pkg = new_lock_data.setdefault(
+                name, {"fingerprint": fingerprints[name], "files": []}
+            )
+            live_dir = self.project_root / self.config.destination / name
+            keep = set()
+            for entry in pkg["files"]:
+                keep.add(self.project_root / entry["path"])
+                keep.update(self.project_root / p for p in variant_paths(entry))
+                keep.update(self.project_root / p for p in hashed_paths(entry))
+            await loop.run_in_executor(None, staging.commit, live_dir, stage_dir, keep)
+            stage_rel = stage_dir.relative_to(self.project_root).as_posix()
+            live_rel = live_dir.relative_to(self.project_root).as_posix()
+            for entry in pkg["files"]:
+                for key in ("path", "hashed_path"):
+                    if key in entry:
+                        entry[key] = live_rel + entry[key][len(stage_rel) :]
+
+        # 包目录替换完成后重新生成 bundle
+        bundle_files = await self.update_bundles(new_lock_data, lock_data)
         self.save_lockfile(new_lock_data)
+        await loop.run_in_executor(
+            None,
+            remove_stale,
+            self.project_root / self.config.destination / BUNDLE_DIR,
+            bundle_files,
+        )
+        if retry.stats.retries:
+            print(
+                f"Retried {retry.stats.retries} requests, "
+                f"{retry.stats.wasted:.1f}s spent on failed attempts and backoff."
+            )
+        if errors:
+            # 与单个任务失败时一致，抛出第一个错误
+            raise next(iter(errors.values()))
         print("Sync completed. Lock file updated.")
 
+    def find_lock_entry(
+        self,
+        name: str,
+        url: str,
+        filename: str | Path,
+        lock_pkg: dict[str, Any] | None,
+    ) -> tuple[dict[str, Any] | None, str | Path]:
+        """
+        查找 lock 文件中 URL 对应的记录。
+
+        找到时使用 lock 中的路径作为目标路径，
+        这样可以确保幂等性检查时使用的是正确的文件名（处理过重定向后的）。
+
+        :param name: 包名
+        :param url: 下载链接
+        :param filename: 根据配置推导的相对路径
+        :param lock_pkg: lock 文件中该包的记录
+        :return: (lock 记录, 相对于包目录的路径)
+        """
+        for f in (lock_pkg or {}).get("files", []):
+            if f.get("url") != url:
+                continue
+            lock_path = f.get("path")
+            if lock_path:
+                # lock_path 相对于项目根目录，保留包目录下的子路径
+                pkg_dir = Path(self.config.destination) / name
+                try:
+                    filename = Path(lock_path).relative_to(pkg_dir)
+                except ValueError:
+                    filename = Path(lock_path).name
+            return f, filename
+        return None, filename
+
+    async def _run_job(
+        self,
+        name: str,
+        label: str,
+        job: Callable[[httpx.AsyncClient | None], Awaitable[Any]],
+        client: httpx.AsyncClient | None,
+    ) -> tuple[str, Any, Exception | None]:
+        """执行单个下载任务，返回 (包名, 结果, 错误)"""
+        try:
+            # 每个任务运行在独立的 asyncio Task 中，追踪上下文互不影响
+            with tracing.track(self.tracer, name, label):
+                return name, await job(client), None
+        except Exception as e:
+            return name, None, e
+
+    def make_file_entry(
+        self, url: str, dest_path: Path, integrity: str, **extra: Any
+    ) -> dict[str, Any]:
+        """
+        生成 lock 文件中的单个文件记录，附带 size 与 mtime 用于快速校验。
+
+        :param url: 请求的 URL
+        :param dest_path: 文件的最终路径
+        :param integrity: ``sha256-<hex>`` 格式的哈希
+        :param extra: 其他需要记录的字段 (如 etag、last_modified)
+        """
+        st = dest_path.stat()
+        return {
+            "url": url,
+            # 返回相对路径
+            "path": dest_path.relative_to(self.project_root).as_posix(),
+            "integrity": integrity,
+            "size": st.st_size,
+            "mtime": st.st_mtime_ns,
+            **extra,
+        }
+
     async def download_task(
         self,
         client: httpx.AsyncClient,
         name: str,
         url: str,
         dest_path: Path,
-        expected_hash: str | None = None,
-    ) -> tuple[str, str, Path, str]:
+        lock_entry: dict[str, Any] | None = None,
+        mirrors: list[str] | None = None,
+        *,
+        paranoid: bool = False,
+        revalidate: bool = False,
+        scheduler: DownloadScheduler | None = None,
+        store: ContentStore | None = None,
+        retry: RetryPolicy | None = None,
+    ) -> tuple[str, dict[str, Any]]:
         """
         单个下载任务封装。
 
@@ -192,122 +1431,539 @@ class VendorManager:
         :param name: 包名
         :param url: 下载链接
         :param dest_path: 本地目标路径
-        :param expected_hash: 期望的 SHA256 哈希值
+        :param lock_entry: lock 文件中该 URL 对应的记录
+        :param mirrors: 回退 Provider 提供的备用 URL，主 URL 失败时依次尝试
+        :param paranoid: 是否强制重新计算已有文件的哈希
+        :param revalidate: 是否向服务器重新验证可变 URL (发送条件请求)
+        :param scheduler: 下载调度器，为空时不限制并发
+        :param store: 全局内容存储，命中时无需访问网络
+        :param retry: 重试策略，在一次 sync 的所有任务之间共享
+        :return: (包名, 新的 lock 文件记录)
         """
         # 特殊处理：如果 URL 是 unpkg 根目录 (如 https://unpkg.com/htmx)，
         # httpx follow_redirects 会带我们去真实路径。
         # 我们需要更新 dest_path 的文件名，如果是默认的 name.js 的话。
 
+        loop = asyncio.get_running_loop()
+        lock_entry = lock_entry or {}
+        expected_hash = lock_entry.get("integrity")
+        # 精确版本的 URL 内容不会改变，无需向服务器重新验证
+        immutable = is_immutable_url(url)
+        revalidate = revalidate and not immutable
+        # 保留缓存相关的字段，304 时沿用
+        cache_fields = {
+            key: lock_entry[key]
+            for key in ("resolved", "etag", "last_modified")
+            if lock_entry.get(key)
+        }
         try:
             # Idempotency Check
-            if dest_path.exists() and expected_hash:
-                # Check if we should verify integrity of existing file
-                existing_hash = calculate_content_sha256(dest_path.read_bytes())
-                existing_integrity = f"sha256-{existing_hash}"
-                if existing_integrity == expected_hash:
-                    # Log or print skipping?
+            st = _stat_or_none(dest_path)
+            local_valid = False
+            if st is not None and expected_hash:
+                local_valid = await self.verify_local_file(
+                    dest_path, st, lock_entry, paranoid
+                )
+                if local_valid and not revalidate:
                     # logger.info(f"Skipping {name} (already installed)")
-                    rel_path = dest_path.relative_to(self.project_root)
-                    return name, url, rel_path, expected_hash
+                    return name, self.make_file_entry(
+                        url, dest_path, expected_hash, **cache_fields
+                    )
+
+            # Content store lookup
+            if store and not revalidate:
+                cached_hash = expected_hash
+                if not cached_hash and immutable:
+                    # 没有 lock 记录时，通过 URL 索引查找精确版本的内容
+                    indexed = await loop.run_in_executor(None, store.lookup_url, url)
+                    if indexed:
+                        cached_hash = indexed["integrity"]
+                        if indexed.get("resolved"):
+                            cache_fields["resolved"] = indexed["resolved"]
+                            dest_path = self._resolve_default_filename(
+                                name, dest_path, indexed["resolved"]
+                            )
+                if cached_hash:
+                    method = await loop.run_in_executor(
+                        None, store.materialize, cached_hash, dest_path
+                    )
+                    if method:
+                        logger.debug(f"Linked {dest_path} from store ({method})")
+                        return name, self.make_file_entry(
+                            url, dest_path, cached_hash, **cache_fields
+                        )
+
+            # 精确版本的默认推导 URL 直接请求重定向后的地址
+            fetch_url = url
+            if immutable and cache_fields.get("resolved"):
+                fetch_url = cache_fields["resolved"]
+
+            # 本地文件有效时发送条件请求，304 可以跳过传输
+            headers = {}
+            if local_valid:
+                if lock_entry.get("etag"):
+                    headers["If-None-Match"] = lock_entry["etag"]
+                if lock_entry.get("last_modified"):
+                    headers["If-Modified-Since"] = lock_entry["last_modified"]
 
             # Retry logic
-            response = None
-            last_error = None
-            success = False
-            for attempt in range(3):
-                try:
-                    response = await client.get(url, follow_redirects=True)
-                    response.raise_for_status()
-                    success = True
-                    break
-                except httpx.HTTPError as e:
-                    last_error = e
-                    if attempt < 2:
-                        await asyncio.sleep(1)
-                        continue
+            # 先写入 .part 临时文件，校验通过后再替换到目标路径
+            # 重新验证可变 URL 时允许内容变化，不校验哈希
+            tmp_path = dest_path.with_name(dest_path.name + ".part")
+            result = await self.fetch_with_fallback(
+                client,
+                name,
+                [fetch_url, *(mirrors or [])],
+                tmp_path,
+                headers=headers,
+                expected_hash=None if revalidate else expected_hash,
+                scheduler=scheduler,
+                retry=retry,
+                race=self.config.race_providers,
+            )
 
-            if not success:
-                raise last_error or VendorError(f"Failed to download {url}")
+            if result.status == 304:
+                # 服务器内容未变化，沿用本地文件
+                discard_partial(tmp_path)
+                cache_fields.update(result.cache_fields())
+                return name, self.make_file_entry(
+                    url, dest_path, expected_hash, **cache_fields
+                )
 
             # 如果是默认文件名，尝试从 URL 推断
-            if dest_path.name == f"{name}.js":
-                real_filename = Path(urlparse(str(response.url)).path).name
-                dest_path = dest_path.with_name(real_filename)
+            dest_path = self._resolve_default_filename(name, dest_path, result.url)
 
-            content = response.content
-            integrity = calculate_content_sha256(content)
-            integrity_str = f"sha256-{integrity}"
+            integrity_str = f"sha256-{result.digest}"
+            from_primary = result.source in (None, fetch_url)
 
-            if expected_hash and integrity_str != expected_hash:
-                raise VendorError(
-                    f"Integrity check failed for {name}. "
-                    f"Expected {expected_hash}, got {integrity_str}"
-                )
+            with tracing.span("write"):
+                await loop.run_in_executor(None, os.replace, tmp_path, dest_path)
+                if store:
+                    await loop.run_in_executor(
+                        None, store.import_file, dest_path, integrity_str
+                    )
+                    # 备用来源的内容只由 lock 中的哈希保证，不写入主 URL 的索引
+                    if immutable and from_primary:
+                        await loop.run_in_executor(
+                            None, store.record_url, url, integrity_str, result.url
+                        )
 
-            dest_path.parent.mkdir(parents=True, exist_ok=True)
-            with open(dest_path, "wb") as f:
-                f.write(content)
+            if from_primary:
+                cache_fields = result.cache_fields()
+                if result.url != url:
+                    cache_fields["resolved"] = result.url
+            else:
+                # etag 属于备用服务器，不能用于主 URL 的条件请求
+                cache_fields = {"source": result.url}
 
-            # 返回相对路径
-            rel_path = dest_path.relative_to(self.project_root)
             # 使用原始 URL (requested URL) 而不是 response.url
             # 这样 lock 文件中存储的是 pyproject.toml 解析出的 URL
             # 下次 install 时才能正确匹配
-            return name, url, rel_path, integrity_str
+            return name, self.make_file_entry(
+                url, dest_path, integrity_str, **cache_fields
+            )
 
         except Exception as e:
             logger.error(f"Error downloading {name} from {url}: {e}")
             raise
 
+    async def tarball_task(
+        self,
+        client: httpx.AsyncClient,
+        name: str,
+        dep: DependencyConfig,
+        lock_pkg: dict[str, Any] | None = None,
+        dest_dir: Path | None = None,
+        *,
+        paranoid: bool = False,
+        scheduler: DownloadScheduler | None = None,
+        store: ContentStore | None = None,
+        retry: RetryPolicy | None = None,
+    ) -> list[tuple[str, dict[str, Any]]]:
+        """
+        npm tarball 模式：每个包只请求一次 registry tarball，
+        按 registry 提供的 integrity 校验后，只解压 ``files`` 中需要的文件。
+
+        :param client: HTTPX 客户端
+        :param name: 包名
+        :param dep: 依赖配置
+        :param lock_pkg: lock 文件中该包的记录
+        :param dest_dir: 写入目录，默认为包目录 (sync 时为 staging 目录)
+        :param paranoid: 是否强制重新计算已有文件的哈希
+        :param scheduler: 下载调度器，为空时不限制并发
+        :param store: 全局内容存储，命中时无需访问网络
+        :param retry: 重试策略，在一次 sync 的所有任务之间共享
+        :return: [(包名, 新的 lock 文件记录)]
+        """
+        loop = asyncio.get_running_loop()
+        dest_dir = dest_dir or self.project_root / self.config.destination / name
+        # lock 记录按相对于包目录的路径索引
+        pkg_dir = Path(self.config.destination) / name
+        locked = {}
+        for f in (lock_pkg or {}).get("files", []):
+            try:
+                locked[Path(f.get("path", "")).relative_to(pkg_dir).as_posix()] = f
+            except ValueError:
+                continue
+
+        # 1. 本地或存储中已有 lock 记录的全部文件时，不访问网络
+        files = list(dep.files) or list(locked)
+        if dep.esm and not any(f.get("specifiers") for f in locked.values()):
+            # 首次记录 ES module 入口需要 registry 元数据
+            files = []
+        _check_package_paths(name, files)
+        entries = []
+        for rel in files:
+            dest_path = dest_dir / rel
+            entry = locked.get(rel)
+            if not entry or not entry.get("integrity"):
+                break
+            st = _stat_or_none(dest_path)
+            if st is None or not await self.verify_local_file(
+                dest_path, st, entry, paranoid
+            ):
+                if not store or not await loop.run_in_executor(
+                    None, store.materialize, entry["integrity"], dest_path
+                ):
+                    break
+            new_entry = self.make_file_entry(
+                entry["url"], dest_path, entry["integrity"]
+            )
+            if entry.get("specifiers"):
+                new_entry["specifiers"] = entry["specifiers"]
+            entries.append((name, new_entry))
+        else:
+            if files:
+                return entries
+
+        # 2. 获取版本元数据与 tarball 地址
+        provider = self.get_provider(dep)
+        registry = getattr(provider, "registry", self.config.registry)
+        meta_url = metadata_url(registry, name, dep.version)
+        metadata = await self.with_retry(
+            meta_url, lambda: self.fetch_json(client, meta_url), scheduler, retry
+        )
+        dist = metadata.get("dist") or {}
+        tarball_url = dist.get("tarball")
+        if not tarball_url:
+            raise VendorError(f"No tarball found for {name} in {meta_url}")
+        if dep.esm:
+            exports = module_exports(metadata)
+            files = list(dep.files)
+            if not files and "." in exports:
+                files = [exports["."]]
+            if not files:
+                raise VendorError(f"No ES module entry found for {name} in {meta_url}")
+            specifiers = file_specifiers(name, exports, files)
+        else:
+            files = list(dep.files) or [default_entry_file(metadata)]
+            specifiers = {}
+        _check_package_paths(name, files)
+
+        # 3. 流式下载 tarball，按 registry 的 integrity 增量校验
+        expected = expected_tarball_digest(dist)
+        algorithm = expected[0] if expected else "sha256"
+        tmp_path = dest_dir / ".package.tgz.part"
+        try:
+            result = await self.with_retry(
+                tarball_url,
+                lambda: self.stream_to_file(
+                    client, tarball_url, tmp_path, algorithm=algorithm, resume=True
+                ),
+                scheduler,
+                retry,
+            )
+        except httpx.HTTPError:
+            # 保留可续传的部分 tarball
+            if not is_resumable(tmp_path):
+                discard_partial(tmp_path)
+            raise
+        try:
+            if expected and result.digest != expected[1]:
+                raise VendorError(
+                    f"Tarball integrity check failed for {name}. "
+                    f"Expected {dist.get('integrity') or dist.get('shasum')}"
+                )
+
+            # 4. 在线程池中只解压需要的文件 (写入 .part 文件)
+            with tracing.span("write", extract=len(files)):
+                digests = await loop.run_in_executor(
+                    None, extract_files, tmp_path, dest_dir, files
+                )
+        finally:
+            discard_partial(tmp_path)
+
+        missing = [rel for rel in files if rel not in digests]
+        parts = [dest_dir / (rel + ".part") for rel in digests]
+        try:
+            if missing:
+                raise VendorError(
+                    f"Files not found in {name} tarball: {', '.join(missing)}"
+                )
+            for rel in files:
+                integrity = f"sha256-{digests[rel]}"
+                entry = locked.get(rel)
+                if entry and entry.get("integrity") not in (None, integrity):
+                    raise VendorError(
+                        f"Integrity check failed for {name}/{rel}. "
+                        f"Expected {entry['integrity']}, got {integrity}"
+                    )
+        except VendorError:
+            for part in parts:
+                part.unlink(missing_ok=True)
+            raise
+
+        entries = []
+        for rel in files:
+            dest_path = dest_dir / rel
+            integrity = f"sha256-{digests[rel]}"
+            await loop.run_in_executor(
+                None,
+                os.replace,
+                dest_path.with_name(dest_path.name + ".part"),
+                dest_path,
+            )
+            if store:
+                await loop.run_in_executor(
+                    None, store.import_file, dest_path, integrity
+                )
+            entry = self.make_file_entry(f"{tarball_url}#{rel}", dest_path, integrity)
+            if rel in specifiers:
+                entry["specifiers"] = specifiers[rel]
+            entries.append((name, entry))
+        return entries
+
+    async def fetch_package_json(
+        self,
+        client: httpx.AsyncClient | None,
+        dep: DependencyConfig,
+        scheduler: DownloadScheduler | None = None,
+        retry: RetryPolicy | None = None,
+    ) -> dict[str, Any]:
+        """
+        读取依赖的 package.json，来源不提供 package.json 时返回空字典。
+
+        :param client: HTTPX 客户端
+        :param dep: 依赖配置
+        :param scheduler: 下载调度器，为空时不限制并发
+        :param retry: 重试策略
+        """
+        url = self.get_provider(dep).package_json_url(dep)
+        if url is None:
+            return {}
+        if urlparse(url).scheme == "file":
+            loop = asyncio.get_running_loop()
+            try:
+                text = await loop.run_in_executor(
+                    None, file_url_to_path(url).read_text, "utf-8"
+                )
+                return json.loads(text)
+            except (OSError, ValueError):
+                return {}
+        try:
+            return await self.with_retry(
+                url, lambda: self.fetch_json(client, url), scheduler, retry
+            )
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 404:
+                return {}
+            raise
+
+    async def module_task(
+        self,
+        client: httpx.AsyncClient | None,
+        name: str,
+        dep: DependencyConfig,
+        lock_pkg: dict[str, Any] | None = None,
+        dest_dir: Path | None = None,
+        *,
+        paranoid: bool = False,
+        revalidate: bool = False,
+        scheduler: DownloadScheduler | None = None,
+        store: ContentStore | None = None,
+        retry: RetryPolicy | None = None,
+    ) -> list[tuple[str, dict[str, Any]]]:
+        """
+        ES module 包：从 package.json 的 exports (或 module) 解析入口与子路径，
+        未指定 files 时下载包入口，并在文件记录中写入对应的 bare specifier。
+
+        :param client: HTTPX 客户端
+        :param name: 包名
+        :param dep: 依赖配置
+        :param lock_pkg: lock 文件中该包的记录
+        :param dest_dir: 写入目录，默认为包目录 (sync 时为 staging 目录)
+        :param paranoid: 是否强制重新计算已有文件的哈希
+        :param revalidate: 是否向服务器重新验证可变 URL (发送条件请求)
+        :param scheduler: 下载调度器，为空时不限制并发
+        :param store: 全局内容存储，命中时无需访问网络
+        :param retry: 重试策略，在一次 sync 的所有任务之间共享
+        :return: [(包名, 新的 lock 文件记录)]
+        """
+        dest_dir = dest_dir or self.project_root / self.config.destination / name
+        exports = {}
+        if not dep.url:
+            exports = module_exports(
+                await self.fetch_package_json(client, dep, scheduler, retry)
+            )
+        files = list(dep.files)
+        if not files and not dep.url:
+            if "." not in exports:
+                raise VendorError(f"No ES module entry found in package.json of {name}")
+            files = [exports["."]]
+        _check_package_paths(name, files)
+
+        sources = self.resolve_sources(replace(dep, files=files))
+        specifiers = file_specifiers(
+            name, exports, [str(filename) for _, filename, _ in sources]
+        )
+        tasks = []
+        for url, filename, mirrors in sources:
+            lock_entry, dest_rel = self.find_lock_entry(name, url, filename, lock_pkg)
+            tasks.append(
+                self.download_task(
+                    client,
+                    name,
+                    url,
+                    dest_dir / dest_rel,
+                    lock_entry,
+                    mirrors,
+                    paranoid=paranoid,
+                    revalidate=revalidate,
+                    scheduler=scheduler,
+                    store=store,
+                    retry=retry,
+                )
+            )
+        entries = await asyncio.gather(*tasks)
+        for (_, entry), (_, filename, _) in zip(entries, sources):
+            if str(filename) in specifiers:
+                entry["specifiers"] = specifiers[str(filename)]
+        return list(entries)
+
+    async def verify_local_file(
+        self,
+        dest_path: Path,
+        st: os.stat_result,
+        lock_entry: dict[str, Any],
+        paranoid: bool = False,
+    ) -> bool:
+        """
+        校验本地文件是否与 lock 记录一致。
+
+        :param dest_path: 本地文件路径
+        :param st: 文件状态
+        :param lock_entry: lock 文件记录
+        :param paranoid: 是否忽略 size/mtime 快速路径
+        """
+        # size 与 mtime 均与 lock 记录一致时，无需读取文件内容
+        if stat_matches(st, lock_entry, paranoid):
+            return True
+
+        loop = asyncio.get_running_loop()
+        with tracing.span("hash", path=dest_path.name):
+            return await loop.run_in_executor(
+                None, integrity_matches, dest_path, lock_entry
+            )
+
+    @staticmethod
+    def _resolve_default_filename(name: str, dest_path: Path, final_url: str) -> Path:
+        """
+        默认推导的文件名 (name.js) 替换为重定向后 URL 中的真实文件名。
+
+        :param name: 包名
+        :param dest_path: 当前目标路径
+        :param final_url: 重定向后的 URL
+        """
+        if dest_path.name == f"{name}.js":
+            real_filename = Path(urlparse(final_url).path).name
+            # 没有重定向的 CDN (如 jsDelivr) 最后一段仍是 name@version
+            if real_filename and "@" not in real_filename:
+                return dest_path.with_name(real_filename)
+        return dest_path
+
     # Alias for backward compatibility or clarity if needed
     install = sync
 
+    def verify(
+        self,
+        workers: int | None = None,
+        processes: bool = False,
+        quick: bool = False,
+    ) -> VerifyReport:
+        """
+        校验本地文件与 lock 文件是否一致 (只读，不访问网络)。
+
+        :param workers: 并行数，默认为 CPU 核数
+        :param processes: 使用进程池代替线程池
+        :param quick: size 与 mtime 均一致时信任本地文件
+        """
+        return verify_files(
+            self.project_root,
+            self.config.destination,
+            self.load_lockfile(),
+            workers=workers,
+            processes=processes,
+            quick=quick,
+        )
+
     async def add(self, package_name: str, version: str | None = None) -> None:
         """
         添加新依赖。
 
+        :param package_name: 包名
+        :param version: 版本号
+        """
+        # HEAD 检查与安装复用同一个客户端
+        async with self.session() as client:
+            await self._add(client, package_name, version)
+
+    async def _add(
+        self, client: httpx.AsyncClient, package_name: str, version: str | None
+    ) -> None:
+        """
+        在已打开的客户端会话中添加依赖。
+
+        :param client: HTTPX 客户端
         :param package_name: 包名
         :param version: 版本号
         """
         # 1. 简单检查包是否存在 (通过请求 unpkg)
-        async with httpx.AsyncClient() as client:
-            url = f"https://unpkg.com/{package_name}"
-            if version:
-                url += f"@{version}"
+        url = f"https://unpkg.com/{package_name}"
+        if version:
+            url += f"@{version}"
 
-            try:
-                resp = await client.head(url, follow_redirects=True)
+        try:
+            resp = await client.head(url, follow_redirects=True)
+            if resp.status_code != 200:
+                # Try GET if HEAD fails
+                resp = await client.get(url, follow_redirects=True)
                 if resp.status_code != 200:
-                    # Try GET if HEAD fails
-                    resp = await client.get(url, follow_redirects=True)
-                    if resp.status_code != 200:
-                        raise VendorError(
-                            f"Package '{package_name}' not found on unpkg."
-                        )
-            except httpx.HTTPError as e:
-                raise VendorError(f"Network error checking package: {e}")
-
-            # 获取真实版本号
-            if not version:
-                # e.g. https://unpkg.com/jquery@3.7.1/dist/jquery.js
-                path = urlparse(str(resp.url)).path
-                # match @version in path
-                match = re.search(r"@([\d\.]+[-\w\.]*)", path)
-                if match:
-                    version = match.group(1)
-                else:
-                    logger.warning(
-                        f"Could not auto-detect version for {package_name}, using '*'"
-                    )
-                    version = "*"
+                    raise VendorError(f"Package '{package_name}' not found on unpkg.")
+        except httpx.HTTPError as e:
+            raise VendorError(f"Network error checking package: {e}")
+
+        # 获取真实版本号
+        if not version:
+            # e.g. https://unpkg.com/jquery@3.7.1/dist/jquery.js
+            path = urlparse(str(resp.url)).path
+            # match @version in path
+            match = re.search(r"@([\d\.]+[-\w\.]*)", path)
+            if match:
+                version = match.group(1)
+            else:
+                logger.warning(
+                    f"Could not auto-detect version for {package_name}, using '*'"
+                )
+                version = "*"
 
         # 2. 更新 pyproject.toml
         VendorConfig.add_dependency_to_toml(self.config_path, package_name, version)
         print(f"Added {package_name} ({version}) to pyproject.toml")
 
-        # 3. 重新加载配置并安装
-        self.config = VendorConfig.from_toml(self.config_path)
-        await self.install()
+        # 3. 重新加载依赖并安装 (与 HEAD 检查复用同一个客户端)
+        # 只替换依赖列表，保留命令行覆盖的其他配置
+        self.config.dependencies = VendorConfig.from_toml(self.config_path).dependencies
+        await self.install([package_name])
 
     async def remove(self, package_name: str) -> None:
         """
@@ -322,24 +1978,38 @@ class VendorManager:
         # 2. Remove files
         # 使用当前配置确定路径
         dest_dir = self.project_root / self.config.destination / package_name
+        staging.discard(dest_dir)
         if dest_dir.exists():
             shutil.rmtree(dest_dir)
             print(f"Removed directory {dest_dir}")
 
+        # Reload config
+        self.config.dependencies = VendorConfig.from_toml(self.config_path).dependencies
+
         # 3. Update Lock file
         lock_data = self.load_lockfile()
         if package_name in lock_data:
-            del lock_data[package_name]
-            self.save_lockfile(lock_data)
+            new_lock_data = dict(lock_data)
+            del new_lock_data[package_name]
+            # 重新生成包含该包的 bundle
+            bundle_files = await self.update_bundles(new_lock_data, lock_data)
+            self.save_lockfile(new_lock_data)
+            remove_stale(
+                self.project_root / self.config.destination / BUNDLE_DIR, bundle_files
+            )
             print("Updated lock file.")
 
-        # Reload config
-        self.config = VendorConfig.from_toml(self.config_path)
+    async def update(
+        self, packages: Iterable[str] | str | None = None, paranoid: bool = False
+    ) -> None:
+        """
+        更新依赖。
 
-    async def update(self, package_name: str | None = None) -> None:
-        """更新依赖"""
-        # 简化逻辑：直接运行 install，因为 CDN URL 如果没有锁死版本，会自动获取最新
+        :param packages: 需要更新的包名，为空时更新全部依赖
+        :param paranoid: 是否强制重新计算已有文件的哈希
+        """
+        # 对没有锁死版本的 CDN URL 发送条件请求 (If-None-Match / If-Modified-Since)，
+        # 服务器返回 304 时保留本地文件，否则获取最新内容。
         # 如果需要升级版本号，需要解析 toml 并修改 version 字段
-        # 这里暂时只实现重装
         print("Updating dependencies...")
-        await self.install()
+        await self.install(packages, paranoid=paranoid, revalidate=True)
@@ -0,0 +1,98 @@
+import posixpath
+from typing import Any
+
+# 浏览器加载 ES module 时匹配的 exports 条件 (按对象中的顺序取第一个匹配项)
+CONDITIONS = ("browser", "import", "module", "default")
+MODULE_SUFFIXES = (".js", ".mjs")
+
+
+def _resolve_target(target: Any) -> str | None:
+    """按条件解析 exports 中的目标路径"""
+    if isinstance(target, str):
+        return target
+    if isinstance(target, list):
+        for item in target:
+            resolved = _resolve_target(item)
+            if resolved:
+                return resolved
+    if isinstance(target, dict):
+        for condition, value in target.items():
+            if condition in CONDITIONS:
+                resolved = _resolve_target(value)
+                if resolved:
+                    return resolved
+    return None
+
+
+def _normalize(path: str) -> str:
+    return posixpath.normpath(path.removeprefix("./"))
+
+
+def module_exports(package_json: dict[str, Any]) -> dict[str, str]:
+    """
+    从 package.json 的 ``exports`` (或 ``module``) 解析 ES module 入口。
+
+    只处理不含通配符的子路径，目标必须是 JS 文件。
+
+    :param package_json: package.json 内容 (或 registry 的版本元数据)
+    :return: {子路径 (如 "." 或 "./sub"): 包内的相对路径}
+    """
+    exports = package_json.get("exports")
+    if isinstance(exports, (str, list)) or (
+        isinstance(exports, dict) and not any(k.startswith(".") for k in exports)
+    ):
+        exports = {".": exports}
+
+    subpaths = {}
+    for subpath, target in (exports or {}).items():
+        if "*" in subpath:
+            continue
+        resolved = _resolve_target(target)
+        if resolved and resolved.endswith(MODULE_SUFFIXES):
+            subpaths[subpath] = _normalize(resolved)
+
+    if "." not in subpaths:
+        for key in ("module", "browser"):
+            value = package_json.get(key)
+            if isinstance(value, str) and value.endswith(MODULE_SUFFIXES):
+                subpaths["."] = _normalize(value)
+                break
+    return subpaths
+
+
+def specifier(name: str, subpath: str) -> str:
+    """
+    子路径对应的 bare specifier，例如 ("lit", "./decorators.js") -> "lit/decorators.js"。
+
+    :param name: 包名
+    :param subpath: exports 中的子路径
+    """
+    if subpath == ".":
+        return name
+    return f"{name}/{subpath.removeprefix('./')}"
+
+
+def file_specifiers(
+    name: str, exports: dict[str, str], files: list[str]
+) -> dict[str, list[str]]:
+    """
+    按文件汇总 bare specifier。
+
+    exports 中没有包入口 (例如来源不提供 package.json) 时，
+    以 files 中的第一个 JS 文件作为入口。
+
+    :param name: 包名
+    :param exports: module_exports 的结果
+    :param files: 下载的文件 (相对于包目录)
+    :return: {files 中的路径: [specifier]}，没有 specifier 的文件不包含在内
+    """
+    exports = dict(exports)
+    if "." not in exports:
+        entry = next((f for f in files if f.endswith(MODULE_SUFFIXES)), None)
+        if entry:
+            exports["."] = _normalize(entry)
+
+    by_path: dict[str, list[str]] = {}
+    for subpath, path in exports.items():
+        by_path.setdefault(path, []).append(specifier(name, subpath))
+    return {f: by_path[_normalize(f)] for f in files if _normalize(f) in by_path}
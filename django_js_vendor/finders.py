@@ -0,0 +1,209 @@
+"""
+Staticfiles finder that serves vendor files straight from the lock file.
+"""
+
+import os
+import threading
+from datetime import timedelta
+from pathlib import Path
+from typing import Any, NamedTuple
+
+from django.conf import settings
+from django.contrib.staticfiles.finders import BaseFinder
+from django.contrib.staticfiles.utils import matches_patterns
+from django.core.files import File
+from django.core.files.storage import Storage
+from django.utils import timezone
+
+from .compress import variant_paths
+from .config import VendorConfig
+from .hashed import hashed_paths
+from .lockfile import LOCKFILE_NAME, read_lockfile
+from .manifest import to_static_path
+from .store import ContentStore
+from .utils import calculate_sha256
+
+
+class IndexEntry(NamedTuple):
+    """索引中的一个文件"""
+
+    # 相对于项目根目录的路径
+    path: str
+    # ``sha256-<hex>`` 格式的哈希，用于从内容存储读取与比对目标文件
+    integrity: str | None
+    size: int | None
+
+
+def build_index(lock_data: dict[str, Any]) -> dict[str, IndexEntry]:
+    """
+    按 static 路径索引 lock 文件中的所有文件 (包括预压缩文件、带哈希的链接与 bundle)。
+
+    :param lock_data: lock 文件内容
+    :return: {static 路径: IndexEntry}
+    """
+    index = {}
+    for pkg in lock_data.values():
+        if not isinstance(pkg, dict):
+            continue
+        for entry in pkg.get("files", []):
+            if not entry.get("path"):
+                continue
+            paths = {
+                entry["path"]: entry,
+                **variant_paths(entry),
+                **hashed_paths(entry),
+            }
+            for path, record in paths.items():
+                index[to_static_path(path)] = IndexEntry(
+                    path, record.get("integrity"), record.get("size")
+                )
+    return index
+
+
+class VendorStorage(Storage):
+    """
+    Read-only storage over the finder index, used as the source storage by
+    collectstatic.
+
+    ``get_modified_time()`` reports the target file's own timestamp when the
+    collected copy already has the locked hash, so collectstatic skips it
+    instead of copying it again.
+    """
+
+    def __init__(self, finder: "VendorFinder"):
+        self.finder = finder
+        self.prefix = None
+
+    def path(self, name: str) -> str:
+        path = self.finder.resolve(name)
+        if path is None:
+            raise FileNotFoundError(name)
+        return str(path)
+
+    def exists(self, name: str) -> bool:
+        return self.finder.resolve(name) is not None
+
+    def _open(self, name: str, mode: str = "rb") -> File:
+        return File(open(self.path(name), mode))
+
+    def size(self, name: str) -> int:
+        return os.path.getsize(self.path(name))
+
+    def get_modified_time(self, name: str):
+        from django.contrib.staticfiles.storage import staticfiles_storage
+
+        if self.finder.is_collected(staticfiles_storage, name):
+            return staticfiles_storage.get_modified_time(name)
+        # 内容不同 (或无法比对) 时总是复制：比目标文件新
+        # (collectstatic 比较时忽略秒以下的部分)
+        try:
+            return staticfiles_storage.get_modified_time(name) + timedelta(seconds=1)
+        except (OSError, NotImplementedError):
+            return timezone.now()
+
+    def listdir(self, path: str):
+        raise NotImplementedError("VendorStorage does not support listing directories")
+
+
+class VendorFinder(BaseFinder):
+    """
+    Find vendor files recorded in ``js-vendor.lock``.
+
+    Files are served from the sync destination, or from the shared content
+    store when the local copy is missing. Lookups use a path index that is
+    rebuilt only when the lock file's mtime/size changes.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        self.project_root = Path(getattr(settings, "BASE_DIR", Path("."))).absolute()
+        self.storage = VendorStorage(self)
+        self._index: dict[str, IndexEntry] = {}
+        self._signature: tuple[int, int] | None = None
+        self._store: ContentStore | None = None
+        self._lock = threading.Lock()
+
+    def check(self, **kwargs: Any) -> list:
+        return []
+
+    @property
+    def index(self) -> dict[str, IndexEntry]:
+        """{static 路径: IndexEntry}，lock 文件变化时重建"""
+        lock_path = self.project_root / LOCKFILE_NAME
+        try:
+            st = os.stat(lock_path)
+            signature = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            signature = None
+        if signature != self._signature:
+            with self._lock:
+                if signature != self._signature:
+                    config = VendorConfig.from_toml(
+                        self.project_root / "pyproject.toml"
+                    )
+                    self._store = (
+                        ContentStore(Path(config.store_dir), config.store_link)
+                        if config.store_dir
+                        else None
+                    )
+                    self._index = build_index(read_lockfile(lock_path))
+                    self._signature = signature
+        return self._index
+
+    def resolve(self, path: str) -> Path | None:
+        """
+        static 路径对应的文件：优先使用同步目录中的文件，不存在时使用内容存储。
+
+        :param path: static 路径
+        :return: 文件的绝对路径，未找到时返回 None
+        """
+        entry = self.index.get(path.replace("\\", "/"))
+        if entry is None:
+            return None
+        local = self.project_root / entry.path
+        if local.is_file():
+            return local
+        if self._store and entry.integrity and entry.integrity.startswith("sha256-"):
+            blob = self._store.blob_path(entry.integrity)
+            if blob.is_file():
+                return blob
+        return None
+
+    def is_collected(self, target: Storage, path: str) -> bool:
+        """
+        目标存储中的文件是否已经是 lock 中记录的内容 (先比较大小，再比较哈希)。
+
+        :param target: collectstatic 的目标存储
+        :param path: static 路径
+        """
+        entry = self.index.get(path.replace("\\", "/"))
+        source = self.resolve(path)
+        if entry is None or source is None or not entry.integrity:
+            return False
+        try:
+            target_path = target.path(path)
+        except NotImplementedError:
+            # 远程存储无法在本地比对
+            return False
+        try:
+            if os.path.samefile(source, target_path):
+                return True
+            if entry.size is not None and os.path.getsize(target_path) != entry.size:
+                return False
+            return f"sha256-{calculate_sha256(Path(target_path))}" == entry.integrity
+        except OSError:
+            return False
+
+    def find(self, path: str, find_all: bool = False, **kwargs: Any):
+        # Django 5.2 之前的参数名为 all
+        find_all = kwargs.get("all", find_all)
+        match = self.resolve(path)
+        if find_all:
+            return [str(match)] if match else []
+        return str(match) if match else None
+
+    def list(self, ignore_patterns):
+        for path in self.index:
+            if ignore_patterns and matches_patterns(path, ignore_patterns):
+                continue
+            if self.resolve(path) is not None:
+                yield path, self.storage
@@ -0,0 +1,82 @@
+import os
+import posixpath
+import shutil
+from pathlib import Path
+from typing import Any
+
+from .compress import EXTENSIONS
+
+# 模板标签会引用的文件类型，只为这些文件生成带哈希的文件名
+HASHED_SUFFIXES = (".js", ".mjs", ".css")
+# 文件名中哈希的长度 (与 ManifestStaticFilesStorage 一致)
+HASH_LENGTH = 12
+
+
+def hashed_name(path: str, integrity: str) -> str:
+    """
+    在扩展名前插入内容哈希，例如 htmx.min.js -> htmx.min.1a2b3c4d5e6f.js。
+
+    :param path: 文件路径 (POSIX 格式)
+    :param integrity: ``sha256-<hex>`` 格式的哈希
+    """
+    root, ext = posixpath.splitext(path)
+    digest = integrity.split("-", 1)[-1]
+    return f"{root}.{digest[:HASH_LENGTH]}{ext}"
+
+
+def link_file(src: Path, dest: Path) -> None:
+    """
+    以硬链接 (不支持时复制) 放置文件，两者的 size/mtime 一致。
+
+    :param src: 源文件
+    :param dest: 目标文件，已存在时替换
+    """
+    if dest.exists() and os.path.samefile(src, dest):
+        return
+    tmp = dest.with_name(dest.name + ".tmp")
+    tmp.unlink(missing_ok=True)
+    try:
+        os.link(src, tmp)
+    except OSError:
+        shutil.copyfile(src, tmp)
+        st = src.stat()
+        os.utime(tmp, ns=(st.st_atime_ns, st.st_mtime_ns))
+    os.replace(tmp, dest)
+
+
+def link_hashed(project_root: Path, entry: dict[str, Any]) -> None:
+    """
+    为 lock 记录中的文件及其预压缩文件创建带哈希的链接，记录为 ``hashed_path``。
+
+    :param project_root: 项目根目录
+    :param entry: lock 文件中的单个文件记录
+    """
+    path = entry["path"]
+    if not path.endswith(HASHED_SUFFIXES) or not entry.get("integrity"):
+        return
+    hashed = hashed_name(path, entry["integrity"])
+    link_file(project_root / path, project_root / hashed)
+    for fmt, variant in (entry.get("compressed") or {}).items():
+        if variant and fmt in EXTENSIONS:
+            ext = EXTENSIONS[fmt]
+            link_file(project_root / (path + ext), project_root / (hashed + ext))
+    entry["hashed_path"] = hashed
+
+
+def hashed_paths(entry: dict[str, Any]) -> dict[str, dict[str, Any]]:
+    """
+    lock 文件记录中带哈希的链接 (包括预压缩文件的链接)。
+
+    链接与原文件共享内容，size/mtime 与原文件的记录一致。
+
+    :param entry: lock 文件中的单个文件记录
+    :return: {链接路径: 记录}
+    """
+    hashed = entry.get("hashed_path")
+    if not hashed:
+        return {}
+    paths = {hashed: entry}
+    for fmt, variant in (entry.get("compressed") or {}).items():
+        if variant and fmt in EXTENSIONS:
+            paths[hashed + EXTENSIONS[fmt]] = variant
+    return paths
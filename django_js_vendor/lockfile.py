@@ -0,0 +1,92 @@
+import json
+import logging
+import os
+import uuid
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+LOCKFILE_NAME = "js-vendor.lock"
+
+
+def read_lockfile(path: Path) -> dict[str, Any]:
+    """
+    读取 Lock 文件。
+
+    :param path: Lock 文件路径
+    :return: Lock 数据，文件不存在或损坏时返回空字典
+    """
+    if not path.exists():
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except json.JSONDecodeError:
+        logger.warning("Lock file is corrupted. Ignoring.")
+        return {}
+
+
+def write_lockfile(path: Path, lock_data: dict[str, Any]) -> None:
+    """
+    原子地保存 Lock 文件：先写入同目录的临时文件并 fsync，再通过 os.replace 替换，
+    中断时不会留下被截断的 lock 文件。
+
+    :param path: Lock 文件路径
+    :param lock_data: Lock 数据
+    """
+    path = Path(path)
+    tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(lock_data, f, indent=2, sort_keys=True)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def stat_matches(
+    st: os.stat_result | None, record: dict[str, Any], paranoid: bool = False
+) -> bool:
+    """
+    size/mtime 快速路径：文件状态与 lock 记录的 size 与 mtime 均一致时，
+    无需读取文件内容即可信任该文件。
+
+    :param st: 文件状态，文件不存在时为 None
+    :param record: lock 文件中的文件记录 (或预压缩文件的记录)
+    :param paranoid: 为 True 时不使用快速路径，总是返回 False
+    """
+    if paranoid or st is None:
+        return False
+    return st.st_size == record.get("size") and st.st_mtime_ns == record.get("mtime")
+
+
+def file_matches(path: Path, record: dict[str, Any], paranoid: bool = False) -> bool:
+    """
+    获取文件状态后按 stat_matches 判断，文件不存在时返回 False。
+
+    :param path: 文件路径
+    :param record: lock 文件中的文件记录
+    :param paranoid: 为 True 时不使用快速路径
+    """
+    try:
+        st = path.stat()
+    except OSError:
+        return False
+    return stat_matches(st, record, paranoid)
+
+
+def integrity_matches(path: Path, record: dict[str, Any]) -> bool:
+    """
+    重新计算文件的哈希并与 lock 记录的 integrity 比对 (快速路径不适用时使用)。
+
+    :param path: 文件路径
+    :param record: lock 文件中的文件记录
+    """
+    # 模板标签会导入本模块，utils 依赖 multiprocessing，只在需要时导入
+    from .utils import calculate_sha256
+
+    return f"sha256-{calculate_sha256(path)}" == record.get("integrity")
@@ -1,13 +1,19 @@
 import asyncio
+import json
+from contextlib import nullcontext
+from pathlib import Path
 
 from django.core.management.base import BaseCommand, CommandError
 
 from django_js_vendor.core import VendorError, VendorManager
+from django_js_vendor.tracing import Tracer
 
 
 class Command(BaseCommand):
     help = "Manage frontend dependencies (install, add, update)"
 
+    network_subcommands = ("sync", "add", "update")
+
     def add_arguments(self, parser):
         """
         添加命令行参数。
@@ -17,25 +23,123 @@ class Command(BaseCommand):
         subparsers = parser.add_subparsers(dest="subcommand", required=True)
 
         # sync
-        subparsers.add_parser(
+        sync_parser = subparsers.add_parser(
             "sync", help="Sync dependencies from pyproject.toml and lock file"
         )
+        sync_parser.add_argument("packages", nargs="*", help="Only sync these packages")
+        self.add_download_arguments(sync_parser)
+        sync_parser.add_argument(
+            "--paranoid",
+            action="store_true",
+            help="Rehash all existing files instead of trusting size/mtime",
+        )
 
         # add
         add_parser = subparsers.add_parser("add", help="Add a new dependency")
         add_parser.add_argument("package_name", help="Name of the package (e.g. htmx)")
         add_parser.add_argument("version", nargs="?", help="Optional version specifier")
+        self.add_download_arguments(add_parser)
 
         # update
         update_parser = subparsers.add_parser("update", help="Update dependencies")
         update_parser.add_argument(
-            "package_name", nargs="?", help="Optional package to update"
+            "packages", nargs="*", help="Only update these packages"
+        )
+        self.add_download_arguments(update_parser)
+        update_parser.add_argument(
+            "--paranoid",
+            action="store_true",
+            help="Rehash all existing files instead of trusting size/mtime",
         )
 
         # remove
         remove_parser = subparsers.add_parser("remove", help="Remove a dependency")
         remove_parser.add_argument("package_name", help="Name of the package to remove")
 
+        # verify
+        verify_parser = subparsers.add_parser(
+            "verify", help="Check vendored files against the lock file (read-only)"
+        )
+        verify_parser.add_argument(
+            "--json", action="store_true", help="Print the report as JSON"
+        )
+        verify_parser.add_argument(
+            "--workers", type=int, help="Number of parallel hashing workers"
+        )
+        verify_parser.add_argument(
+            "--processes",
+            action="store_true",
+            help="Hash in a process pool instead of a thread pool",
+        )
+        verify_parser.add_argument(
+            "--quick",
+            action="store_true",
+            help="Trust files whose size and mtime match the lock file",
+        )
+
+        # store
+        store_parser = subparsers.add_parser(
+            "store", help="Manage the shared content-addressable store"
+        )
+        store_subparsers = store_parser.add_subparsers(
+            dest="store_command", required=True
+        )
+        store_subparsers.add_parser(
+            "prune", help="Remove blobs not referenced by any project"
+        )
+
+    def add_download_arguments(self, parser):
+        """
+        添加下载相关的参数，覆盖 pyproject.toml 中的配置。
+
+        :param parser: 子命令参数解析器
+        """
+        parser.add_argument(
+            "--concurrency", type=int, help="Maximum number of parallel downloads"
+        )
+        parser.add_argument(
+            "--per-host", type=int, help="Maximum parallel downloads per host"
+        )
+        parser.add_argument(
+            "--adaptive",
+            action="store_true",
+            default=None,
+            help="Adjust concurrency based on latency and 429/5xx rates",
+        )
+        parser.add_argument(
+            "--http2",
+            action="store_true",
+            default=None,
+            help="Multiplex downloads over HTTP/2 (requires httpx[http2])",
+        )
+        parser.add_argument(
+            "--trace",
+            type=Path,
+            metavar="PATH",
+            help="Write a Chrome trace-event JSON timeline of all downloads",
+        )
+        parser.add_argument(
+            "--report",
+            action="store_true",
+            help="Print per-phase download timings after the run",
+        )
+
+    def apply_download_options(self, manager: VendorManager, options: dict) -> None:
+        """
+        将命令行参数应用到配置。
+
+        :param manager: VendorManager 实例
+        :param options: 命令行选项
+        """
+        if options.get("concurrency") is not None:
+            manager.config.concurrency = options["concurrency"]
+        if options.get("per_host") is not None:
+            manager.config.per_host_concurrency = options["per_host"]
+        if options.get("adaptive") is not None:
+            manager.config.adaptive_concurrency = options["adaptive"]
+        if options.get("http2") is not None:
+            manager.config.http.http2 = options["http2"]
+
     def handle(self, *args, **options):
         """
         命令入口点。
@@ -48,6 +152,8 @@ class Command(BaseCommand):
             asyncio.run(self.handle_async(**options))
         except VendorError as e:
             raise CommandError(str(e))
+        except CommandError:
+            raise
         except Exception as e:
             self.stderr.write(self.style.ERROR(f"Unexpected error: {e}"))
             raise
@@ -60,11 +166,52 @@ class Command(BaseCommand):
         :param options: 其他选项
         """
         manager = VendorManager()
+        self.apply_download_options(manager, options)
 
-        self.stdout.write(f"Running vendor {subcommand}...")
+        # JSON 输出只包含报告本身
+        if not options.get("json"):
+            self.stdout.write(f"Running vendor {subcommand}...")
 
+        # 需要网络的子命令在整个运行期间共享同一个 HTTP 客户端
+        if subcommand in self.network_subcommands:
+            session = manager.session()
+        else:
+            session = nullcontext()
+        if options.get("trace") or options.get("report"):
+            manager.tracer = Tracer()
+        try:
+            async with session:
+                await self.run_subcommand(manager, subcommand, **options)
+        finally:
+            # 失败时同样输出，便于分析出错前的时间线
+            if manager.tracer is not None:
+                self.write_trace(manager.tracer, options)
+
+    def write_trace(self, tracer: Tracer, options: dict) -> None:
+        """
+        输出 --trace 与 --report 的结果。
+
+        :param tracer: 本次运行的追踪器
+        :param options: 命令行选项
+        """
+        if options.get("trace"):
+            tracer.write_chrome_trace(options["trace"])
+            self.stdout.write(f"Trace written to {options['trace']}")
+        if options.get("report"):
+            self.stdout.write(tracer.format_report())
+
+    async def run_subcommand(self, manager: VendorManager, subcommand, **options):
+        """
+        执行子命令。
+
+        :param manager: VendorManager 实例
+        :param subcommand: 子命令
+        :param options: 其他选项
+        """
         if subcommand == "sync":
-            await manager.sync()
+            await manager.sync(
+                options.get("packages") or None, paranoid=options["paranoid"]
+            )
             self.stdout.write(self.style.SUCCESS("Dependencies synced successfully."))
 
         elif subcommand == "add":
@@ -74,11 +221,46 @@ class Command(BaseCommand):
             self.stdout.write(self.style.SUCCESS(f"Added {package_name}."))
 
         elif subcommand == "update":
-            package_name = options.get("package_name")
-            await manager.update(package_name)
+            await manager.update(
+                options.get("packages") or None, paranoid=options["paranoid"]
+            )
             self.stdout.write(self.style.SUCCESS("Dependencies updated."))
 
         elif subcommand == "remove":
             package_name = options["package_name"]
             await manager.remove(package_name)
             self.stdout.write(self.style.SUCCESS(f"Removed {package_name}."))
+
+        elif subcommand == "verify":
+            report = manager.verify(
+                workers=options.get("workers"),
+                processes=options.get("processes", False),
+                quick=options.get("quick", False),
+            )
+            if options.get("json"):
+                self.stdout.write(json.dumps(report.to_dict(), indent=2))
+            else:
+                for label, paths in (
+                    ("Missing", report.missing),
+                    ("Modified", report.modified),
+                    ("Extra", report.extra),
+                ):
+                    for path in paths:
+                        self.stdout.write(f"{label}: {path}")
+                self.stdout.write(
+                    f"Verified {len(report.ok)} files: {len(report.missing)} missing, "
+                    f"{len(report.modified)} modified, {len(report.extra)} extra."
+                )
+            if not report.clean:
+                raise CommandError(
+                    "Vendored files do not match the lock file.", returncode=1
+                )
+
+        elif subcommand == "store":
+            if options["store_command"] == "prune":
+                removed, freed = manager.prune_store()
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f"Pruned {removed} files ({freed} bytes) from store."
+                    )
+                )
@@ -0,0 +1,488 @@
+"""
+Process-wide compiled vendor manifest for the template tags.
+"""
+
+import json
+import os
+import posixpath
+import re
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, NamedTuple
+
+from django.conf import settings
+from django.templatetags.static import static
+from django.utils.html import escape
+
+from .bundle import LOCK_KEY as BUNDLES_KEY
+from .bundle import rewrite_css_urls, strip_source_map
+from .config import VendorConfig
+from .lockfile import LOCKFILE_NAME, read_lockfile
+
+# (lock mtime_ns, lock size, config mtime_ns, config size)
+Signature = tuple[int | None, ...]
+
+_manifests: dict[str, "VendorManifest"] = {}
+_build_lock = threading.Lock()
+
+# 缓存的 HTML 中 nonce 属性的占位符，渲染时替换为本次请求的 nonce
+NONCE_PLACEHOLDER = "\x00nonce\x00"
+
+# 内联内容中会改变 HTML 解析的序列及其替换。
+# JS 中只处理 ``</script`` 与 ``<!--`` (单独的 ``<script`` 只在 ``<!--`` 之后才有影响，
+# 也可能是小于运算符)，``<`` 替换为 ``\x3C``：在字符串、模板字符串与正则表达式
+# (包括 u/v 模式) 中含义不变
+_INLINE_ESCAPES = {
+    ".js": (re.compile(r"<(?=/script|!--)", re.I), r"\\x3C"),
+    ".css": (re.compile(r"<(?=/style)", re.I), r"<\\"),
+}
+
+
+def _stat_signature(*paths: Path) -> Signature:
+    """
+    根据文件的 mtime 与 size 生成签名，文件不存在时对应项为 None。
+
+    :param paths: 需要监视的文件路径
+    :return: 签名元组
+    """
+    parts: list[int | None] = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except OSError:
+            parts.extend((None, None))
+        else:
+            parts.extend((st.st_mtime_ns, st.st_size))
+    return tuple(parts)
+
+
+def to_static_path(path_str: str) -> str:
+    """
+    将 lock 文件中的相对路径转换为 static 路径。
+
+    Lock 文件中的路径为 POSIX 格式；如果以 "static/" 开头则去掉该前缀，
+    这对应默认的 destination "static/vendor" 与 STATIC_URL 的映射关系。
+
+    :param path_str: lock 文件中记录的路径
+    :return: 用于 static() 的路径
+    """
+    if path_str.startswith("static/"):
+        return path_str[7:]
+    return path_str
+
+
+class Asset(NamedTuple):
+    """模板中引用的一个静态文件"""
+
+    url: str
+    # base64 编码的 SRI 哈希 (如 sha384-...)，sync 未计算时为 None
+    integrity: str | None = None
+    # ES module (通过 import map 引用的入口或 .mjs 文件)
+    module: bool = False
+    # 内联到 HTML 中的内容 (已转义)，为 None 时引用 URL
+    content: str | None = None
+
+
+def _integrity_attrs(asset: Asset, crossorigin: str) -> str:
+    """有 SRI 哈希时生成 integrity 与 crossorigin 属性"""
+    if not asset.integrity:
+        return ""
+    return f' integrity="{asset.integrity}" crossorigin="{crossorigin}"'
+
+
+def _nonce_attr(nonce: str | None) -> str:
+    return f' nonce="{escape(nonce)}"' if nonce else ""
+
+
+def apply_nonce(html: str, nonce: str | None) -> str:
+    """
+    将缓存的 HTML 中的 nonce 占位符替换为本次请求的 CSP nonce，为空时删除该属性。
+
+    :param html: 使用 NONCE_PLACEHOLDER 渲染的 HTML
+    :param nonce: CSP nonce
+    """
+    return html.replace(_nonce_attr(NONCE_PLACEHOLDER), _nonce_attr(nonce))
+
+
+def render_tag(
+    url: str,
+    integrity: str | None = None,
+    crossorigin: str = "anonymous",
+    module: bool = False,
+    nonce: str | None = None,
+) -> str | None:
+    """
+    根据文件类型生成 HTML 标签。
+
+    :param url: 静态资源 URL
+    :param integrity: SRI 哈希，为空时不输出 integrity 属性
+    :param crossorigin: 有 integrity 时输出的 crossorigin 属性值
+    :param module: 是否为 ES module (module 脚本默认延迟执行，不需要 defer)
+    :param nonce: CSP nonce
+    :return: HTML 标签，不支持的类型返回 None
+    """
+    attrs = _integrity_attrs(Asset(url, integrity), crossorigin) + _nonce_attr(nonce)
+    if module:
+        return f'<script type="module" src="{url}"{attrs}></script>'
+    if url.endswith(".js"):
+        return f'<script src="{url}"{attrs} defer></script>'
+    if url.endswith(".css"):
+        return f'<link rel="stylesheet" href="{url}"{attrs}>'
+    return None
+
+
+def render_inline(url: str, content: str, nonce: str | None = None) -> str | None:
+    """
+    生成内联的 ``<script>`` 或 ``<style>`` 标签。
+
+    内联内容不能使用 integrity 属性；启用 CSP 时通过 nonce 允许执行。
+
+    :param url: 静态资源 URL，用于判断文件类型
+    :param content: 由 read_inline 读取的内容
+    :param nonce: CSP nonce
+    :return: HTML 标签，不支持的类型返回 None
+    """
+    attrs = _nonce_attr(nonce)
+    if url.endswith(".js"):
+        return f"<script{attrs}>{content}</script>"
+    if url.endswith(".css"):
+        return f"<style{attrs}>{content}</style>"
+    return None
+
+
+def read_inline(project_root: Path, path: str) -> str | None:
+    """
+    读取需要内联的 JS/CSS 文件：删除 source map 注释 (相对路径在页面中无效)，
+    CSS 中相对路径的 url() 改写为 static URL，
+    并转义会影响标签结束位置的 ``</script``、``<!--`` 与 ``</style``。
+
+    :param project_root: 项目根目录
+    :param path: lock 文件中记录的路径
+    :return: 转义后的内容，文件不存在、不是 UTF-8 或引用的文件没有 static URL 时
+        返回 None (不内联)
+    """
+    suffix = posixpath.splitext(path)[1]
+    if suffix not in _INLINE_ESCAPES:
+        return None
+    try:
+        data = strip_source_map((project_root / path).read_bytes(), suffix[1:])
+        if suffix == ".css":
+            data = rewrite_css_urls(
+                data,
+                posixpath.dirname(path),
+                lambda ref: static(to_static_path(ref)),
+            )
+        data = data.decode("utf-8")
+    except (OSError, UnicodeDecodeError, ValueError):
+        # ValueError: ManifestStaticFilesStorage 中找不到被引用的文件
+        return None
+    pattern, replacement = _INLINE_ESCAPES[suffix]
+    return pattern.sub(replacement, data)
+
+
+def render_preload(
+    url: str,
+    integrity: str | None = None,
+    crossorigin: str = "anonymous",
+    module: bool = False,
+) -> str | None:
+    """
+    生成预加载标签：ES module 使用 modulepreload，其余按类型使用 preload。
+
+    :param url: 静态资源 URL
+    :param integrity: SRI 哈希，为空时不输出 integrity 属性
+    :param crossorigin: 有 integrity 时输出的 crossorigin 属性值
+    :param module: 是否为 ES module
+    :return: HTML 标签，不支持的类型返回 None
+    """
+    attrs = _integrity_attrs(Asset(url, integrity), crossorigin)
+    if module or url.endswith(".mjs"):
+        return f'<link rel="modulepreload" href="{url}"{attrs}>'
+    if url.endswith(".js"):
+        return f'<link rel="preload" href="{url}" as="script"{attrs}>'
+    if url.endswith(".css"):
+        return f'<link rel="preload" href="{url}" as="style"{attrs}>'
+    return None
+
+
+def _asset(file_info: dict[str, Any], module: bool = False) -> Asset:
+    path = file_info["path"]
+    # hashed_filenames 开启时引用带内容哈希的文件名
+    return Asset(
+        static(to_static_path(file_info.get("hashed_path") or path)),
+        file_info.get("sri"),
+        module or path.endswith(".mjs"),
+    )
+
+
+def render_importmap(
+    imports: dict[str, str], integrity: dict[str, str], nonce: str | None = None
+) -> str:
+    """
+    生成 ``<script type="importmap">`` 标签。
+
+    JSON 中的 "<" 转义为 \\u003c，避免 "</script>" 提前结束标签。
+
+    :param imports: {bare specifier: URL}
+    :param integrity: {URL: SRI 哈希}
+    :param nonce: CSP nonce
+    :return: HTML 标签，没有映射时返回空字符串
+    """
+    if not imports:
+        return ""
+    data: dict[str, Any] = {"imports": imports}
+    if integrity:
+        data["integrity"] = integrity
+    body = json.dumps(data, indent=2).replace("<", "\\u003c")
+    return f'<script type="importmap"{_nonce_attr(nonce)}>\n{body}\n</script>'
+
+
+@dataclass
+class VendorManifest:
+    """编译后的 vendor 清单：包顺序、静态 URL 以及按包子集缓存的 HTML"""
+
+    order: list[str]
+    assets: dict[str, list[Asset]]
+    signature: Signature = ()
+    # 分组名 -> (包名, bundle 文件)，以及包名 -> 分组名
+    bundles: dict[str, tuple[tuple[str, ...], list[Asset]]] = field(
+        default_factory=dict
+    )
+    bundle_of: dict[str, str] = field(default_factory=dict)
+    # 包名 -> {bare specifier: Asset}
+    modules: dict[str, dict[str, Asset]] = field(default_factory=dict)
+    # 有 integrity 时输出的 crossorigin 属性值 (JS_VENDOR_CROSSORIGIN)
+    crossorigin: str = "anonymous"
+    _html: dict[tuple[str, ...], str] = field(default_factory=dict, repr=False)
+    _preload_html: dict[tuple[str, ...], str] = field(default_factory=dict, repr=False)
+    _importmap_html: dict[tuple[str, ...], str] = field(
+        default_factory=dict, repr=False
+    )
+
+    @classmethod
+    def build(
+        cls,
+        order: list[str],
+        lock_data: dict[str, Any],
+        signature: Signature = (),
+        inline: dict[str, bool | None] | None = None,
+        inline_threshold: int = 0,
+        project_root: Path | str = Path("."),
+    ) -> "VendorManifest":
+        """
+        从依赖顺序与 lock 数据构建清单。
+
+        需要内联的文件在构建时读取一次，之后随清单缓存。
+
+        :param order: pyproject.toml 中的依赖顺序
+        :param lock_data: lock 文件内容
+        :param signature: 构建时配置与 lock 文件的签名
+        :param inline: 各依赖的 inline 配置
+        :param inline_threshold: 不超过该大小 (字节) 的 JS/CSS 文件内联，0 表示不内联
+        :param project_root: 项目根目录，用于读取内联文件
+        """
+        assets: dict[str, list[Asset]] = {}
+        modules: dict[str, dict[str, Asset]] = {}
+        for name in order:
+            if name not in lock_data:
+                continue
+            files = lock_data[name].get("files", [])
+            # 有 specifier 的包是 ES module 包，其中的 JS 文件都是 module
+            module = any(f.get("specifiers") for f in files)
+            pkg_inline = (inline or {}).get(name)
+            assets[name] = []
+            for file_info in files:
+                if not file_info.get("path"):
+                    continue
+                asset = _asset(file_info, module)
+                size = file_info.get("size")
+                # ES module 之间通过 URL 相互引用，不能内联
+                if not asset.module and (
+                    pkg_inline
+                    or (
+                        pkg_inline is None
+                        and inline_threshold
+                        and size is not None
+                        and size <= inline_threshold
+                    )
+                ):
+                    content = read_inline(Path(project_root), file_info["path"])
+                    if content is not None:
+                        asset = asset._replace(content=content)
+                assets[name].append(asset)
+                for spec in file_info.get("specifiers", []):
+                    modules.setdefault(name, {})[spec] = asset
+
+        bundles = {}
+        bundle_of = {}
+        record = lock_data.get(BUNDLES_KEY) or {}
+        bundle_files = {f["path"]: f for f in record.get("files", [])}
+        for group, info in record.get("groups", {}).items():
+            members = tuple(p for p in info.get("packages", []) if p in assets)
+            if not members:
+                continue
+            # CSS 在前，与单独引入时 link 先于 script 生效的效果一致
+            bundle_assets = [
+                _asset(bundle_files.get(info[kind]) or {"path": info[kind]})
+                for kind in ("css", "js")
+                if info.get(kind)
+            ]
+            bundles[group] = (members, bundle_assets)
+            for name in members:
+                bundle_of[name] = group
+        return cls(
+            order=order,
+            assets=assets,
+            signature=signature,
+            bundles=bundles,
+            bundle_of=bundle_of,
+            modules=modules,
+            crossorigin=getattr(settings, "JS_VENDOR_CROSSORIGIN", "anonymous"),
+        )
+
+    def select(self, packages: tuple[str, ...] = ()) -> list[Asset]:
+        """
+        按依赖顺序列出指定包子集需要引用的文件。
+
+        分组内的包全部被选中时改为引用 bundle (位于分组中第一个包的位置)。
+
+        :param packages: 需要包含的包名，为空时包含所有包
+        """
+        if packages:
+            targets = [name for name in self.order if name in packages]
+        else:
+            targets = self.order
+        selected = []
+        emitted = set()
+        for name in targets:
+            assets = self.assets.get(name, [])
+            group = self.bundle_of.get(name)
+            if group is not None:
+                members, bundle_assets = self.bundles[group]
+                if all(member in targets for member in members):
+                    if group in emitted:
+                        continue
+                    emitted.add(group)
+                    assets = bundle_assets
+            selected.extend(assets)
+        return selected
+
+    def render(self, packages: tuple[str, ...] = (), nonce: str | None = None) -> str:
+        """
+        渲染指定包子集的 HTML，结果按参数元组缓存 (nonce 在输出时替换)。
+
+        :param packages: 需要包含的包名，为空时包含所有包
+        :param nonce: CSP nonce，添加到所有标签上
+        :return: HTML 字符串
+        """
+        html = self._html.get(packages)
+        if html is None:
+            tags = (
+                render_inline(asset.url, asset.content, NONCE_PLACEHOLDER)
+                if asset.content is not None
+                else render_tag(
+                    asset.url,
+                    asset.integrity,
+                    self.crossorigin,
+                    asset.module,
+                    NONCE_PLACEHOLDER,
+                )
+                for asset in self.select(packages)
+            )
+            html = "\n".join(tag for tag in tags if tag)
+            self._html[packages] = html
+        return apply_nonce(html, nonce)
+
+    def render_preloads(self, packages: tuple[str, ...] = ()) -> str:
+        """
+        渲染指定包子集的预加载标签，结果按参数元组缓存。
+
+        :param packages: 需要包含的包名，为空时包含所有包
+        :return: HTML 字符串
+        """
+        html = self._preload_html.get(packages)
+        if html is None:
+            tags = (
+                render_preload(
+                    asset.url, asset.integrity, self.crossorigin, asset.module
+                )
+                for asset in self.select(packages)
+                # 内联的文件不需要预加载
+                if asset.content is None
+            )
+            html = "\n".join(tag for tag in tags if tag)
+            self._preload_html[packages] = html
+        return html
+
+    def render_importmap(
+        self, packages: tuple[str, ...] = (), nonce: str | None = None
+    ) -> str:
+        """
+        渲染指定包子集的 import map，结果按参数元组缓存 (nonce 在输出时替换)。
+
+        :param packages: 需要包含的包名，为空时包含所有包
+        :param nonce: CSP nonce
+        :return: HTML 字符串，没有 ES module 包时为空字符串
+        """
+        html = self._importmap_html.get(packages)
+        if html is None:
+            imports = {}
+            integrity = {}
+            for name in self.order:
+                if packages and name not in packages:
+                    continue
+                for spec, asset in self.modules.get(name, {}).items():
+                    imports[spec] = asset.url
+                    if asset.integrity:
+                        integrity[asset.url] = asset.integrity
+            html = render_importmap(imports, integrity, NONCE_PLACEHOLDER)
+            self._importmap_html[packages] = html
+        return apply_nonce(html, nonce)
+
+
+def is_frozen() -> bool:
+    """
+    是否处于冻结模式。冻结模式下清单只构建一次，不再检查文件变化，
+    适用于部署后 lock 文件不会改变的生产环境。
+    """
+    return getattr(settings, "JS_VENDOR_FROZEN", False)
+
+
+def get_manifest(project_root: Path | str = Path(".")) -> VendorManifest:
+    """
+    获取进程级缓存的清单，仅在 lock 文件或配置文件的 mtime/size 变化时重建。
+
+    :param project_root: 项目根目录
+    :return: VendorManifest 实例
+    """
+    root = os.path.abspath(project_root)
+    manifest = _manifests.get(root)
+    if manifest is not None and is_frozen():
+        return manifest
+
+    root_path = Path(root)
+    signature = _stat_signature(root_path / LOCKFILE_NAME, root_path / "pyproject.toml")
+    if manifest is not None and manifest.signature == signature:
+        return manifest
+
+    with _build_lock:
+        manifest = _manifests.get(root)
+        if manifest is None or manifest.signature != signature:
+            config = VendorConfig.from_toml(root_path / "pyproject.toml")
+            manifest = VendorManifest.build(
+                list(config.dependencies.keys()),
+                read_lockfile(root_path / LOCKFILE_NAME),
+                signature,
+                inline={name: dep.inline for name, dep in config.dependencies.items()},
+                inline_threshold=config.inline_threshold,
+                project_root=root_path,
+            )
+            _manifests[root] = manifest
+    return manifest
+
+
+def clear_manifest_cache() -> None:
+    """清空进程内的清单缓存"""
+    with _build_lock:
+        _manifests.clear()
@@ -0,0 +1,234 @@
+import json
+from pathlib import Path
+from urllib.parse import unquote, urlparse
+from urllib.request import url2pathname
+
+from .config import DependencyConfig
+from .tarball import DEFAULT_REGISTRY, default_entry_file
+
+
+class ProviderError(ValueError):
+    """Invalid provider specification."""
+
+
+class Provider:
+    """
+    依赖来源的基类，负责把依赖配置解析为 (URL, 相对路径) 列表。
+
+    显式指定 ``url`` 的依赖与来源无关，直接使用该 URL。
+    """
+
+    name = "base"
+
+    def resolve(self, dep: DependencyConfig) -> list[tuple[str, str]]:
+        """
+        将依赖配置解析为 (URL, 相对路径) 的列表。
+
+        :param dep: 依赖配置对象
+        """
+        # 1. 显式 URL
+        if dep.url:
+            filename = dep.filename or Path(urlparse(dep.url).path).name
+            return [(dep.url, filename)]
+        return self.resolve_package(dep)
+
+    def resolve_package(self, dep: DependencyConfig) -> list[tuple[str, str]]:
+        raise NotImplementedError
+
+    def package_json_url(self, dep: DependencyConfig) -> str | None:
+        """
+        包的 package.json 地址，布局与 npm 包不同的来源返回 None。
+
+        :param dep: 依赖配置对象
+        """
+        return None
+
+
+class UnpkgProvider(Provider):
+    """
+    unpkg 路径布局: ``{base_url}/{name}@{version}/{file}``。
+
+    也用于保持相同布局的内部 HTTP 镜像。
+    """
+
+    name = "unpkg"
+
+    def __init__(self, base_url: str = "https://unpkg.com"):
+        self.base_url = base_url.rstrip("/")
+
+    def package_url(self, dep: DependencyConfig) -> str:
+        version_part = f"@{dep.version}" if dep.version else ""
+        return f"{self.base_url}/{dep.name}{version_part}"
+
+    def package_json_url(self, dep: DependencyConfig) -> str | None:
+        return f"{self.package_url(dep)}/package.json"
+
+    def resolve_package(self, dep: DependencyConfig) -> list[tuple[str, str]]:
+        base_url = self.package_url(dep)
+
+        # 2. Files 列表
+        if dep.files:
+            return [(f"{base_url}/{file}", file) for file in dep.files]
+
+        # 3. 默认推导 (Main file)
+        # unpkg 会重定向到主文件，下载时根据重定向后的 URL 确定文件名，
+        # 这里先默认为 name.js
+        return [(base_url, f"{dep.name}.js")]
+
+
+class JsDelivrProvider(UnpkgProvider):
+    """
+    jsDelivr npm CDN: ``https://cdn.jsdelivr.net/npm/{name}@{version}/{file}``。
+
+    不指定 files 时 jsDelivr 直接返回主文件 (没有重定向)，文件名默认为 name.js。
+    """
+
+    name = "jsdelivr"
+
+    def __init__(self, base_url: str = "https://cdn.jsdelivr.net/npm"):
+        super().__init__(base_url)
+
+
+class TemplateProvider(Provider):
+    """
+    通用 URL 模板，支持 ``{name}``、``{version}``、``{file}`` 占位符。
+
+    模板中没有 ``{file}`` 时只能用于不指定 files 的依赖。
+    """
+
+    name = "template"
+
+    def __init__(self, template: str):
+        self.template = template
+
+    def format(self, dep: DependencyConfig, file: str = "") -> str:
+        return self.template.format(name=dep.name, version=dep.version or "", file=file)
+
+    def resolve_package(self, dep: DependencyConfig) -> list[tuple[str, str]]:
+        if "{file}" not in self.template:
+            if dep.files:
+                return []
+            return [(self.format(dep), f"{dep.name}.js")]
+        if not dep.files:
+            # 无法推导主文件
+            return []
+        return [(self.format(dep, file), file) for file in dep.files]
+
+
+class CdnjsProvider(TemplateProvider):
+    """
+    cdnjs: ``https://cdnjs.cloudflare.com/ajax/libs/{name}/{version}/{file}``。
+
+    cdnjs 的目录结构与 npm 包不同，且必须指定版本与 files。
+    """
+
+    name = "cdnjs"
+
+    def __init__(self):
+        super().__init__(
+            "https://cdnjs.cloudflare.com/ajax/libs/{name}/{version}/{file}"
+        )
+
+    def resolve_package(self, dep: DependencyConfig) -> list[tuple[str, str]]:
+        if not dep.version:
+            return []
+        return super().resolve_package(dep)
+
+
+class DirectoryProvider(UnpkgProvider):
+    """
+    本地目录镜像，目录结构与 unpkg 相同: ``<root>/<name>@<version>/<file>``。
+
+    生成 ``file://`` URL，下载时直接从磁盘复制，不需要 HTTP 客户端。
+    """
+
+    name = "directory"
+
+    def __init__(self, root: Path):
+        self.root = Path(root).resolve()
+        super().__init__(self.root.as_uri())
+
+    def resolve_package(self, dep: DependencyConfig) -> list[tuple[str, str]]:
+        if dep.files:
+            return super().resolve_package(dep)
+
+        # 没有重定向可用，从镜像中的 package.json 推导主文件
+        version_part = f"@{dep.version}" if dep.version else ""
+        package_dir = self.root / f"{dep.name}{version_part}"
+        try:
+            with open(package_dir / "package.json", "r", encoding="utf-8") as f:
+                entry = default_entry_file(json.load(f))
+        except (OSError, ValueError):
+            entry = f"{dep.name}.js"
+        return [(f"{self.package_url(dep)}/{entry}", Path(entry).name)]
+
+
+class NpmProvider(Provider):
+    """npm registry tarball 模式，每个包只下载一次 tarball"""
+
+    name = "npm"
+
+    def __init__(self, registry: str = DEFAULT_REGISTRY):
+        self.registry = registry.rstrip("/")
+
+    def resolve_package(self, dep: DependencyConfig) -> list[tuple[str, str]]:
+        # 文件列表在下载 registry 元数据后才能确定
+        return []
+
+
+def file_url_to_path(url: str) -> Path:
+    """
+    将 ``file://`` URL 转换为本地路径。
+
+    :param url: file URL
+    """
+    parsed = urlparse(url)
+    return Path(url2pathname(unquote(parsed.path)))
+
+
+def get_provider(
+    spec: str,
+    registry: str = DEFAULT_REGISTRY,
+    aliases: dict[str, str] | None = None,
+    project_root: Path = Path("."),
+) -> Provider:
+    """
+    根据配置字符串创建 Provider。
+
+    支持的格式:
+
+    - ``unpkg`` / ``jsdelivr`` / ``cdnjs`` / ``npm``
+    - ``https://mirror.internal/unpkg``: 与 unpkg 布局相同的 HTTP 镜像
+    - ``https://cdn.example.com/{name}@{version}/{file}``: 通用 URL 模板
+    - ``file:///srv/mirror`` 或本地目录路径: 目录镜像
+    - ``[tool.django-js-vendor.providers]`` 中定义的名称
+
+    :param spec: 配置字符串
+    :param registry: npm registry 地址
+    :param aliases: 命名的 provider
+    :param project_root: 相对目录的基准路径
+    """
+    aliases = aliases or {}
+    if spec in aliases:
+        return get_provider(aliases[spec], registry, None, project_root)
+
+    if spec == "unpkg":
+        return UnpkgProvider()
+    if spec == "jsdelivr":
+        return JsDelivrProvider()
+    if spec == "cdnjs":
+        return CdnjsProvider()
+    if spec == "npm":
+        return NpmProvider(registry)
+
+    scheme = urlparse(spec).scheme
+    if "{" in spec:
+        return TemplateProvider(spec)
+    if scheme in ("http", "https"):
+        return UnpkgProvider(spec)
+    if scheme == "file":
+        return DirectoryProvider(file_url_to_path(spec))
+    if spec.startswith((".", "/", "~")) or Path(spec).is_absolute():
+        return DirectoryProvider(project_root / Path(spec).expanduser())
+
+    raise ProviderError(f"Unknown provider: {spec}")
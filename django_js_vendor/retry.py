@@ -0,0 +1,108 @@
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import httpx
+
+from .config import RetryConfig
+
+# 可以重试的 4xx 状态码，其余 4xx 立即失败
+RETRYABLE_CLIENT_STATUS = (408, 429)
+
+
+@dataclass
+class RetryStats:
+    """一次 sync 的重试统计"""
+
+    retries: int = 0
+    # 失败请求与退避等待所花费的时间 (秒)
+    wasted: float = 0.0
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """
+    解析 Retry-After 响应头 (秒数或 HTTP 日期)。
+
+    :param value: 响应头的值
+    :return: 需要等待的秒数，无法解析时为 None
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max((when - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+class RetryPolicy:
+    """
+    重试策略：指数退避加随机抖动，遵循 Retry-After，
+    对不会成功的错误 (大部分 4xx) 立即失败，并限制整个 sync 的时间。
+
+    一个实例在一次 sync 的所有下载任务之间共享，用于统计重试次数与浪费的时间。
+    """
+
+    def __init__(self, config: RetryConfig | None = None):
+        self.config = config or RetryConfig()
+        self.stats = RetryStats()
+        self.started = time.monotonic()
+
+    @property
+    def attempts(self) -> int:
+        return max(self.config.attempts, 1)
+
+    def remaining(self) -> float | None:
+        """距离 deadline 的剩余秒数，未设置 deadline 时为 None"""
+        if self.config.deadline is None:
+            return None
+        return self.config.deadline - (time.monotonic() - self.started)
+
+    def is_retryable(self, exc: BaseException) -> bool:
+        """
+        判断错误是否值得重试。
+
+        :param exc: 请求抛出的异常
+        """
+        if isinstance(exc, httpx.HTTPStatusError):
+            status = exc.response.status_code
+            return status in RETRYABLE_CLIENT_STATUS or status >= 500
+        # 连接、超时与协议错误通常是暂时的
+        return isinstance(exc, httpx.TransportError)
+
+    def delay(self, attempt: int, exc: BaseException | None = None) -> float:
+        """
+        计算第 attempt 次失败后的等待时间。
+
+        :param attempt: 已失败的次数 (从 1 开始)
+        :param exc: 失败的异常，包含 Retry-After 时优先使用 (同样不超过 max_backoff)
+        """
+        response = getattr(exc, "response", None)
+        if response is not None:
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            if retry_after is not None:
+                return min(retry_after, self.config.max_backoff)
+
+        delay = min(self.config.backoff * 2 ** (attempt - 1), self.config.max_backoff)
+        if self.config.jitter:
+            # full jitter
+            delay = random.uniform(0, delay)
+        return delay
+
+    def record_failure(self, elapsed: float, retried: bool = True) -> None:
+        """
+        记录一次失败的尝试。
+
+        :param elapsed: 请求耗时与其后退避等待时间之和
+        :param retried: 之后是否进行了重试
+        """
+        if retried:
+            self.stats.retries += 1
+        self.stats.wasted += elapsed
@@ -0,0 +1,109 @@
+import asyncio
+import time
+from collections import defaultdict
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from urllib.parse import urlparse
+
+
+class DownloadScheduler:
+    """
+    下载调度器：限制全局并发数与每个主机的并发数。
+
+    自适应模式下 ``limit`` 作为上限，初始并发为其一半，并采用 AIMD 策略：
+    遇到 429/5xx 或网络错误时并发数减半，延迟明显高于历史最佳值时减一，
+    连续成功一轮后加一。
+    """
+
+    # 延迟超过历史最佳值的倍数时视为拥塞
+    LATENCY_FACTOR = 2.0
+    # 延迟的指数加权平均系数
+    EWMA_ALPHA = 0.3
+
+    def __init__(
+        self,
+        limit: int = 16,
+        per_host: int = 6,
+        adaptive: bool = False,
+        min_limit: int = 1,
+    ):
+        self.max_limit = max(limit, 1)
+        self.min_limit = max(min(min_limit, self.max_limit), 1)
+        self.limit = self.max_limit
+        if adaptive:
+            self.limit = max(self.max_limit // 2, self.min_limit)
+        self.per_host = max(per_host, 1)
+        self.adaptive = adaptive
+        self._active = 0
+        self._host_active: dict[str, int] = defaultdict(int)
+        self._cond = asyncio.Condition()
+        self._best_latency: float | None = None
+        self._latency: float | None = None
+        self._since_change = 0
+
+    def _has_capacity(self, host: str) -> bool:
+        return self._active < self.limit and self._host_active[host] < self.per_host
+
+    @asynccontextmanager
+    async def slot(self, url: str) -> AsyncIterator[None]:
+        """
+        获取一个下载槽位，退出时释放并记录请求结果。
+
+        :param url: 请求的 URL，用于按主机限流
+        """
+        host = urlparse(url).netloc
+        async with self._cond:
+            await self._cond.wait_for(lambda: self._has_capacity(host))
+            self._active += 1
+            self._host_active[host] += 1
+
+        start = time.monotonic()
+        status: int | None = 200
+        try:
+            yield
+        except Exception as e:
+            response = getattr(e, "response", None)
+            status = getattr(response, "status_code", None)
+            raise
+        finally:
+            self.record(time.monotonic() - start, status)
+            async with self._cond:
+                self._active -= 1
+                self._host_active[host] -= 1
+                self._cond.notify_all()
+
+    def record(self, latency: float, status: int | None) -> None:
+        """
+        记录一次请求的耗时与状态，自适应模式下据此调整并发数。
+
+        :param latency: 请求耗时 (秒)
+        :param status: HTTP 状态码，网络错误时为 None
+        """
+        if not self.adaptive:
+            return
+
+        self._since_change += 1
+        if status is None or status == 429 or status >= 500:
+            self._set_limit(self.limit // 2)
+            return
+        if status >= 400:
+            # 4xx 与拥塞无关
+            return
+
+        if self._latency is None:
+            self._latency = latency
+        else:
+            self._latency += self.EWMA_ALPHA * (latency - self._latency)
+        if self._best_latency is None or latency < self._best_latency:
+            self._best_latency = latency
+
+        if self._since_change < self.limit:
+            return
+        if self._latency > self._best_latency * self.LATENCY_FACTOR:
+            self._set_limit(self.limit - 1)
+        else:
+            self._set_limit(self.limit + 1)
+
+    def _set_limit(self, limit: int) -> None:
+        self.limit = min(max(limit, self.min_limit), self.max_limit)
+        self._since_change = 0
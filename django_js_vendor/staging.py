@@ -0,0 +1,118 @@
+import os
+import shutil
+from pathlib import Path
+
+# 需要在 staging 目录中保留的可续传文件
+PARTIAL_SUFFIXES = (".part", ".part.json")
+
+
+def staging_dir(live: Path) -> Path:
+    """包目录对应的 staging 目录 (同级的隐藏目录)"""
+    return live.with_name(f".{live.name}.staging")
+
+
+def backup_dir(live: Path) -> Path:
+    """交换期间旧包目录的临时位置"""
+    return live.with_name(f".{live.name}.old")
+
+
+def _is_partial(path: Path) -> bool:
+    return path.name.endswith(PARTIAL_SUFFIXES)
+
+
+def _remove_empty_dirs(root: Path) -> None:
+    """删除 root 下的空目录 (不包括 root 本身)"""
+    for path in sorted(root.rglob("*"), reverse=True):
+        if path.is_dir() and not any(path.iterdir()):
+            path.rmdir()
+
+
+def recover(live: Path) -> None:
+    """
+    恢复被中断的目录交换：旧目录已移走但新目录尚未就位时放回旧目录，
+    否则删除残留的旧目录。lock 文件在所有交换完成后才写入，旧目录与其一致。
+
+    :param live: 包目录
+    """
+    old = backup_dir(live)
+    if not old.exists():
+        return
+    if live.exists():
+        shutil.rmtree(old, ignore_errors=True)
+    else:
+        os.replace(old, live)
+
+
+def prepare(live: Path) -> Path:
+    """
+    创建包的 staging 目录，并把当前包目录中的文件以硬链接 (不支持时复制) 放入其中。
+
+    链接保留了 size/mtime，已安装的文件仍可通过快速路径跳过；下载任务通过
+    临时文件与 os.replace 替换 staging 中的链接，不会修改当前目录中的文件。
+    上次中断留下的 .part 文件会被保留以便续传。
+
+    :param live: 包目录
+    :return: staging 目录
+    """
+    recover(live)
+    staging = staging_dir(live)
+    if staging.exists():
+        for path in list(staging.rglob("*")):
+            if path.is_file() and not _is_partial(path):
+                path.unlink()
+    staging.mkdir(parents=True, exist_ok=True)
+
+    if live.exists():
+        for src in live.rglob("*"):
+            if not src.is_file() or _is_partial(src):
+                continue
+            dest = staging / src.relative_to(live)
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                os.link(src, dest)
+            except OSError:
+                shutil.copy2(src, dest)
+    return staging
+
+
+def commit(live: Path, staging: Path, keep: set[Path]) -> None:
+    """
+    删除 staging 中未被 lock 记录的文件后，用 staging 目录替换包目录。
+
+    :param live: 包目录
+    :param staging: 已校验的 staging 目录
+    :param keep: 需要保留的文件 (位于 staging 中的路径)
+    """
+    for path in list(staging.rglob("*")):
+        if path.is_file() and path not in keep:
+            path.unlink()
+    _remove_empty_dirs(staging)
+
+    old = backup_dir(live)
+    if live.exists():
+        os.replace(live, old)
+    os.replace(staging, live)
+    shutil.rmtree(old, ignore_errors=True)
+
+
+def abandon(live: Path) -> None:
+    """
+    同步失败时清理 staging 目录，只保留可续传的 .part 文件。
+
+    :param live: 包目录
+    """
+    staging = staging_dir(live)
+    if not staging.exists():
+        return
+    for path in list(staging.rglob("*")):
+        if path.is_file() and not _is_partial(path):
+            path.unlink()
+    _remove_empty_dirs(staging)
+    if not any(staging.iterdir()):
+        staging.rmdir()
+
+
+def discard(live: Path) -> None:
+    """删除包目录对应的 staging 与备份目录"""
+    recover(live)
+    shutil.rmtree(staging_dir(live), ignore_errors=True)
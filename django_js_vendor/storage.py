@@ -0,0 +1,88 @@
+"""
+Static files storage that keeps content-hashed vendor files as they are.
+"""
+
+from pathlib import Path
+from typing import Any
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+from .bundle import LOCK_KEY as BUNDLES_KEY
+from .compress import variant_paths
+from .hashed import hashed_paths
+from .lockfile import LOCKFILE_NAME, read_lockfile
+from .manifest import to_static_path
+
+
+def immutable_names(lock_data: dict[str, Any]) -> set[str]:
+    """
+    文件名已带内容哈希的文件：hashed_filenames 生成的链接以及 bundle 文件。
+
+    :param lock_data: lock 文件内容
+    :return: static 路径的集合
+    """
+    names = set()
+    for key, pkg in lock_data.items():
+        if not isinstance(pkg, dict):
+            continue
+        for entry in pkg.get("files", []):
+            if key == BUNDLES_KEY and entry.get("path"):
+                paths = {entry["path"]: entry, **variant_paths(entry)}
+            else:
+                paths = hashed_paths(entry)
+            names.update(to_static_path(path) for path in paths)
+    return names
+
+
+class VendorManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    ManifestStaticFilesStorage that skips post-processing for vendor files
+    whose names already contain a content hash (``hashed_filenames`` links and
+    bundles recorded in ``js-vendor.lock``).
+
+    Those files are neither renamed nor rewritten, so SRI hashes stay valid,
+    and the manifest maps them to themselves.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self._vendor_names: set[str] | None = None
+        self._vendor_collected: list[str] = []
+
+    @property
+    def vendor_names(self) -> set[str]:
+        """Static paths of content-hashed vendor files, read from the lock file."""
+        if self._vendor_names is None:
+            project_root = Path(getattr(settings, "BASE_DIR", Path(".")))
+            lock_data = read_lockfile(project_root / LOCKFILE_NAME)
+            self._vendor_names = immutable_names(lock_data)
+        return self._vendor_names
+
+    def is_vendor_hashed(self, name: str) -> bool:
+        """
+        Whether ``name`` is a vendor file that already has a content hash.
+
+        :param name: Static path, may contain a query string or fragment.
+        """
+        path = urlsplit(self.clean_name(name)).path
+        return path in self.vendor_names
+
+    def hashed_name(self, name, content=None, filename=None):
+        if self.is_vendor_hashed(name):
+            return name
+        return super().hashed_name(name, content, filename)
+
+    def post_process(self, paths, dry_run=False, **options):
+        # collectstatic 之前可能刚执行过 sync，重新读取 lock 文件
+        self._vendor_names = None
+        self._vendor_collected = [p for p in paths if self.is_vendor_hashed(p)]
+        skipped = set(self._vendor_collected)
+        remaining = {p: v for p, v in paths.items() if p not in skipped}
+        yield from super().post_process(remaining, dry_run=dry_run, **options)
+
+    def save_manifest(self):
+        for name in self._vendor_collected:
+            self.hashed_files[self.hash_key(self.clean_name(name))] = name
+        super().save_manifest()
@@ -0,0 +1,230 @@
+import hashlib
+import json
+import os
+import shutil
+import sys
+import uuid
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+if sys.platform == "win32":
+    import msvcrt
+
+    fcntl = None
+else:
+    import fcntl
+
+# Linux FICLONE ioctl (reflink / copy-on-write 克隆)
+FICLONE = 0x40049409
+
+LINK_MODES = ("auto", "hardlink", "reflink", "copy")
+
+
+@contextmanager
+def file_lock(path: Path, exclusive: bool = True) -> Iterator[None]:
+    """
+    基于文件的跨进程锁。Windows 上不支持共享锁，统一使用独占锁。
+
+    :param path: 锁文件路径
+    :param exclusive: 是否为独占锁
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def reflink(src: Path, dest: Path) -> None:
+    """
+    使用 copy-on-write 克隆文件，仅在支持 FICLONE 的 Linux 文件系统上可用。
+
+    :param src: 源文件
+    :param dest: 目标文件
+    """
+    if fcntl is None or not sys.platform.startswith("linux"):
+        raise OSError("reflink is not supported on this platform")
+    with open(src, "rb") as s, open(dest, "wb") as d:
+        fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+
+
+class ContentStore:
+    """
+    内容寻址的全局存储 (类似 pnpm store)。
+
+    文件按 lock 文件中记录的 SHA256 存放于 ``<root>/sha256/<前两位>/<其余>``，
+    多个项目通过硬链接、reflink 或复制共享同一份内容。
+    """
+
+    def __init__(self, root: Path, link_mode: str = "auto"):
+        if link_mode not in LINK_MODES:
+            raise ValueError(f"Unknown link mode: {link_mode}")
+        self.root = Path(root).expanduser()
+        self.link_mode = link_mode
+
+    @property
+    def lock_path(self) -> Path:
+        return self.root / ".lock"
+
+    def blob_path(self, integrity: str) -> Path:
+        """
+        根据哈希值计算存储路径。
+
+        :param integrity: ``sha256-<hex>`` 或十六进制哈希
+        """
+        digest = integrity.removeprefix("sha256-")
+        return self.root / "sha256" / digest[:2] / digest[2:]
+
+    def has(self, integrity: str) -> bool:
+        """存储中是否已有该内容"""
+        return self.blob_path(integrity).exists()
+
+    def url_index_path(self, url: str) -> Path:
+        """精确版本 URL 索引文件的路径"""
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return self.root / "urls" / key[:2] / f"{key[2:]}.json"
+
+    def lookup_url(self, url: str) -> dict[str, str] | None:
+        """
+        查找精确版本 URL 对应的内容哈希。
+
+        :param url: 不可变的下载链接
+        :return: 包含 integrity 与 resolved (重定向后的 URL) 的字典，未命中时为 None
+        """
+        try:
+            with open(self.url_index_path(url), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def record_url(self, url: str, integrity: str, resolved: str | None = None) -> None:
+        """
+        记录精确版本 URL 对应的内容哈希，供没有 lock 记录的项目复用。
+
+        只能用于不可变的 URL，否则可能返回过期内容。
+
+        :param url: 不可变的下载链接
+        :param integrity: 内容哈希
+        :param resolved: 重定向后的 URL
+        """
+        path = self.url_index_path(url)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self._tmp_path(path)
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"integrity": integrity, "resolved": resolved or url}, f)
+        os.replace(tmp, path)
+
+    def _tmp_path(self, dest: Path) -> Path:
+        return dest.with_name(f".{dest.name}.{uuid.uuid4().hex}.tmp")
+
+    def _place(self, src: Path, dest: Path, mode: str) -> str:
+        """
+        将 src 以指定方式放置到 dest (通过临时文件与 os.replace 保证原子性)。
+
+        :return: 实际使用的方式
+        """
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        if mode == "auto":
+            candidates = ["hardlink", "reflink", "copy"]
+        else:
+            candidates = [mode]
+
+        last_error: OSError | None = None
+        for candidate in candidates:
+            tmp = self._tmp_path(dest)
+            try:
+                if candidate == "hardlink":
+                    os.link(src, tmp)
+                elif candidate == "reflink":
+                    reflink(src, tmp)
+                else:
+                    shutil.copyfile(src, tmp)
+                os.replace(tmp, dest)
+                return candidate
+            except OSError as e:
+                last_error = e
+                tmp.unlink(missing_ok=True)
+        raise last_error or OSError(f"Cannot place {src} at {dest}")
+
+    def materialize(self, integrity: str, dest: Path) -> str | None:
+        """
+        将存储中的内容放置到目标路径。
+
+        :param integrity: 内容哈希
+        :param dest: 目标路径
+        :return: 使用的方式，存储中没有该内容时返回 None
+        """
+        with file_lock(self.lock_path, exclusive=False):
+            blob = self.blob_path(integrity)
+            if not blob.exists():
+                return None
+            return self._place(blob, dest, self.link_mode)
+
+    def import_file(self, path: Path, integrity: str) -> None:
+        """
+        将已校验的文件加入存储。如果存储中已有相同内容，
+        则把 path 替换为指向存储的链接以去重。
+
+        :param path: 已下载并校验的文件
+        :param integrity: 文件哈希
+        """
+        with file_lock(self.lock_path, exclusive=False):
+            blob = self.blob_path(integrity)
+            if blob.exists():
+                if self.link_mode in ("auto", "hardlink"):
+                    try:
+                        self._place(blob, path, "hardlink")
+                    except OSError:
+                        pass
+                return
+            # 优先硬链接 (零拷贝)，跨设备时退回复制
+            mode = "auto" if self.link_mode in ("auto", "hardlink") else "copy"
+            self._place(path, blob, mode)
+
+    def prune(self) -> tuple[int, int]:
+        """
+        删除没有被任何项目引用的内容 (硬链接计数为 1)。
+
+        注意：通过 reflink 或复制方式使用的内容不会增加链接计数，
+        同样会被视为未引用。
+
+        :return: (删除的文件数, 释放的字节数)
+        """
+        removed = 0
+        freed = 0
+        blobs_root = self.root / "sha256"
+        if not blobs_root.exists():
+            return removed, freed
+        with file_lock(self.lock_path, exclusive=True):
+            for blob in blobs_root.glob("*/*"):
+                st = blob.stat()
+                if st.st_nlink > 1:
+                    continue
+                blob.unlink()
+                removed += 1
+                freed += st.st_size
+            for bucket in blobs_root.iterdir():
+                if bucket.is_dir() and not any(bucket.iterdir()):
+                    bucket.rmdir()
+            # 删除指向已清理内容的 URL 索引
+            for index_path in (self.root / "urls").glob("*/*.json"):
+                try:
+                    with open(index_path, "r", encoding="utf-8") as f:
+                        integrity = json.load(f)["integrity"]
+                except (OSError, ValueError, KeyError):
+                    integrity = None
+                if not integrity or not self.has(integrity):
+                    index_path.unlink()
+        return removed, freed
@@ -0,0 +1,138 @@
+import base64
+import hashlib
+import posixpath
+import tarfile
+from functools import partial
+from pathlib import Path, PureWindowsPath
+from urllib.parse import quote
+
+DEFAULT_REGISTRY = "https://registry.npmjs.org"
+
+# 读取 tarball 成员时每个块的大小
+CHUNK_SIZE = 64 * 1024
+
+
+def metadata_url(registry: str, name: str, version: str | None) -> str:
+    """
+    生成 registry 中某个版本元数据的 URL。
+
+    :param registry: registry 地址
+    :param name: 包名 (支持 @scope/name)
+    :param version: 版本号，为空时使用 latest 标签
+    """
+    return f"{registry.rstrip('/')}/{quote(name, safe='@')}/{version or 'latest'}"
+
+
+def parse_sri(sri: str) -> tuple[str, str] | None:
+    """
+    解析 Subresource Integrity 字符串，返回最强的 (算法, 十六进制哈希)。
+
+    :param sri: 形如 ``sha512-<base64>`` 的字符串，可能包含多个空格分隔的值
+    """
+    best = None
+    for token in sri.split():
+        algorithm, _, value = token.partition("-")
+        if algorithm not in ("sha512", "sha384", "sha256", "sha1"):
+            continue
+        try:
+            digest = base64.b64decode(value).hex()
+        except ValueError:
+            continue
+        if best is None or int(algorithm[3:]) > int(best[0][3:]):
+            best = (algorithm, digest)
+    return best
+
+
+def expected_tarball_digest(dist: dict) -> tuple[str, str] | None:
+    """
+    从版本元数据的 ``dist`` 字段获取 tarball 的期望哈希。
+
+    :param dist: registry 返回的 dist 对象
+    :return: (算法, 十六进制哈希)，没有任何哈希信息时为 None
+    """
+    if dist.get("integrity"):
+        parsed = parse_sri(dist["integrity"])
+        if parsed:
+            return parsed
+    if dist.get("shasum"):
+        return "sha1", dist["shasum"]
+    return None
+
+
+def default_entry_file(metadata: dict) -> str:
+    """
+    推导包的主文件 (与 unpkg 的规则一致：unpkg > jsdelivr > browser > main)。
+
+    :param metadata: 版本元数据 (package.json)
+    """
+    for key in ("unpkg", "jsdelivr", "browser", "main"):
+        value = metadata.get(key)
+        if isinstance(value, str) and value:
+            path = posixpath.normpath(value.removeprefix("./"))
+            if not posixpath.splitext(path)[1]:
+                path += ".js"
+            return path
+    return "index.js"
+
+
+def is_safe_path(path: str) -> bool:
+    """
+    包内的相对路径规范化后是否仍位于包目录内 (不是绝对路径，也不包含 ``..``)。
+
+    路径可能来自 registry 元数据或 package.json，不能信任。
+
+    :param path: 相对于包根目录的路径
+    """
+    if not path or PureWindowsPath(path).drive:
+        return False
+    norm = posixpath.normpath(path.replace("\\", "/"))
+    return not (posixpath.isabs(norm) or norm in (".", "..") or norm.startswith("../"))
+
+
+def extract_files(
+    tarball_path: Path, dest_dir: Path, files: list[str]
+) -> dict[str, str]:
+    """
+    以流式方式读取 tarball，只解压需要的文件并计算 SHA256。
+
+    该函数是同步的，应在线程池中运行。文件写入 ``<目标路径>.part``，
+    由调用方校验后再替换到目标路径。
+
+    :param tarball_path: 已校验的 .tgz 文件
+    :param dest_dir: 包的目标目录
+    :param files: 相对于包根目录的文件路径
+    :return: {相对路径: 十六进制 SHA256}
+    :raises ValueError: 文件路径位于包目录之外
+    """
+    root = dest_dir.resolve()
+    for f in files:
+        if not is_safe_path(f) or not (dest_dir / f).resolve().is_relative_to(root):
+            raise ValueError(f"Unsafe path in package: {f}")
+    wanted = {posixpath.normpath(f): f for f in files}
+    digests: dict[str, str] = {}
+
+    with tarfile.open(tarball_path, "r|gz") as tar:
+        for member in tar:
+            if not member.isfile():
+                continue
+            # npm tarball 中的文件位于一个顶层目录下 (通常为 package/)
+            _, _, rel = member.name.partition("/")
+            rel = posixpath.normpath(rel)
+            if rel not in wanted or wanted[rel] in digests:
+                continue
+
+            dest_path = dest_dir / wanted[rel]
+            dest_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = dest_path.with_name(dest_path.name + ".part")
+            hasher = hashlib.sha256()
+            source = tar.extractfile(member)
+            with open(tmp_path, "wb") as out:
+                for chunk in iter(partial(source.read, CHUNK_SIZE), b""):
+                    hasher.update(chunk)
+                    out.write(chunk)
+            digests[wanted[rel]] = hasher.hexdigest()
+
+            if len(digests) == len(wanted):
+                break
+
+    return digests
@@ -1,73 +1,59 @@
 """
 Vendor template tags for Django.
 """
+
 from pathlib import Path
 
 from django import template
 from django.conf import settings
-from django.templatetags.static import static
 from django.utils.safestring import mark_safe
 
-from django_js_vendor.core import VendorManager
+from django_js_vendor.manifest import get_manifest
 
 register = template.Library()
 
 
 @register.simple_tag
-def render_vendor_assets(*args: str) -> str:
+def render_vendor_assets(*args: str, nonce: str | None = None) -> str:
     """
     Render HTML tags for vendor assets.
 
+    Small files (``inline_threshold`` or ``inline = true``) are embedded as
+    inline <script>/<style> tags.
+
     :param args: Optional package names to include. If empty, include all.
-    :return: HTML string containing <script> and <link> tags.
+    :param nonce: Optional CSP nonce added to every tag.
+    :return: HTML string containing <script>, <link> and <style> tags.
     """
     # Try to find project root from settings, fallback to CWD
     project_root = getattr(settings, "BASE_DIR", Path("."))
 
-    manager = VendorManager(project_root=project_root)
-    lock_data = manager.load_lockfile()
-
-    if not lock_data:
-        return ""
-
-    # Get dependencies from config to maintain order
-    deps_order = list(manager.config.dependencies.keys())
+    return mark_safe(get_manifest(project_root).render(args, nonce))
 
-    # Filter dependencies if args provided
-    if args:
-        target_deps = [name for name in deps_order if name in args]
-    else:
-        target_deps = deps_order
 
-    html_parts: list[str] = []
-
-    for name in target_deps:
-        if name not in lock_data:
-            continue
+@register.simple_tag
+def render_vendor_preloads(*args: str) -> str:
+    """
+    Render <link rel="preload"> / <link rel="modulepreload"> hints for vendor assets.
 
-        pkg_data = lock_data[name]
-        files = pkg_data.get("files", [])
+    :param args: Optional package names to include. If empty, include all.
+    :return: HTML string containing <link> tags.
+    """
+    project_root = getattr(settings, "BASE_DIR", Path("."))
 
-        for file_info in files:
-            path_str = file_info.get("path")
-            if not path_str:
-                continue
+    return mark_safe(get_manifest(project_root).render_preloads(args))
 
-            # Heuristic to convert file path to static path
-            # Lock file paths are POSIX (forward slashes)
-            # If path starts with "static/", strip it
-            # This assumes default configuration where destination is "static/vendor"
-            # and STATIC_URL maps to "static" directory content.
-            if path_str.startswith("static/"):
-                static_path = path_str[7:]
-            else:
-                static_path = path_str
 
-            url = static(static_path)
+@register.simple_tag
+def render_vendor_importmap(*args: str, nonce: str | None = None) -> str:
+    """
+    Render a <script type="importmap"> mapping bare specifiers of ES module
+    packages to their static URLs.
 
-            if static_path.endswith(".js"):
-                html_parts.append(f'<script src="{url}" defer></script>')
-            elif static_path.endswith(".css"):
-                html_parts.append(f'<link rel="stylesheet" href="{url}">')
+    :param args: Optional package names to include. If empty, include all.
+    :param nonce: Optional CSP nonce for the inline import map.
+    :return: HTML string, or an empty string if no ES module package is vendored.
+    """
+    project_root = getattr(settings, "BASE_DIR", Path("."))
 
-    return mark_safe("\n".join(html_parts))
+    return mark_safe(get_manifest(project_root).render_importmap(args, nonce))
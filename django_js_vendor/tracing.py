@@ -0,0 +1,319 @@
+import json
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+# 报告中的阶段顺序
+PHASES = ("queue", "connect", "ttfb", "transfer", "hash", "write", "backoff")
+
+
+@dataclass
+class Span:
+    """一个文件下载过程中的一个阶段"""
+
+    name: str
+    package: str
+    url: str
+    # time.monotonic() 秒
+    start: float
+    end: float
+    attrs: dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+@dataclass
+class FileTrace:
+    """单个文件 (或 tarball) 的追踪记录"""
+
+    tracer: "Tracer"
+    package: str
+    url: str
+    start: float
+    end: float | None = None
+    spans: list[Span] = field(default_factory=list)
+    # 与传输交错执行的阶段 (如逐块的 hash 与 write) 的累计耗时
+    durations: dict[str, float] = field(default_factory=dict)
+    bytes: int = 0
+    retries: int = 0
+    error: str | None = None
+
+    def add_span(self, name: str, start: float, end: float, **attrs: Any) -> Span:
+        span = Span(name, self.package, self.url, start, end, attrs)
+        self.spans.append(span)
+        self.durations[name] = self.durations.get(name, 0.0) + span.duration
+        self.tracer.notify(span)
+        return span
+
+    def add_duration(self, name: str, seconds: float) -> None:
+        self.durations[name] = self.durations.get(name, 0.0) + seconds
+
+
+_current: ContextVar[FileTrace | None] = ContextVar(
+    "django_js_vendor_trace", default=None
+)
+
+
+def current() -> FileTrace | None:
+    """当前任务正在追踪的文件，未开启追踪时为 None"""
+    return _current.get()
+
+
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[None]:
+    """
+    记录当前文件的一个阶段，未开启追踪时不做任何事。
+
+    :param name: 阶段名称
+    :param attrs: 附加信息
+    """
+    trace = _current.get()
+    if trace is None:
+        yield
+        return
+    start = time.monotonic()
+    try:
+        yield
+    finally:
+        trace.add_span(name, start, time.monotonic(), **attrs)
+
+
+def record(name: str, start: float, end: float | None = None, **attrs: Any) -> None:
+    """
+    为当前文件记录一个已经结束的阶段，未开启追踪时不做任何事。
+
+    :param name: 阶段名称
+    :param start: 开始时间 (time.monotonic())
+    :param end: 结束时间，默认为当前时间
+    :param attrs: 附加信息
+    """
+    trace = _current.get()
+    if trace is not None:
+        trace.add_span(name, start, time.monotonic() if end is None else end, **attrs)
+
+
+def record_request(
+    trace: FileTrace, events: dict[str, float], requested: float, **attrs: Any
+) -> None:
+    """
+    根据 httpx trace 扩展收集的事件记录 connect 与 ttfb 阶段。
+
+    复用连接时没有 connect 阶段；传输层不产生事件 (如测试中的 mock) 时，
+    ttfb 从发起请求开始计算。
+
+    :param trace: 当前文件的追踪记录
+    :param events: 事件名到首次发生时间的映射
+    :param requested: 发起请求的时间
+    :param attrs: 附加到 ttfb 阶段的信息
+    """
+    received = time.monotonic()
+    connect_start = events.get("connection.connect_tcp.started")
+    if connect_start is not None:
+        connect_end = (
+            events.get("connection.start_tls.complete")
+            or events.get("connection.connect_tcp.complete")
+            or received
+        )
+        trace.add_span(
+            "connect",
+            connect_start,
+            connect_end,
+            tls="connection.start_tls.complete" in events,
+        )
+    sent = (
+        events.get("http11.send_request_headers.started")
+        or events.get("http2.send_request_headers.started")
+        or requested
+    )
+    trace.add_span("ttfb", sent, received, **attrs)
+
+
+class Tracer:
+    """
+    收集一次 sync 中每个文件的时间线。
+
+    通过 ``add_hook`` 注册的回调会在每个阶段结束时收到 ``Span``；
+    每个文件结束时还会收到一个名为 ``file`` 的 Span，其 attrs 包含
+    bytes、retries 与 error，可用于转发到自定义的监控系统。
+    """
+
+    def __init__(self, hooks: list[Callable[[Span], None]] | None = None):
+        self.origin = time.monotonic()
+        self.files: list[FileTrace] = []
+        self.hooks = list(hooks or [])
+
+    def add_hook(self, hook: Callable[[Span], None]) -> None:
+        """
+        注册事件回调。
+
+        :param hook: 接收 Span 的函数
+        """
+        self.hooks.append(hook)
+
+    def notify(self, span: Span) -> None:
+        for hook in self.hooks:
+            hook(span)
+
+    @contextmanager
+    def track(self, package: str, url: str) -> Iterator[FileTrace]:
+        """
+        在当前任务中追踪一个文件，期间 ``span()`` 记录到该文件。
+
+        :param package: 包名
+        :param url: 下载链接
+        """
+        trace = FileTrace(self, package, url, time.monotonic())
+        self.files.append(trace)
+        token = _current.set(trace)
+        try:
+            yield trace
+        except Exception as e:
+            trace.error = str(e) or type(e).__name__
+            raise
+        finally:
+            _current.reset(token)
+            trace.end = time.monotonic()
+            self.notify(
+                Span(
+                    "file",
+                    package,
+                    url,
+                    trace.start,
+                    trace.end,
+                    {
+                        "bytes": trace.bytes,
+                        "retries": trace.retries,
+                        "error": trace.error,
+                        **{f"{k}_time": v for k, v in trace.durations.items()},
+                    },
+                )
+            )
+
+    def _us(self, t: float) -> int:
+        return round((t - self.origin) * 1_000_000)
+
+    def chrome_trace(self) -> dict[str, Any]:
+        """
+        导出为 Chrome trace-event 格式 (可在 chrome://tracing 或 Perfetto 中打开)，
+        每个文件占一行。
+        """
+        events: list[dict[str, Any]] = []
+        for tid, trace in enumerate(self.files, start=1):
+            events.append(
+                {
+                    "ph": "M",
+                    "name": "thread_name",
+                    "pid": 1,
+                    "tid": tid,
+                    "args": {"name": f"{trace.package}: {trace.url}"},
+                }
+            )
+            end = trace.end if trace.end is not None else time.monotonic()
+            events.append(
+                {
+                    "ph": "X",
+                    "name": trace.package,
+                    "cat": "file",
+                    "pid": 1,
+                    "tid": tid,
+                    "ts": self._us(trace.start),
+                    "dur": self._us(end) - self._us(trace.start),
+                    "args": {
+                        "url": trace.url,
+                        "bytes": trace.bytes,
+                        "retries": trace.retries,
+                        "error": trace.error,
+                        **{f"{k}_time": v for k, v in trace.durations.items()},
+                    },
+                }
+            )
+            for s in trace.spans:
+                events.append(
+                    {
+                        "ph": "X",
+                        "name": s.name,
+                        "cat": "phase",
+                        "pid": 1,
+                        "tid": tid,
+                        "ts": self._us(s.start),
+                        "dur": self._us(s.end) - self._us(s.start),
+                        "args": s.attrs,
+                    }
+                )
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write_chrome_trace(self, path: Path) -> None:
+        """
+        保存 Chrome trace JSON 文件。
+
+        :param path: 输出路径
+        """
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.chrome_trace(), f)
+
+    def summary(self) -> dict[str, Any]:
+        """各阶段的累计耗时与总量"""
+        phases = {}
+        for phase in PHASES:
+            values = [t.durations[phase] for t in self.files if phase in t.durations]
+            phases[phase] = {
+                "total": sum(values),
+                "max": max(values, default=0.0),
+                "files": len(values),
+            }
+        ends = [t.end for t in self.files if t.end is not None]
+        return {
+            "files": len(self.files),
+            "errors": sum(1 for t in self.files if t.error),
+            "bytes": sum(t.bytes for t in self.files),
+            "retries": sum(t.retries for t in self.files),
+            "wall": (max(ends) - self.origin) if ends else 0.0,
+            "phases": phases,
+        }
+
+    def format_report(self, slowest: int = 5) -> str:
+        """
+        生成文本报告：各阶段耗时表与最慢的文件。
+
+        :param slowest: 列出的最慢文件数
+        """
+        summary = self.summary()
+        lines = [f"{'Phase':<10}{'Total (s)':>12}{'Max (s)':>10}{'Files':>8}"]
+        for phase, stats in summary["phases"].items():
+            lines.append(
+                f"{phase:<10}{stats['total']:>12.3f}{stats['max']:>10.3f}"
+                f"{stats['files']:>8}"
+            )
+        lines.append(
+            f"Files: {summary['files']}  Errors: {summary['errors']}  "
+            f"Bytes: {summary['bytes']}  Retries: {summary['retries']}  "
+            f"Wall: {summary['wall']:.3f}s"
+        )
+        finished = [t for t in self.files if t.end is not None]
+        finished.sort(key=lambda t: t.end - t.start, reverse=True)
+        if finished[:slowest]:
+            lines.append("Slowest files:")
+            for trace in finished[:slowest]:
+                lines.append(
+                    f"  {trace.end - trace.start:8.3f}s  {trace.package}  {trace.url}"
+                )
+        return "\n".join(lines)
+
+
+def track(tracer: Tracer | None, package: str, url: str):
+    """
+    ``tracer.track`` 的便捷写法，tracer 为空时返回空的上下文管理器。
+
+    :param tracer: 追踪器
+    :param package: 包名
+    :param url: 下载链接
+    """
+    if tracer is None:
+        return nullcontext()
+    return tracer.track(package, url)
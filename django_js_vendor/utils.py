@@ -1,20 +1,72 @@
+import base64
 import hashlib
+import mmap
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from urllib.parse import urlparse
+
+# 超过该大小的文件通过 mmap 一次性计算哈希 (避免逐块复制到 Python 对象，
+# 且 hashlib 在计算期间释放 GIL，线程池中可以并行)
+MMAP_THRESHOLD = 1024 * 1024
+BLOCK_SIZE = 64 * 1024
+
+
+def _hash_file(file_path: Path, algorithm: str):
+    """计算文件的哈希，大文件使用 mmap，返回 hashlib 对象"""
+    with open(file_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size >= MMAP_THRESHOLD:
+            try:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    return hashlib.new(algorithm, mm)
+            except (OSError, ValueError):
+                # 不支持 mmap 的文件系统，退回逐块读取
+                f.seek(0)
+        hasher = hashlib.new(algorithm)
+        for byte_block in iter(lambda: f.read(BLOCK_SIZE), b""):
+            hasher.update(byte_block)
+    return hasher
 
 
 def calculate_sha256(file_path: Path) -> str:
     """
-    计算文件的 SHA256 哈希值。
+    计算文件的 SHA256 哈希值，大文件使用 mmap。
 
     :param file_path: 文件路径
     :return: 十六进制哈希字符串
     """
-    sha256_hash = hashlib.sha256()
-    with open(file_path, "rb") as f:
-        # Read and update hash string value in blocks of 4K
-        for byte_block in iter(lambda: f.read(4096), b""):
-            sha256_hash.update(byte_block)
-    return sha256_hash.hexdigest()
+    return _hash_file(file_path, "sha256").hexdigest()
+
+
+def calculate_sri(file_path: Path, algorithm: str = "sha384") -> str:
+    """
+    计算浏览器 Subresource Integrity 使用的哈希 (base64 编码)。
+
+    :param file_path: 文件路径
+    :param algorithm: sha256、sha384 或 sha512
+    :return: 形如 ``sha384-<base64>`` 的字符串
+    """
+    digest = _hash_file(file_path, algorithm).digest()
+    return f"{algorithm}-{base64.b64encode(digest).decode('ascii')}"
+
+
+def sri_from_integrity(integrity: str) -> str | None:
+    """
+    把 lock 文件中 ``sha256-<hex>`` 格式的哈希转换为 SRI 格式，无需读取文件。
+
+    :param integrity: lock 文件中的 integrity
+    :return: ``sha256-<base64>``，格式不正确时返回 None
+    """
+    algorithm, _, hexdigest = integrity.partition("-")
+    if algorithm != "sha256":
+        return None
+    try:
+        digest = bytes.fromhex(hexdigest)
+    except ValueError:
+        return None
+    return f"sha256-{base64.b64encode(digest).decode('ascii')}"
 
 
 def calculate_content_sha256(content: bytes) -> str:
@@ -25,3 +77,34 @@ def calculate_content_sha256(content: bytes) -> str:
     :return: 十六进制哈希字符串
     """
     return hashlib.sha256(content).hexdigest()
+
+
+# 形如 name@1.2.3、@scope/name@1.2.3-beta.1 或 cdnjs 的 /name/1.2.3/ 精确版本
+_EXACT_VERSION_RE = re.compile(
+    r"[@/]v?\d+\.\d+\.\d+(?:-[0-9A-Za-z.-]+)?(?:\+[0-9A-Za-z.-]+)?(?=/|$)"
+)
+
+
+def is_immutable_url(url: str) -> bool:
+    """
+    判断 URL 是否指向不可变的内容 (路径中包含精确版本号)。
+
+    :param url: 下载链接
+    :return: 是否不可变
+    """
+    return bool(_EXACT_VERSION_RE.search(urlparse(url).path))
+
+
+def make_process_pool(workers: int | None = None) -> ProcessPoolExecutor:
+    """
+    创建用于 CPU 密集任务 (哈希、压缩) 的进程池。
+
+    在支持的平台上使用 forkserver，避免在多线程进程 (事件循环的线程池) 中 fork。
+
+    :param workers: 进程数，默认为 CPU 核数
+    """
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context(
+        "forkserver" if "forkserver" in methods else None
+    )
+    return ProcessPoolExecutor(max_workers=workers, mp_context=context)
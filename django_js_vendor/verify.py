@@ -0,0 +1,136 @@
+import os
+from concurrent.futures import Executor, ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any
+
+from .compress import variant_paths
+from .hashed import hashed_paths
+from .lockfile import stat_matches
+from .utils import calculate_sha256, make_process_pool
+
+
+@dataclass
+class VerifyReport:
+    """本地文件与 lock 文件的比对结果，路径均相对于项目根目录"""
+
+    ok: list[str] = field(default_factory=list)
+    missing: list[str] = field(default_factory=list)
+    modified: list[str] = field(default_factory=list)
+    extra: list[str] = field(default_factory=list)
+
+    @property
+    def clean(self) -> bool:
+        """没有缺失、被修改或多余的文件"""
+        return not (self.missing or self.modified or self.extra)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"clean": self.clean, **asdict(self)}
+
+
+def locked_files(lock_data: dict[str, Any]) -> dict[str, dict[str, Any]]:
+    """
+    收集 lock 文件中记录的所有文件。
+
+    :param lock_data: lock 文件内容
+    :return: {相对路径: lock 记录}
+    """
+    files = {}
+    for pkg in lock_data.values():
+        if not isinstance(pkg, dict):
+            continue
+        for entry in pkg.get("files", []):
+            if entry.get("path"):
+                files[entry["path"]] = entry
+                # 预压缩的 .gz / .br 文件同样记录了哈希
+                files.update(variant_paths(entry))
+                files.update(hashed_paths(entry))
+    return files
+
+
+def find_extra_files(
+    project_root: Path, destination: str, expected: set[str]
+) -> list[str]:
+    """
+    查找目标目录中不在 lock 文件里的文件。
+
+    :param project_root: 项目根目录
+    :param destination: vendor 目录 (相对于项目根目录)
+    :param expected: lock 中记录的相对路径
+    """
+    extra = []
+    root = project_root / destination
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            rel = (Path(dirpath) / filename).relative_to(project_root).as_posix()
+            if rel not in expected:
+                extra.append(rel)
+    return sorted(extra)
+
+
+def verify_files(
+    project_root: Path,
+    destination: str,
+    lock_data: dict[str, Any],
+    *,
+    workers: int | None = None,
+    processes: bool = False,
+    quick: bool = False,
+) -> VerifyReport:
+    """
+    校验 lock 文件中的所有文件 (只读，不访问网络)。
+
+    size 与 lock 记录不同的文件直接判定为被修改，其余文件在线程池 (或进程池)
+    中计算哈希；大文件使用 mmap。
+
+    :param project_root: 项目根目录
+    :param destination: vendor 目录
+    :param lock_data: lock 文件内容
+    :param workers: 并行数，默认为 CPU 核数
+    :param processes: 使用进程池代替线程池
+    :param quick: size 与 mtime 均与 lock 记录一致时不计算哈希
+    """
+    files = locked_files(lock_data)
+
+    report = VerifyReport()
+    to_hash: list[tuple[str, Path]] = []
+    for rel, entry in files.items():
+        path = project_root / rel
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            report.missing.append(rel)
+            continue
+        size = entry.get("size")
+        if not entry.get("integrity") or (size is not None and size != st.st_size):
+            # 大小不同时内容必然不同，无需读取文件
+            report.modified.append(rel)
+        elif stat_matches(st, entry, paranoid=not quick):
+            report.ok.append(rel)
+        else:
+            to_hash.append((rel, path))
+
+    if to_hash:
+        workers = workers or os.cpu_count() or 1
+        chunksize = 1
+        pool: Executor
+        if processes:
+            # 进程池按批次分发，减少大量小文件的进程间通信开销
+            pool = make_process_pool(workers)
+            chunksize = max(len(to_hash) // (workers * 4), 1)
+        else:
+            pool = ThreadPoolExecutor(max_workers=workers)
+        with pool:
+            digests = pool.map(
+                calculate_sha256, [path for _, path in to_hash], chunksize=chunksize
+            )
+            for (rel, _), digest in zip(to_hash, digests):
+                if f"sha256-{digest}" == files[rel]["integrity"]:
+                    report.ok.append(rel)
+                else:
+                    report.modified.append(rel)
+
+    report.extra = find_extra_files(project_root, destination, set(files))
+    for key in ("ok", "missing", "modified"):
+        getattr(report, key).sort()
+    return report
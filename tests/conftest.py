@@ -1,10 +1,15 @@
+import base64
+import hashlib
+import io
 import os
 import sys
+import tarfile
 from pathlib import Path
 
 import django
 import pytest
 from django.conf import settings
+from httpx import Response
 
 # 将项目根目录添加到 sys.path，解决 ModuleNotFoundError
 sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -46,3 +51,57 @@ def mock_pyproject(mock_project_root):
         return path
 
     return _create
+
+
+def _make_tarball(files: dict[str, bytes]) -> bytes:
+    """构造一个 npm 风格的 tarball (文件位于 package/ 目录下)"""
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode="w:gz") as tar:
+        for name, content in files.items():
+            info = tarfile.TarInfo(f"package/{name}")
+            info.size = len(content)
+            tar.addfile(info, io.BytesIO(content))
+    return buf.getvalue()
+
+
+@pytest.fixture
+def make_tarball():
+    """构造 npm 风格 tarball 的函数"""
+    return _make_tarball
+
+
+class NpmRegistry:
+    """本地 registry 替身：版本元数据 + tarball"""
+
+    url = "https://registry.test"
+
+    def __init__(self, respx_mock):
+        self.respx_mock = respx_mock
+
+    def publish(self, name, version, tarball, integrity=None, **meta):
+        """注册一个版本，返回 tarball 的 route"""
+        if integrity is None:
+            integrity = (
+                "sha512-" + base64.b64encode(hashlib.sha512(tarball).digest()).decode()
+            )
+        tarball_url = f"{self.url}/{name}/-/{name}-{version}.tgz"
+        self.respx_mock.get(f"{self.url}/{name}/{version}").mock(
+            return_value=Response(
+                200,
+                json={
+                    "name": name,
+                    "version": version,
+                    "dist": {"tarball": tarball_url, "integrity": integrity},
+                    **meta,
+                },
+            )
+        )
+        return self.respx_mock.get(tarball_url).mock(
+            return_value=Response(200, content=tarball)
+        )
+
+
+@pytest.fixture
+def npm_registry(respx_mock):
+    """本地 npm registry 替身"""
+    return NpmRegistry(respx_mock)
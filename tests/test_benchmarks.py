@@ -0,0 +1,29 @@
+import json
+import sys
+
+from benchmarks.bench_sync import compare, main, run_scenario
+from benchmarks.fake_cdn import FakeCDNConfig
+
+
+def test_bench_scenario_smoke(tmp_path):
+    """冷启动下载全部文件，热启动不发送任何请求"""
+    cold, warm = run_scenario(12, FakeCDNConfig(file_size=1000), tmp_path)
+
+    assert cold["phase"] == "cold"
+    assert cold["requests"] == 12
+    assert cold["bytes"] == 12 * 1000
+    assert warm["requests"] == 0
+    # 每个阶段在独立的进程中运行，峰值内存分别统计
+    if sys.platform != "win32":
+        assert cold["peak_rss"] > 0 and warm["peak_rss"] > 0
+    assert len(list((tmp_path / "files-12/static/vendor").rglob("*.js"))) == 12
+
+
+def test_bench_cli_writes_json(tmp_path, capsys):
+    output = tmp_path / "result.json"
+    main(["--files", "10", "--file-size", "100", "-o", str(output)])
+
+    report = json.loads(output.read_text())
+    assert [r["phase"] for r in report["results"]] == ["cold", "warm"]
+    assert report["cdn"]["file_size"] == 100
+    assert compare(report, report)[0].endswith("(1.00x)")
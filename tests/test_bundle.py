@@ -0,0 +1,167 @@
+import json
+
+import pytest
+from httpx import Response
+
+from django_js_vendor.bundle import write_bundle
+from django_js_vendor.core import VendorError, VendorManager
+from django_js_vendor.manifest import VendorManifest
+from django_js_vendor.verify import verify_files
+
+FILES = {
+    "https://unpkg.com/a@1.0.0/a.js": b"var a = 1\n//# sourceMappingURL=a.js.map\n",
+    "https://unpkg.com/b@1.0.0/b.js": b"var b = a + 1",
+    "https://unpkg.com/b@1.0.0/b.css": b".b { color: red }\n",
+    "https://unpkg.com/c@1.0.0/c.js": b"var c = 3\n",
+}
+
+PYPROJECT = """
+[tool.django-js-vendor]
+{extra}
+
+[tool.django-js-vendor.dependencies]
+a = {{ version = "1.0.0", files = ["a.js"] }}
+b = {{ version = "1.0.0", files = ["b.js", "b.css"] }}
+c = {{ version = "1.0.0", files = ["c.js"] }}
+"""
+
+BUNDLES = """
+[tool.django-js-vendor.bundles]
+core = ["b", "a"]
+"""
+
+
+@pytest.fixture
+def cdn(respx_mock):
+    for url, content in FILES.items():
+        respx_mock.get(url).mock(return_value=Response(200, content=content))
+    return respx_mock
+
+
+def read_lock(root):
+    return json.loads((root / "js-vendor.lock").read_text())
+
+
+@pytest.mark.asyncio
+async def test_sync_builds_hashed_bundles(mock_project_root, mock_pyproject, cdn):
+    mock_pyproject(PYPROJECT.format(extra="") + BUNDLES)
+    manager = VendorManager(project_root=mock_project_root)
+
+    await manager.sync()
+
+    record = read_lock(mock_project_root)["$bundles"]
+    group = record["groups"]["core"]
+    # 按 pyproject.toml 中的依赖顺序合并
+    assert group["packages"] == ["a", "b"]
+    js_path = mock_project_root / group["js"]
+    assert js_path.name.startswith("core.") and js_path.suffix == ".js"
+    assert js_path.parent.name == "_bundles"
+    assert js_path.read_bytes() == (
+        b"var a = 1\n\n;\nvar b = a + 1\n;\n"
+        b"//# sourceMappingURL=" + js_path.name.encode() + b".map\n"
+    )
+    source_map = json.loads(js_path.with_name(js_path.name + ".map").read_text())
+    assert [s["offset"]["line"] for s in source_map["sections"]] == [0, 3]
+    assert source_map["sections"][0]["map"]["sources"] == ["../a/a.js"]
+    assert source_map["sections"][0]["map"]["mappings"] == "AAAA;AACA"
+    css_path = mock_project_root / group["css"]
+    assert css_path.read_bytes().startswith(b".b { color: red }\n")
+
+    # bundle 文件记录在 lock 中，verify 不会报告多余文件
+    assert verify_files(
+        mock_project_root, "static/vendor", read_lock(mock_project_root)
+    ).clean
+
+    # 输入未变化时沿用已有的 bundle
+    mtime = js_path.stat().st_mtime_ns
+    await manager.sync(paranoid=True)
+    assert js_path.stat().st_mtime_ns == mtime
+
+    # 关闭 bundle 后删除旧文件
+    mock_pyproject(PYPROJECT.format(extra=""))
+    await VendorManager(project_root=mock_project_root).sync()
+    assert "$bundles" not in read_lock(mock_project_root)
+    assert not js_path.parent.exists()
+
+
+@pytest.mark.asyncio
+async def test_bundle_true_groups_remaining_packages(
+    mock_project_root, mock_pyproject, cdn
+):
+    mock_pyproject(PYPROJECT.format(extra="bundle = true") + BUNDLES)
+    manager = VendorManager(project_root=mock_project_root)
+
+    assert manager.bundle_groups() == {"core": ["a", "b"], "vendor": ["c"]}
+    await manager.sync()
+    groups = read_lock(mock_project_root)["$bundles"]["groups"]
+    assert groups["vendor"]["css"] is None
+
+    # 移除包后重新生成包含它的 bundle
+    old = groups["core"]["js"]
+    await manager.remove("a")
+    groups = read_lock(mock_project_root)["$bundles"]["groups"]
+    assert groups["core"]["packages"] == ["b"]
+    assert groups["core"]["js"] != old
+    assert not (mock_project_root / old).exists()
+
+
+def test_package_in_two_bundles(mock_project_root, mock_pyproject):
+    mock_pyproject(PYPROJECT.format(extra="") + BUNDLES + 'other = ["a"]\n')
+    manager = VendorManager(project_root=mock_project_root)
+
+    with pytest.raises(VendorError, match="Package a is in both bundles"):
+        manager.bundle_groups()
+
+
+def test_manifest_renders_bundle_when_all_packages_selected():
+    lock = {
+        "a": {"files": [{"path": "static/vendor/a/a.js"}]},
+        "b": {"files": [{"path": "static/vendor/b/b.js"}]},
+        "c": {"files": [{"path": "static/vendor/c/c.js"}]},
+        "$bundles": {
+            "groups": {
+                "core": {
+                    "packages": ["a", "b"],
+                    "js": "static/vendor/_bundles/core.abc.js",
+                    "css": "static/vendor/_bundles/core.abc.css",
+                }
+            }
+        },
+    }
+    manifest = VendorManifest.build(["a", "b", "c"], lock)
+
+    assert manifest.render().split("\n") == [
+        '<link rel="stylesheet" href="/static/vendor/_bundles/core.abc.css">',
+        '<script src="/static/vendor/_bundles/core.abc.js" defer></script>',
+        '<script src="/static/vendor/c/c.js" defer></script>',
+    ]
+    # 只选中分组中的部分包时单独引入
+    assert manifest.render(("a", "c")).split("\n") == [
+        '<script src="/static/vendor/a/a.js" defer></script>',
+        '<script src="/static/vendor/c/c.js" defer></script>',
+    ]
+
+
+def test_bundle_rewrites_css_urls(tmp_path):
+    css = tmp_path / "static/vendor/icons/font/icons.css"
+    css.parent.mkdir(parents=True)
+    css.write_bytes(
+        b"@font-face { src: url(\"fonts/i.woff2?v=1#x\") format('woff2'),"
+        b" url( '../img/i.png' ), URL(i.svg) }\n"
+        b".a { background: url(data:image/png;base64,AAAA), url(/abs.png),"
+        b" url(//cdn.test/x.png), url(https://cdn.test/y.png), url(#clip) }\n"
+    )
+    bundle_dir = tmp_path / "static/vendor/_bundles"
+
+    entry, _ = write_bundle(
+        tmp_path, bundle_dir, "core", "css", ["static/vendor/icons/font/icons.css"]
+    )
+
+    body = (tmp_path / entry["path"]).read_bytes()
+    # 相对路径改为相对于 bundle 目录，其余 URL 不变
+    assert body.split(b"\n")[:2] == [
+        b"@font-face { src: url(\"../icons/font/fonts/i.woff2?v=1#x\") format('woff2'),"
+        b" url('../icons/img/i.png'), url(../icons/font/i.svg) }",
+        b".a { background: url(data:image/png;base64,AAAA), url(/abs.png),"
+        b" url(//cdn.test/x.png), url(https://cdn.test/y.png), url(#clip) }",
+    ]
@@ -48,3 +48,71 @@ def test_command_remove(mocker):
 
     mock_instance.remove.assert_called_with("htmx")
     assert "Removed htmx" in out.getvalue()
+
+
+def test_command_sync_concurrency_options(mocker):
+    """测试命令行参数覆盖并发配置"""
+    mock_manager_cls = mocker.patch(
+        "django_js_vendor.management.commands.vendor.VendorManager"
+    )
+    mock_instance = mock_manager_cls.return_value
+    mock_instance.sync = AsyncMock()
+
+    call_command(
+        "vendor",
+        "sync",
+        "--concurrency",
+        "4",
+        "--per-host",
+        "2",
+        "--adaptive",
+        stdout=StringIO(),
+    )
+
+    assert mock_instance.config.concurrency == 4
+    assert mock_instance.config.per_host_concurrency == 2
+    assert mock_instance.config.adaptive_concurrency is True
+
+
+def test_command_store_prune(mocker):
+    """测试 vendor store prune 命令"""
+    mock_manager_cls = mocker.patch(
+        "django_js_vendor.management.commands.vendor.VendorManager"
+    )
+    mock_instance = mock_manager_cls.return_value
+    mock_instance.prune_store.return_value = (2, 1024)
+
+    out = StringIO()
+    call_command("vendor", "store", "prune", stdout=out)
+
+    mock_instance.prune_store.assert_called_once()
+    assert "Pruned 2 files" in out.getvalue()
+
+
+def test_command_sync_paranoid(mocker):
+    """测试 vendor sync --paranoid"""
+    mock_manager_cls = mocker.patch(
+        "django_js_vendor.management.commands.vendor.VendorManager"
+    )
+    mock_instance = mock_manager_cls.return_value
+    mock_instance.sync = AsyncMock()
+
+    call_command("vendor", "sync", "--paranoid", stdout=StringIO())
+
+    mock_instance.sync.assert_called_once_with(None, paranoid=True)
+
+
+def test_command_sync_and_update_packages(mocker):
+    """测试 vendor sync/update 指定包名"""
+    mock_manager_cls = mocker.patch(
+        "django_js_vendor.management.commands.vendor.VendorManager"
+    )
+    mock_instance = mock_manager_cls.return_value
+    mock_instance.sync = AsyncMock()
+    mock_instance.update = AsyncMock()
+
+    call_command("vendor", "sync", "htmx", "alpinejs", stdout=StringIO())
+    call_command("vendor", "update", "htmx", stdout=StringIO())
+
+    mock_instance.sync.assert_called_once_with(["htmx", "alpinejs"], paranoid=False)
+    mock_instance.update.assert_called_once_with(["htmx"], paranoid=False)
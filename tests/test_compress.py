@@ -0,0 +1,115 @@
+import gzip
+import json
+
+import pytest
+from httpx import Response
+
+from django_js_vendor.compress import compress_file, is_compressible
+from django_js_vendor.config import VendorConfig
+from django_js_vendor.core import VendorError, VendorManager
+from django_js_vendor.verify import verify_files
+
+APP_URL = "https://unpkg.com/lib@1.0.0/dist/app.js"
+TINY_URL = "https://unpkg.com/lib@1.0.0/dist/tiny.js"
+APP = b"function app() { return 'hello world'; }\n" * 200
+
+PYPROJECT = """
+[tool.django-js-vendor]
+{extra}
+
+[tool.django-js-vendor.dependencies]
+lib = {{ version = "1.0.0", files = ["dist/app.js", "dist/tiny.js"] }}
+"""
+
+
+@pytest.fixture
+def cdn(respx_mock):
+    respx_mock.get(APP_URL).mock(return_value=Response(200, content=APP))
+    respx_mock.get(TINY_URL).mock(return_value=Response(200, content=b"x"))
+    return respx_mock
+
+
+def test_compress_config(mock_pyproject, mock_project_root):
+    mock_pyproject(PYPROJECT.format(extra="compress = true"))
+    config = VendorConfig.from_toml(mock_project_root / "pyproject.toml")
+    assert config.compress == ["gzip", "br"]
+
+    mock_pyproject(PYPROJECT.format(extra='compress = "gzip"'))
+    config = VendorConfig.from_toml(mock_project_root / "pyproject.toml")
+    assert config.compress == ["gzip"]
+
+
+def test_compress_file_skips_formats_that_do_not_shrink(tmp_path):
+    path = tmp_path / "tiny.js"
+    path.write_bytes(b"x")
+    (tmp_path / "tiny.js.gz").write_bytes(b"stale")
+
+    assert compress_file(str(path), ["gzip"]) == {"gzip": None}
+    assert not (tmp_path / "tiny.js.gz").exists()
+    assert is_compressible("a/b.CSS")
+    assert not is_compressible("a/b.png")
+
+
+@pytest.mark.asyncio
+async def test_sync_writes_and_locks_variants(
+    mock_project_root, mock_pyproject, cdn, capsys
+):
+    mock_pyproject(PYPROJECT.format(extra='compress = ["gzip"]'))
+    manager = VendorManager(project_root=mock_project_root)
+
+    await manager.sync()
+
+    pkg_dir = mock_project_root / "static/vendor/lib/dist"
+    assert gzip.decompress((pkg_dir / "app.js.gz").read_bytes()) == APP
+    assert not (pkg_dir / "tiny.js.gz").exists()
+    lock = json.loads((mock_project_root / "js-vendor.lock").read_text())
+    files = {f["path"]: f for f in lock["lib"]["files"]}
+    app = files["static/vendor/lib/dist/app.js"]["compressed"]["gzip"]
+    assert app["size"] == (pkg_dir / "app.js.gz").stat().st_size
+    assert app["integrity"].startswith("sha256-")
+    assert files["static/vendor/lib/dist/tiny.js"]["compressed"] == {"gzip": None}
+    assert "Compressing 2 files" in capsys.readouterr().out
+
+    # 压缩文件记录在 lock 中，verify 不会报告多余文件
+    report = verify_files(mock_project_root, "static/vendor", lock)
+    assert report.clean
+    assert "static/vendor/lib/dist/app.js.gz" in report.ok
+
+    # 原文件未变化时沿用已有的压缩文件
+    mtime = (pkg_dir / "app.js.gz").stat().st_mtime_ns
+    await manager.sync(paranoid=True)
+    assert "Compressing" not in capsys.readouterr().out
+    assert (pkg_dir / "app.js.gz").stat().st_mtime_ns == mtime
+    lock = json.loads((mock_project_root / "js-vendor.lock").read_text())
+    assert verify_files(mock_project_root, "static/vendor", lock).clean
+
+
+@pytest.mark.asyncio
+async def test_enabling_compression_reprocesses_installed_packages(
+    mock_project_root, mock_pyproject, cdn, capsys
+):
+    mock_pyproject(PYPROJECT.format(extra=""))
+    await VendorManager(project_root=mock_project_root).sync()
+    pkg_dir = mock_project_root / "static/vendor/lib/dist"
+    assert not (pkg_dir / "app.js.gz").exists()
+
+    mock_pyproject(PYPROJECT.format(extra='compress = ["gzip"]'))
+    manager = VendorManager(project_root=mock_project_root)
+    await manager.sync()
+    assert (pkg_dir / "app.js.gz").exists()
+
+    # 删除压缩文件后，包不再被视为最新
+    (pkg_dir / "app.js.gz").unlink()
+    capsys.readouterr()
+    await manager.sync()
+    assert (pkg_dir / "app.js.gz").exists()
+    assert "Compressing 1 files" in capsys.readouterr().out
+
+
+@pytest.mark.asyncio
+async def test_unknown_compression_format(mock_project_root, mock_pyproject, cdn):
+    mock_pyproject(PYPROJECT.format(extra='compress = ["zstd"]'))
+    manager = VendorManager(project_root=mock_project_root)
+
+    with pytest.raises(VendorError, match="Unknown compression formats: zstd"):
+        await manager.sync()
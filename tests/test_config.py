@@ -48,3 +48,36 @@ foo = "bar"
     # 应该回退到默认值
     assert config.destination == "static/vendor"
     assert config.dependencies == {}
+
+
+def test_concurrency_config(mock_pyproject):
+    """测试下载并发配置"""
+    content = """
+[tool.django-js-vendor]
+concurrency = 4
+per_host_concurrency = 2
+adaptive_concurrency = true
+    """
+    mock_pyproject(content)
+    config = VendorConfig.from_toml()
+
+    assert config.concurrency == 4
+    assert config.per_host_concurrency == 2
+    assert config.adaptive_concurrency is True
+
+
+def test_http_config(mock_pyproject):
+    """测试 HTTP 客户端配置"""
+    content = """
+[tool.django-js-vendor.http]
+max_connections = 8
+timeout = 10.0
+http2 = true
+    """
+    mock_pyproject(content)
+    config = VendorConfig.from_toml()
+
+    assert config.http.max_connections == 8
+    assert config.http.timeout == 10.0
+    assert config.http.connect_timeout == 60.0
+    assert config.http.http2 is True
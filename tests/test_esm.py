@@ -0,0 +1,210 @@
+import json
+
+import pytest
+from httpx import Response
+
+from django_js_vendor.core import VendorError, VendorManager
+from django_js_vendor.esm import file_specifiers, module_exports
+from django_js_vendor.manifest import VendorManifest
+
+PACKAGE_JSON = {
+    "name": "lit",
+    "main": "index.cjs",
+    "exports": {
+        ".": {
+            "types": "./index.d.ts",
+            "require": "./index.cjs",
+            "import": "./index.js",
+        },
+        "./directives.js": {"default": "./directives/index.js"},
+        "./package.json": "./package.json",
+        "./*": "./*.js",
+    },
+}
+
+
+def test_module_exports():
+    assert module_exports(PACKAGE_JSON) == {
+        ".": "index.js",
+        "./directives.js": "directives/index.js",
+    }
+    # 条件对象与字符串形式的 exports
+    assert module_exports({"exports": {"browser": "./b.mjs", "node": "./n.js"}}) == {
+        ".": "b.mjs"
+    }
+    assert module_exports({"exports": "./main.js"}) == {".": "main.js"}
+    # 没有 exports 时使用 module 字段
+    assert module_exports({"main": "a.cjs", "module": "./dist/a.esm.js"}) == {
+        ".": "dist/a.esm.js"
+    }
+    assert module_exports({"main": "a.js"}) == {}
+
+
+def test_file_specifiers_defaults_to_first_module():
+    exports = module_exports(PACKAGE_JSON)
+    assert file_specifiers("lit", exports, ["index.js", "directives/index.js"]) == {
+        "index.js": ["lit"],
+        "directives/index.js": ["lit/directives.js"],
+    }
+    # 没有 package.json 时以第一个 JS 文件作为入口
+    assert file_specifiers("x", {}, ["x.css", "./x.mjs"]) == {"./x.mjs": ["x"]}
+
+
+def read_lock(root):
+    return json.loads((root / "js-vendor.lock").read_text())
+
+
+@pytest.mark.asyncio
+async def test_sync_esm_records_specifiers(
+    mock_project_root, mock_pyproject, respx_mock
+):
+    mock_pyproject("""
+[tool.django-js-vendor.dependencies]
+lit = { version = "3.0.0", esm = true }
+    """)
+    base = "https://unpkg.com/lit@3.0.0"
+    respx_mock.get(f"{base}/package.json").mock(
+        return_value=Response(200, json=PACKAGE_JSON)
+    )
+    respx_mock.get(f"{base}/index.js").mock(
+        return_value=Response(200, content=b"export const html = 1;")
+    )
+
+    manager = VendorManager(project_root=mock_project_root)
+    await manager.sync()
+
+    # 未指定 files 时只下载包入口
+    files = read_lock(mock_project_root)["lit"]["files"]
+    assert [(f["path"], f["specifiers"]) for f in files] == [
+        ("static/vendor/lit/index.js", ["lit"])
+    ]
+    assert (mock_project_root / "static/vendor/lit/index.js").exists()
+
+    # 指定 files 时下载全部文件，只有 exports 中的文件有 specifier
+    mock_pyproject("""
+[tool.django-js-vendor.dependencies]
+lit = { version = "3.0.0", esm = true, files = ["index.js", "directives/index.js", "lib/a.js"] }
+    """)
+    for rel in ("directives/index.js", "lib/a.js"):
+        respx_mock.get(f"{base}/{rel}").mock(
+            return_value=Response(200, content=b"export default 1;")
+        )
+    await VendorManager(project_root=mock_project_root).sync()
+
+    files = read_lock(mock_project_root)["lit"]["files"]
+    assert {f["path"]: f.get("specifiers") for f in files} == {
+        "static/vendor/lit/index.js": ["lit"],
+        "static/vendor/lit/directives/index.js": ["lit/directives.js"],
+        "static/vendor/lit/lib/a.js": None,
+    }
+
+
+@pytest.mark.asyncio
+async def test_sync_esm_without_entry(mock_project_root, mock_pyproject, respx_mock):
+    mock_pyproject("""
+[tool.django-js-vendor.dependencies]
+htmx = { version = "1.0.0", esm = true }
+    """)
+    respx_mock.get("https://unpkg.com/htmx@1.0.0/package.json").mock(
+        return_value=Response(200, json={"main": "htmx.js"})
+    )
+
+    with pytest.raises(VendorError, match="No ES module entry"):
+        await VendorManager(project_root=mock_project_root).sync()
+
+
+@pytest.mark.asyncio
+async def test_sync_esm_rejects_entry_outside_package(
+    mock_project_root, mock_pyproject, respx_mock
+):
+    mock_pyproject("""
+[tool.django-js-vendor.dependencies]
+lit = { version = "3.0.0", esm = true }
+    """)
+    respx_mock.get("https://unpkg.com/lit@3.0.0/package.json").mock(
+        return_value=Response(200, json={"exports": {".": "../../../../pwned.js"}})
+    )
+    route = respx_mock.get(url__regex=r"pwned\.js").mock(
+        return_value=Response(200, content=b"pwned")
+    )
+
+    with pytest.raises(VendorError, match="Unsafe file paths for lit"):
+        await VendorManager(project_root=mock_project_root).sync()
+
+    assert not route.called
+    for parent in (mock_project_root, *mock_project_root.parents[:3]):
+        assert not list(parent.glob("pwned.js*"))
+
+
+@pytest.mark.asyncio
+async def test_sync_npm_esm(
+    mock_project_root, mock_pyproject, respx_mock, npm_registry, make_tarball
+):
+    mock_pyproject(f"""
+[tool.django-js-vendor]
+registry = "{npm_registry.url}"
+
+[tool.django-js-vendor.dependencies]
+lit = {{ version = "3.0.0", provider = "npm", esm = true }}
+    """)
+    tarball = make_tarball(
+        {"index.js": b"export {}", "index.cjs": b"module.exports = {}"}
+    )
+    meta = {k: v for k, v in PACKAGE_JSON.items() if k != "name"}
+    npm_registry.publish("lit", "3.0.0", tarball, **meta)
+
+    manager = VendorManager(project_root=mock_project_root)
+    await manager.sync()
+    files = read_lock(mock_project_root)["lit"]["files"]
+    assert [(f["path"], f["specifiers"]) for f in files] == [
+        ("static/vendor/lit/index.js", ["lit"])
+    ]
+
+    # 文件完整时不访问 registry，specifier 保留在 lock 记录中
+    respx_mock.reset()
+    await manager.sync(paranoid=True)
+    assert not respx_mock.calls
+    assert read_lock(mock_project_root)["lit"]["files"][0]["specifiers"] == ["lit"]
+
+
+def test_manifest_renders_importmap():
+    lock = {
+        "lit": {
+            "files": [
+                {
+                    "path": "static/vendor/lit/index.js",
+                    "specifiers": ["lit", "lit/index.js"],
+                    "sri": "sha384-abc",
+                },
+                {"path": "static/vendor/lit/lib/a.js"},
+            ]
+        },
+        "evil": {
+            "files": [{"path": "static/vendor/evil/x.js", "specifiers": ["</script>"]}]
+        },
+        "htmx": {"files": [{"path": "static/vendor/htmx/htmx.js"}]},
+    }
+    manifest = VendorManifest.build(["lit", "evil", "htmx"], lock)
+
+    html = manifest.render_importmap(("lit",))
+    assert html.startswith('<script type="importmap">\n')
+    assert json.loads(html.split("\n", 1)[1].rsplit("\n", 1)[0]) == {
+        "imports": {
+            "lit": "/static/vendor/lit/index.js",
+            "lit/index.js": "/static/vendor/lit/index.js",
+        },
+        "integrity": {"/static/vendor/lit/index.js": "sha384-abc"},
+    }
+    assert "</script>" not in manifest.render_importmap().removesuffix("</script>")
+    assert manifest.render_importmap(("htmx",)) == ""
+
+    # 包入口以 module 脚本引用
+    assert manifest.render(("lit", "htmx")).split("\n") == [
+        '<script type="module" src="/static/vendor/lit/index.js" '
+        'integrity="sha384-abc" crossorigin="anonymous"></script>',
+        '<script type="module" src="/static/vendor/lit/lib/a.js"></script>',
+        '<script src="/static/vendor/htmx/htmx.js" defer></script>',
+    ]
+    assert manifest.render_preloads(("lit",)).startswith(
+        '<link rel="modulepreload" href="/static/vendor/lit/index.js"'
+    )
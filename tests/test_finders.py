@@ -0,0 +1,94 @@
+import hashlib
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.test import override_settings
+
+from django_js_vendor.finders import VendorFinder
+from django_js_vendor.store import ContentStore
+
+APP = b"console.log('app')"
+INTEGRITY = f"sha256-{hashlib.sha256(APP).hexdigest()}"
+
+
+@pytest.fixture
+def vendored(mock_project_root, mock_pyproject):
+    store_dir = mock_project_root / "store"
+    mock_pyproject(f"""
+[tool.django-js-vendor]
+store_dir = "{store_dir.as_posix()}"
+    """)
+    path = mock_project_root / "static/vendor/lib/app.js"
+    path.parent.mkdir(parents=True)
+    path.write_bytes(APP)
+    lock = {
+        "lib": {
+            "files": [
+                {
+                    "path": "static/vendor/lib/app.js",
+                    "integrity": INTEGRITY,
+                    "size": len(APP),
+                    "hashed_path": "static/vendor/lib/app.0123456789ab.js",
+                }
+            ]
+        }
+    }
+    (mock_project_root / "js-vendor.lock").write_text(json.dumps(lock))
+    with override_settings(BASE_DIR=mock_project_root):
+        yield mock_project_root
+
+
+def test_find_uses_lock_index(vendored):
+    finder = VendorFinder()
+    expected = str(vendored / "static/vendor/lib/app.js")
+
+    assert finder.find("vendor/lib/app.js") == expected
+    assert finder.find("vendor/lib/app.js", find_all=True) == [expected]
+    # Django 5.2 之前的参数名
+    assert finder.find("vendor/lib/app.js", all=True) == [expected]
+    assert finder.find("vendor/lib/other.js") is None
+    assert finder.find("vendor/lib/other.js", find_all=True) == []
+    # 带哈希的链接尚未创建
+    assert list(path for path, _ in finder.list([])) == ["vendor/lib/app.js"]
+    assert finder.list(["*.js"]) and not list(finder.list(["*.js"]))
+
+
+def test_find_falls_back_to_content_store(vendored):
+    store = ContentStore(vendored / "store")
+    local = vendored / "static/vendor/lib/app.js"
+    store.import_file(local, INTEGRITY)
+    local.unlink()
+
+    finder = VendorFinder()
+    assert finder.find("vendor/lib/app.js") == str(store.blob_path(INTEGRITY))
+    with finder.storage.open("vendor/lib/app.js") as f:
+        assert f.read() == APP
+
+
+def test_collectstatic_skips_files_with_matching_hash(vendored):
+    root = vendored / "collected"
+    with override_settings(
+        INSTALLED_APPS=["django.contrib.staticfiles", "django_js_vendor"],
+        STATICFILES_FINDERS=["django_js_vendor.finders.VendorFinder"],
+        STATICFILES_DIRS=[],
+        STATIC_ROOT=str(root),
+    ):
+
+        def collect():
+            out = StringIO()
+            call_command("collectstatic", interactive=False, verbosity=1, stdout=out)
+            return out.getvalue()
+
+        assert "1 static file copied" in collect()
+        assert (root / "vendor/lib/app.js").read_bytes() == APP
+
+        # 内容一致时跳过，即使源文件比目标文件新
+        (vendored / "static/vendor/lib/app.js").touch()
+        assert "1 unmodified" in collect()
+
+        # 目标文件被修改时重新复制
+        (root / "vendor/lib/app.js").write_bytes(b"changed")
+        assert "1 static file copied" in collect()
+        assert (root / "vendor/lib/app.js").read_bytes() == APP
@@ -0,0 +1,133 @@
+import hashlib
+import json
+import os
+
+import pytest
+from django.core.files.storage import FileSystemStorage
+from django.test import override_settings
+from httpx import Response
+
+from django_js_vendor.core import VendorManager
+from django_js_vendor.hashed import hashed_name
+from django_js_vendor.manifest import VendorManifest
+from django_js_vendor.storage import VendorManifestStaticFilesStorage
+from django_js_vendor.verify import verify_files
+
+APP_URL = "https://unpkg.com/lib@1.0.0/dist/app.js"
+APP = b"function app() { return 'hello world'; }\n" * 200
+DIGEST = hashlib.sha256(APP).hexdigest()[:12]
+
+PYPROJECT = """
+[tool.django-js-vendor]
+{extra}
+
+[tool.django-js-vendor.dependencies]
+lib = {{ version = "1.0.0", files = ["dist/app.js", "dist/app.js.map"] }}
+"""
+
+
+@pytest.fixture
+def cdn(respx_mock):
+    respx_mock.get(APP_URL).mock(return_value=Response(200, content=APP))
+    respx_mock.get(APP_URL + ".map").mock(return_value=Response(200, content=b"{}"))
+    return respx_mock
+
+
+def read_lock(root):
+    return json.loads((root / "js-vendor.lock").read_text())
+
+
+def test_hashed_name():
+    assert hashed_name("a/htmx.min.js", "sha256-0123456789abcdef") == (
+        "a/htmx.min.0123456789ab.js"
+    )
+
+
+@pytest.mark.asyncio
+async def test_sync_links_hashed_filenames(mock_project_root, mock_pyproject, cdn):
+    mock_pyproject(
+        PYPROJECT.format(extra='hashed_filenames = true\ncompress = ["gzip"]')
+    )
+    manager = VendorManager(project_root=mock_project_root)
+
+    await manager.sync()
+
+    lock = read_lock(mock_project_root)
+    # 下载按完成顺序记录，按路径取出
+    files = {f["path"]: f for f in lock["lib"]["files"]}
+    app = files["static/vendor/lib/dist/app.js"]
+    source_map = files["static/vendor/lib/dist/app.js.map"]
+    assert app["hashed_path"] == f"static/vendor/lib/dist/app.{DIGEST}.js"
+    # 只为模板标签引用的 JS/CSS 生成哈希文件名
+    assert "hashed_path" not in source_map
+    original = mock_project_root / app["path"]
+    hashed = mock_project_root / app["hashed_path"]
+    assert os.path.samefile(original, hashed)
+    assert os.path.samefile(
+        original.with_name("app.js.gz"), hashed.with_name(hashed.name + ".gz")
+    )
+    assert verify_files(mock_project_root, "static/vendor", lock).clean
+
+    manifest = VendorManifest.build(["lib"], lock)
+    assert manifest.render() == (
+        f'<script src="/static/vendor/lib/dist/app.{DIGEST}.js" defer></script>'
+    )
+
+    # 再次同步时沿用已有的链接
+    await manager.sync()
+    assert read_lock(mock_project_root) == lock
+
+    # 关闭后删除带哈希的文件
+    mock_pyproject(PYPROJECT.format(extra='compress = ["gzip"]'))
+    await VendorManager(project_root=mock_project_root).sync()
+    files = read_lock(mock_project_root)["lib"]["files"]
+    assert not any("hashed_path" in f for f in files)
+    assert not hashed.exists()
+    assert original.exists()
+
+
+def test_storage_skips_vendor_hashed_files(mock_project_root):
+    lock = {
+        "lib": {
+            "files": [
+                {
+                    "path": "static/vendor/lib/app.css",
+                    "hashed_path": "static/vendor/lib/app.0123456789ab.css",
+                }
+            ]
+        }
+    }
+    (mock_project_root / "js-vendor.lock").write_text(json.dumps(lock))
+    source = mock_project_root / "static"
+    css = b"body { background: url(bg.png) }"
+    files = {
+        "vendor/lib/app.css": css,
+        "vendor/lib/app.0123456789ab.css": css,
+        "vendor/lib/bg.png": b"png",
+    }
+    for name, content in files.items():
+        (source / name).parent.mkdir(parents=True, exist_ok=True)
+        (source / name).write_bytes(content)
+
+    root = mock_project_root / "collected"
+    with override_settings(BASE_DIR=mock_project_root, STATIC_ROOT=str(root)):
+        storage = VendorManifestStaticFilesStorage()
+        source_storage = FileSystemStorage(location=str(source))
+        for name, content in files.items():
+            (root / name).parent.mkdir(parents=True, exist_ok=True)
+            (root / name).write_bytes(content)
+        paths = {name: (source_storage, name) for name in files}
+        processed = {name for name, _, _ in storage.post_process(paths)}
+
+        manifest = json.loads((root / "staticfiles.json").read_text())["paths"]
+        assert "vendor/lib/app.0123456789ab.css" not in processed
+        assert manifest["vendor/lib/app.0123456789ab.css"] == (
+            "vendor/lib/app.0123456789ab.css"
+        )
+        # 内容未被改写，SRI 仍然有效
+        assert (root / "vendor/lib/app.0123456789ab.css").read_bytes() == css
+        # 其他文件照常处理
+        assert manifest["vendor/lib/app.css"] != "vendor/lib/app.css"
+        assert storage.url("vendor/lib/app.0123456789ab.css") == (
+            "/static/vendor/lib/app.0123456789ab.css"
+        )
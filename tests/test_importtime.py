@@ -0,0 +1,68 @@
+import compileall
+import subprocess
+import sys
+from pathlib import Path
+
+import django_js_vendor
+
+# 模板标签模块自身 (不含 Django) 允许的导入耗时预算 (微秒)。
+# 只用于发现数量级上的退化，真正的回归检查是 FORBIDDEN_MODULES
+IMPORT_BUDGET_US = 100_000
+# 取多次测量中的最小值，减少调度带来的噪声
+IMPORT_RUNS = 3
+
+# Web worker 渲染模板时不应加载的安装期模块
+FORBIDDEN_MODULES = (
+    "httpx",
+    "tqdm",
+    "tomlkit",
+    "multiprocessing",
+    "concurrent.futures.process",
+    "django_js_vendor.core",
+    "django_js_vendor.utils",
+)
+
+SCRIPT = """
+import sys
+import django.conf, django.template, django.templatetags.static
+import django.utils.safestring
+import django_js_vendor.templatetags.vendor_tags
+print(",".join(sorted(sys.modules)))
+"""
+
+
+def _run_importtime() -> tuple[set[str], dict[str, int]]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", SCRIPT],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=Path(__file__).parent.parent,
+    )
+    modules = set(result.stdout.strip().split(","))
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cum, name = line.split("|")
+        if cum.strip().isdigit():
+            cumulative[name.strip()] = int(cum)
+    return modules, cumulative
+
+
+def test_template_tags_do_not_import_install_time_modules():
+    """模板标签不应导入下载相关的模块"""
+    modules, _ = _run_importtime()
+    loaded = [name for name in FORBIDDEN_MODULES if name in modules]
+    assert not loaded, f"template tags import install-time modules: {loaded}"
+
+
+def test_template_tags_import_time_budget():
+    """模板标签模块的导入耗时应在预算之内 (不含编译字节码的时间)"""
+    # 先编译字节码，结果不受测试顺序与 .pyc 缓存状态影响
+    compileall.compile_dir(Path(django_js_vendor.__file__).parent, quiet=1)
+    best = min(
+        _run_importtime()[1]["django_js_vendor.templatetags.vendor_tags"]
+        for _ in range(IMPORT_RUNS)
+    )
+    assert best < IMPORT_BUDGET_US
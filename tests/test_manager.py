@@ -1,8 +1,12 @@
+import base64
+import hashlib
 import json
+import os
 
 import pytest
 from httpx import Response
 
+from django_js_vendor import core, utils
 from django_js_vendor.core import VendorError, VendorManager
 from django_js_vendor.utils import calculate_content_sha256
 
@@ -153,3 +157,204 @@ missing-lib = "1.0.0"
     # sync() gathers results, so it will raise.
     with pytest.raises(Exception):  # VendorError or HTTPError
         await manager.sync()
+
+
+@pytest.mark.asyncio
+async def test_sync_streams_large_file(manager, mock_pyproject, respx_mock):
+    content = """
+[tool.django-js-vendor.dependencies]
+big-lib = { version = "1.0.0", files = ["dist/big.wasm"] }
+    """
+    mock_pyproject(content)
+    manager.config = manager.config.from_toml(manager.config_path)
+
+    # 多个数据块，确保流式写入与增量 hash 结果与整体 hash 一致
+    payload = bytes(range(256)) * 1024
+    respx_mock.get("https://unpkg.com/big-lib@1.0.0/dist/big.wasm").mock(
+        return_value=Response(200, content=payload)
+    )
+
+    await manager.sync()
+
+    dest_path = manager.project_root / "static/vendor/big-lib/dist/big.wasm"
+    assert dest_path.read_bytes() == payload
+    assert not dest_path.with_name("big.wasm.part").exists()
+    lock_data = manager.load_lockfile()
+    file_entry = lock_data["big-lib"]["files"][0]
+    assert file_entry["integrity"] == f"sha256-{calculate_content_sha256(payload)}"
+
+
+@pytest.mark.asyncio
+async def test_stat_fast_path(manager, mock_pyproject, respx_mock, mocker):
+    content = """
+[tool.django-js-vendor.dependencies]
+test-lib = { version = "1.0.0", files = ["dist/test-lib.js"] }
+    """
+    mock_pyproject(content)
+    manager.config = manager.config.from_toml(manager.config_path)
+
+    js_content = b"console.log('hello')"
+    route = respx_mock.get("https://unpkg.com/test-lib@1.0.0/dist/test-lib.js").mock(
+        return_value=Response(200, content=js_content)
+    )
+
+    await manager.sync()
+    file_entry = manager.load_lockfile()["test-lib"]["files"][0]
+    assert file_entry["size"] == len(js_content)
+    assert "mtime" in file_entry
+
+    # size/mtime 未变化时不读取文件内容
+    spy = mocker.spy(utils, "calculate_sha256")
+    await manager.sync()
+    assert spy.call_count == 0
+    assert route.call_count == 1
+
+    # --paranoid 强制重新计算哈希
+    await manager.sync(paranoid=True)
+    assert spy.call_count == 1
+    assert route.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_stat_change_triggers_rehash(manager, mock_pyproject, respx_mock):
+    content = """
+[tool.django-js-vendor.dependencies]
+test-lib = { version = "1.0.0", files = ["dist/test-lib.js"] }
+    """
+    mock_pyproject(content)
+    manager.config = manager.config.from_toml(manager.config_path)
+
+    js_content = b"console.log('hello')"
+    route = respx_mock.get("https://unpkg.com/test-lib@1.0.0/dist/test-lib.js").mock(
+        return_value=Response(200, content=js_content)
+    )
+    await manager.sync()
+
+    # 同样大小但内容被修改的文件需要重新下载
+    dest_path = manager.project_root / "static/vendor/test-lib/dist/test-lib.js"
+    dest_path.write_bytes(b"console.log('HELLO')")
+    os.utime(dest_path, ns=(0, 0))
+
+    await manager.sync()
+    assert route.call_count == 2
+    assert dest_path.read_bytes() == js_content
+
+
+INCREMENTAL_PYPROJECT = """
+[tool.django-js-vendor.dependencies]
+a = {{ version = "{a}", files = ["a.js"] }}
+b = {{ version = "1.0.0", files = ["b.js"] }}
+"""
+
+
+def mock_incremental_routes(respx_mock):
+    return {
+        version: respx_mock.get(f"https://unpkg.com/a@{version}/a.js").mock(
+            return_value=Response(200, content=f"a{version}".encode())
+        )
+        for version in ("1.0.0", "2.0.0")
+    } | {
+        "b": respx_mock.get("https://unpkg.com/b@1.0.0/b.js").mock(
+            return_value=Response(200, content=b"b")
+        )
+    }
+
+
+@pytest.mark.asyncio
+async def test_sync_skips_unchanged_packages(
+    manager, mock_pyproject, respx_mock, mocker
+):
+    mock_pyproject(INCREMENTAL_PYPROJECT.format(a="1.0.0"))
+    manager.config = manager.config.from_toml(manager.config_path)
+    mock_incremental_routes(respx_mock)
+    await manager.sync()
+    lock_data = manager.load_lockfile()
+    assert lock_data["a"]["fingerprint"] == manager.package_fingerprint(
+        manager.config.dependencies["a"]
+    )
+
+    # 指纹一致且文件完整时，不需要 HTTP 客户端，也不会读取文件内容
+    client_spy = mocker.spy(manager, "make_client")
+    hash_spy = mocker.spy(utils, "calculate_sha256")
+    await manager.sync()
+    assert client_spy.call_count == 0
+    assert hash_spy.call_count == 0
+    assert manager.load_lockfile() == lock_data
+
+    # 修改版本只重新同步该包
+    mock_pyproject(INCREMENTAL_PYPROJECT.format(a="2.0.0"))
+    manager.config = manager.config.from_toml(manager.config_path)
+    routes = mock_incremental_routes(respx_mock)
+    respx_mock.reset()
+    await manager.sync()
+    assert routes["2.0.0"].call_count == 1
+    assert routes["b"].call_count == 0
+    new_lock = manager.load_lockfile()
+    assert new_lock["b"] == lock_data["b"]
+    assert new_lock["a"]["files"][0]["url"] == "https://unpkg.com/a@2.0.0/a.js"
+
+
+@pytest.mark.asyncio
+async def test_sync_refetches_missing_files(manager, mock_pyproject, respx_mock):
+    mock_pyproject(INCREMENTAL_PYPROJECT.format(a="1.0.0"))
+    manager.config = manager.config.from_toml(manager.config_path)
+    mock_incremental_routes(respx_mock)
+    await manager.sync()
+
+    (manager.project_root / "static/vendor/a/a.js").unlink()
+    routes = mock_incremental_routes(respx_mock)
+    respx_mock.reset()
+    await manager.sync()
+
+    assert routes["1.0.0"].call_count == 1
+    assert routes["b"].call_count == 0
+    assert (manager.project_root / "static/vendor/a/a.js").read_bytes() == b"a1.0.0"
+
+
+@pytest.mark.asyncio
+async def test_selective_sync_leaves_other_packages(
+    manager, mock_pyproject, respx_mock
+):
+    mock_pyproject(INCREMENTAL_PYPROJECT.format(a="1.0.0"))
+    manager.config = manager.config.from_toml(manager.config_path)
+    routes = mock_incremental_routes(respx_mock)
+
+    await manager.sync(["a"])
+
+    assert routes["1.0.0"].call_count == 1
+    assert routes["b"].call_count == 0
+    assert set(manager.load_lockfile()) == {"a"}
+
+    await manager.sync(["b"])
+    assert set(manager.load_lockfile()) == {"a", "b"}
+
+    with pytest.raises(VendorError, match="Unknown packages: c"):
+        await manager.sync(["c"])
+
+
+@pytest.mark.asyncio
+async def test_sync_records_sri(manager, mock_pyproject, respx_mock, mocker):
+    mock_pyproject(
+        "[tool.django-js-vendor]\nsri = true\n"
+        + INCREMENTAL_PYPROJECT.format(a="1.0.0")
+    )
+    manager.config = manager.config.from_toml(manager.config_path)
+    mock_incremental_routes(respx_mock)
+    await manager.sync()
+
+    entry = manager.load_lockfile()["a"]["files"][0]
+    digest = base64.b64encode(hashlib.sha384(b"a1.0.0").digest()).decode()
+    assert entry["sri"] == f"sha384-{digest}"
+
+    # 文件内容未变化时沿用已有的 SRI，不再读取文件
+    sri_spy = mocker.spy(core, "calculate_sri")
+    await manager.sync(paranoid=True)
+    assert sri_spy.call_count == 0
+    assert manager.load_lockfile()["a"]["files"][0]["sri"] == entry["sri"]
+
+    # sha256 直接由 integrity 转换
+    manager.config.sri = "sha256"
+    await manager.sync()
+    digest = base64.b64encode(hashlib.sha256(b"a1.0.0").digest()).decode()
+    assert manager.load_lockfile()["a"]["files"][0]["sri"] == f"sha256-{digest}"
+    assert sri_spy.call_count == 0
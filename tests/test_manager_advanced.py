@@ -1,7 +1,11 @@
+import hashlib
+
+import httpx
 import pytest
 from httpx import Response
 
-from django_js_vendor.core import VendorManager
+from django_js_vendor.config import VendorConfig
+from django_js_vendor.core import CHUNK_SIZE, VendorManager
 
 
 @pytest.fixture
@@ -99,3 +103,254 @@ old-lib = "1.0.0"
     # Assert lockfile updated
     lock_data = manager.load_lockfile()
     assert "old-lib" not in lock_data
+
+
+@pytest.mark.asyncio
+async def test_update_sends_conditional_request(manager, mock_pyproject, respx_mock):
+    # 没有锁定版本的 URL 是可变的，update 时需要重新验证
+    content = """
+[tool.django-js-vendor.dependencies]
+live-lib = { files = ["dist/live.js"] }
+    """
+    mock_pyproject(content)
+    manager.config = manager.config.from_toml(manager.config_path)
+
+    route = respx_mock.get("https://unpkg.com/live-lib/dist/live.js")
+    route.side_effect = [
+        Response(200, content=b"v1", headers={"ETag": '"abc"'}),
+        Response(304, headers={"ETag": '"abc"'}),
+    ]
+
+    await manager.sync()
+    await manager.update()
+
+    assert route.call_count == 2
+    assert route.calls[1].request.headers["If-None-Match"] == '"abc"'
+    dest_path = manager.project_root / "static/vendor/live-lib/dist/live.js"
+    assert dest_path.read_bytes() == b"v1"
+    file_entry = manager.load_lockfile()["live-lib"]["files"][0]
+    assert file_entry["etag"] == '"abc"'
+
+
+@pytest.mark.asyncio
+async def test_update_skips_immutable_urls(manager, mock_pyproject, respx_mock):
+    content = """
+[tool.django-js-vendor.dependencies]
+lib = { version = "1.0.0", files = ["dist/lib.js"] }
+    """
+    mock_pyproject(content)
+    manager.config = manager.config.from_toml(manager.config_path)
+
+    route = respx_mock.get("https://unpkg.com/lib@1.0.0/dist/lib.js").mock(
+        return_value=Response(200, content=b"lib")
+    )
+
+    await manager.sync()
+    await manager.update()
+
+    assert route.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_immutable_redirect_is_not_refollowed(
+    manager, mock_pyproject, respx_mock
+):
+    content = """
+[tool.django-js-vendor.dependencies]
+test-lib = "1.0.0"
+    """
+    mock_pyproject(content)
+    manager.config = manager.config.from_toml(manager.config_path)
+
+    redirect_route = respx_mock.get("https://unpkg.com/test-lib@1.0.0").mock(
+        return_value=Response(
+            302,
+            headers={"Location": "https://unpkg.com/test-lib@1.0.0/dist/test-lib.js"},
+        )
+    )
+    final_route = respx_mock.get(
+        "https://unpkg.com/test-lib@1.0.0/dist/test-lib.js"
+    ).mock(return_value=Response(200, content=b"lib"))
+
+    await manager.sync()
+    file_entry = manager.load_lockfile()["test-lib"]["files"][0]
+    assert file_entry["resolved"] == "https://unpkg.com/test-lib@1.0.0/dist/test-lib.js"
+
+    # 本地文件丢失后直接请求重定向后的地址
+    (manager.project_root / file_entry["path"]).unlink()
+    await manager.sync()
+
+    assert redirect_route.call_count == 1
+    assert final_route.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_add_reuses_client_session(manager, mock_pyproject, respx_mock, mocker):
+    mock_pyproject("""
+[tool.django-js-vendor]
+destination = "static/vendor"
+    """)
+    respx_mock.head("https://unpkg.com/new-lib@2.0.0").mock(return_value=Response(200))
+    respx_mock.get("https://unpkg.com/new-lib@2.0.0").mock(
+        return_value=Response(200, content=b"console.log('new lib')")
+    )
+    spy = mocker.spy(manager, "make_client")
+
+    await manager.add("new-lib", "2.0.0")
+
+    # HEAD 检查与安装共享同一个客户端
+    assert spy.call_count == 1
+    assert manager._client is None
+
+
+def test_make_client_http2_fallback(manager, mocker):
+    manager.config.http.http2 = True
+    mocker.patch.dict("sys.modules", {"h2": None})
+
+    client = manager.make_client()
+
+    assert client._transport._pool._http2 is False
+
+
+class BrokenStream(httpx.AsyncByteStream):
+    """只发送部分内容后连接中断"""
+
+    def __init__(self, data: bytes):
+        self.data = data
+
+    async def __aiter__(self):
+        yield self.data
+        raise httpx.ReadError("connection reset")
+
+
+RESUME_PYPROJECT = """
+[tool.django-js-vendor.retry]
+attempts = {attempts}
+
+[tool.django-js-vendor.dependencies]
+big = {{ version = "1.0.0", files = ["big.wasm"] }}
+"""
+RESUME_URL = "https://unpkg.com/big@1.0.0/big.wasm"
+BODY = bytes(range(256)) * 1024
+
+
+def partial_response(offset: int) -> Response:
+    return Response(
+        200,
+        headers={"Accept-Ranges": "bytes", "ETag": '"v1"'},
+        stream=BrokenStream(BODY[:offset]),
+    )
+
+
+def range_response(request, offset: int) -> Response:
+    assert request.headers["Range"] == f"bytes={offset}-"
+    assert request.headers["If-Range"] == '"v1"'
+    return Response(
+        206,
+        headers={
+            "Accept-Ranges": "bytes",
+            "ETag": '"v1"',
+            "Content-Range": f"bytes {offset}-{len(BODY) - 1}/{len(BODY)}",
+        },
+        content=BODY[offset:],
+    )
+
+
+@pytest.mark.asyncio
+async def test_retry_resumes_with_range(manager, mock_pyproject, respx_mock, mocker):
+    mocker.patch("django_js_vendor.core.asyncio.sleep")
+    mock_pyproject(RESUME_PYPROJECT.format(attempts=3))
+    manager.config = VendorConfig.from_toml(manager.config_path)
+    route = respx_mock.get(RESUME_URL).mock(
+        side_effect=[
+            partial_response(CHUNK_SIZE),
+            lambda request: range_response(request, CHUNK_SIZE),
+        ]
+    )
+
+    await manager.sync()
+
+    assert route.call_count == 2
+    dest = manager.project_root / "static/vendor/big"
+    assert (dest / "big.wasm").read_bytes() == BODY
+    assert sorted(p.name for p in dest.iterdir()) == ["big.wasm"]
+    lock = manager.load_lockfile()
+    expected = hashlib.sha256(BODY).hexdigest()
+    assert lock["big"]["files"][0]["integrity"] == f"sha256-{expected}"
+
+
+@pytest.mark.asyncio
+async def test_next_sync_resumes_partial_file(manager, mock_pyproject, respx_mock):
+    mock_pyproject(RESUME_PYPROJECT.format(attempts=1))
+    manager.config = VendorConfig.from_toml(manager.config_path)
+    respx_mock.get(RESUME_URL).mock(return_value=partial_response(2 * CHUNK_SIZE))
+
+    with pytest.raises(httpx.ReadError):
+        await manager.sync()
+
+    # 未完成的文件保留在包的 staging 目录中
+    part = manager.project_root / "static/vendor/.big.staging/big.wasm.part"
+    assert part.read_bytes() == BODY[: 2 * CHUNK_SIZE]
+
+    respx_mock.get(RESUME_URL).mock(
+        side_effect=lambda request: range_response(request, 2 * CHUNK_SIZE)
+    )
+    await manager.sync()
+    dest = manager.project_root / "static/vendor/big"
+    assert (dest / "big.wasm").read_bytes() == BODY
+    assert not part.parent.exists()
+
+
+@pytest.mark.asyncio
+async def test_resume_restarts_when_server_sends_full_body(
+    manager, mock_pyproject, respx_mock
+):
+    mock_pyproject(RESUME_PYPROJECT.format(attempts=1))
+    manager.config = VendorConfig.from_toml(manager.config_path)
+    respx_mock.get(RESUME_URL).mock(return_value=partial_response(2 * CHUNK_SIZE))
+    with pytest.raises(httpx.ReadError):
+        await manager.sync()
+
+    # 内容已变化，服务器忽略 If-Range 返回完整内容
+    route = respx_mock.get(RESUME_URL).mock(
+        return_value=Response(200, content=BODY[::-1])
+    )
+    await manager.sync()
+
+    assert "Range" in route.calls.last.request.headers
+    dest = manager.project_root / "static/vendor/big/big.wasm"
+    assert dest.read_bytes() == BODY[::-1]
+
+
+@pytest.mark.asyncio
+async def test_resume_restarts_on_mismatched_content_range(
+    manager, mock_pyproject, respx_mock
+):
+    mock_pyproject(RESUME_PYPROJECT.format(attempts=1))
+    manager.config = VendorConfig.from_toml(manager.config_path)
+    respx_mock.get(RESUME_URL).mock(return_value=partial_response(2 * CHUNK_SIZE))
+    with pytest.raises(httpx.ReadError):
+        await manager.sync()
+
+    # 服务器返回的范围不是请求的起始位置：不追加到 .part，重新完整下载
+    route = respx_mock.get(RESUME_URL).mock(
+        side_effect=[
+            Response(
+                206,
+                headers={
+                    "Content-Range": f"bytes {CHUNK_SIZE}-{len(BODY) - 1}/{len(BODY)}"
+                },
+                content=BODY[CHUNK_SIZE:],
+            ),
+            Response(200, content=BODY),
+        ]
+    )
+    await manager.sync()
+
+    # 第一次同步中断的请求也计入同一个 route
+    assert route.call_count == 3
+    first, second = (call.request.headers for call in route.calls[1:])
+    assert first["Range"] == f"bytes={2 * CHUNK_SIZE}-"
+    assert "Range" not in second
+    dest = manager.project_root / "static/vendor/big/big.wasm"
+    assert dest.read_bytes() == BODY
@@ -0,0 +1,286 @@
+import asyncio
+import hashlib
+import json
+
+import pytest
+from httpx import Response
+
+from django_js_vendor.config import DependencyConfig
+from django_js_vendor.core import VendorError, VendorManager
+from django_js_vendor.providers import (
+    CdnjsProvider,
+    DirectoryProvider,
+    JsDelivrProvider,
+    NpmProvider,
+    ProviderError,
+    TemplateProvider,
+    UnpkgProvider,
+    get_provider,
+)
+
+
+def test_get_provider(tmp_path):
+    assert isinstance(get_provider("unpkg"), UnpkgProvider)
+    assert get_provider("npm", registry="https://r.test/").registry == "https://r.test"
+
+    mirror = get_provider("https://mirror.internal/unpkg/")
+    assert type(mirror) is UnpkgProvider
+    assert mirror.base_url == "https://mirror.internal/unpkg"
+
+    local = get_provider(tmp_path.as_uri())
+    assert isinstance(local, DirectoryProvider)
+    assert local.root == tmp_path.resolve()
+
+    relative = get_provider("./mirror", project_root=tmp_path)
+    assert relative.root == (tmp_path / "mirror").resolve()
+
+    alias = get_provider("internal", aliases={"internal": "npm"})
+    assert isinstance(alias, NpmProvider)
+
+    with pytest.raises(ProviderError):
+        get_provider("nope")
+
+
+def test_unpkg_layout_resolution():
+    dep = DependencyConfig(name="lib", version="1.0.0", files=["dist/a.js"])
+    mirror = get_provider("https://mirror.internal/unpkg")
+    assert mirror.resolve(dep) == [
+        ("https://mirror.internal/unpkg/lib@1.0.0/dist/a.js", "dist/a.js")
+    ]
+
+
+def test_cdn_provider_resolution():
+    dep = DependencyConfig(name="lib", version="1.0.0", files=["dist/a.js"])
+    assert isinstance(get_provider("jsdelivr"), JsDelivrProvider)
+    assert get_provider("jsdelivr").resolve(dep) == [
+        ("https://cdn.jsdelivr.net/npm/lib@1.0.0/dist/a.js", "dist/a.js")
+    ]
+    assert isinstance(get_provider("cdnjs"), CdnjsProvider)
+    assert get_provider("cdnjs").resolve(dep) == [
+        ("https://cdnjs.cloudflare.com/ajax/libs/lib/1.0.0/dist/a.js", "dist/a.js")
+    ]
+
+    template = get_provider("https://cdn.test/{name}/v{version}/{file}")
+    assert isinstance(template, TemplateProvider)
+    assert template.resolve(dep) == [
+        ("https://cdn.test/lib/v1.0.0/dist/a.js", "dist/a.js")
+    ]
+
+    # 无法推导主文件的 provider 不提供任何文件
+    assert (
+        get_provider("cdnjs").resolve(DependencyConfig(name="lib", version="1")) == []
+    )
+
+
+def fallback_pyproject(extra: str = "") -> str:
+    return f"""
+[tool.django-js-vendor]
+default_provider = ["unpkg", "jsdelivr"]
+{extra}
+
+[tool.django-js-vendor.dependencies]
+lib = {{ version = "1.0.0", files = ["dist/lib.js"] }}
+    """
+
+
+@pytest.mark.asyncio
+async def test_sync_falls_back_to_next_provider(
+    mock_project_root, mock_pyproject, respx_mock, mocker
+):
+    mocker.patch("django_js_vendor.core.asyncio.sleep")
+    mock_pyproject(fallback_pyproject())
+    primary = respx_mock.get("https://unpkg.com/lib@1.0.0/dist/lib.js").mock(
+        return_value=Response(503)
+    )
+    mirror = respx_mock.get("https://cdn.jsdelivr.net/npm/lib@1.0.0/dist/lib.js").mock(
+        return_value=Response(200, content=b"lib", headers={"ETag": '"m"'})
+    )
+    manager = VendorManager(project_root=mock_project_root)
+
+    await manager.sync()
+
+    assert primary.call_count == 3
+    assert mirror.call_count == 1
+    assert (mock_project_root / "static/vendor/lib/dist/lib.js").read_bytes() == b"lib"
+    entry = json.loads((mock_project_root / "js-vendor.lock").read_text())["lib"][
+        "files"
+    ][0]
+    # lock 中始终记录主 URL，备用服务器的 etag 不会写入
+    assert entry["url"] == "https://unpkg.com/lib@1.0.0/dist/lib.js"
+    assert entry["source"] == "https://cdn.jsdelivr.net/npm/lib@1.0.0/dist/lib.js"
+    assert "etag" not in entry
+
+
+@pytest.mark.asyncio
+async def test_fallback_rejects_mismatched_content(
+    mock_project_root, mock_pyproject, respx_mock
+):
+    mock_pyproject(fallback_pyproject())
+    good = hashlib.sha256(b"lib").hexdigest()
+    (mock_project_root / "js-vendor.lock").write_text(
+        json.dumps(
+            {
+                "lib": {
+                    "files": [
+                        {
+                            "url": "https://unpkg.com/lib@1.0.0/dist/lib.js",
+                            "path": "static/vendor/lib/dist/lib.js",
+                            "integrity": f"sha256-{good}",
+                        }
+                    ]
+                }
+            }
+        )
+    )
+    respx_mock.get("https://unpkg.com/lib@1.0.0/dist/lib.js").mock(
+        return_value=Response(200, content=b"tampered")
+    )
+    respx_mock.get("https://cdn.jsdelivr.net/npm/lib@1.0.0/dist/lib.js").mock(
+        return_value=Response(200, content=b"lib")
+    )
+    manager = VendorManager(project_root=mock_project_root)
+
+    await manager.sync()
+
+    assert (mock_project_root / "static/vendor/lib/dist/lib.js").read_bytes() == b"lib"
+
+    respx_mock.get("https://cdn.jsdelivr.net/npm/lib@1.0.0/dist/lib.js").mock(
+        return_value=Response(200, content=b"also tampered")
+    )
+    (mock_project_root / "static/vendor/lib/dist/lib.js").unlink()
+    with pytest.raises(VendorError, match="Integrity check failed"):
+        await manager.sync()
+    assert not list((mock_project_root / "static/vendor/lib/dist").iterdir())
+
+
+@pytest.mark.asyncio
+async def test_race_keeps_fastest_provider(
+    mock_project_root, mock_pyproject, respx_mock
+):
+    mock_pyproject(fallback_pyproject("race_providers = 2"))
+
+    async def slow(request):
+        await asyncio.sleep(5)
+        return Response(200, content=b"lib")
+
+    respx_mock.get("https://unpkg.com/lib@1.0.0/dist/lib.js").mock(side_effect=slow)
+    respx_mock.get("https://cdn.jsdelivr.net/npm/lib@1.0.0/dist/lib.js").mock(
+        return_value=Response(200, content=b"lib")
+    )
+    manager = VendorManager(project_root=mock_project_root)
+
+    await asyncio.wait_for(manager.sync(), timeout=2)
+
+    dest = mock_project_root / "static/vendor/lib/dist"
+    assert [p.name for p in dest.iterdir()] == ["lib.js"]
+    assert (dest / "lib.js").read_bytes() == b"lib"
+
+
+@pytest.mark.asyncio
+async def test_sync_from_directory_mirror(
+    mock_project_root, mock_pyproject, respx_mock, mocker
+):
+    mirror = mock_project_root / "mirror"
+    (mirror / "lib@1.0.0/dist").mkdir(parents=True)
+    (mirror / "lib@1.0.0/dist/lib.js").write_bytes(b"lib")
+    (mirror / "other@2.0.0").mkdir(parents=True)
+    (mirror / "other@2.0.0/package.json").write_text('{"main": "other.min.js"}')
+    (mirror / "other@2.0.0/other.min.js").write_bytes(b"other")
+    mock_pyproject("""
+[tool.django-js-vendor]
+default_provider = "./mirror"
+
+[tool.django-js-vendor.dependencies]
+lib = { version = "1.0.0", files = ["dist/lib.js"] }
+other = "2.0.0"
+    """)
+    manager = VendorManager(project_root=mock_project_root)
+    spy = mocker.spy(manager, "make_client")
+
+    await manager.sync()
+
+    # 本地镜像不需要 HTTP 客户端
+    assert spy.call_count == 0
+    dest = mock_project_root / "static/vendor"
+    assert (dest / "lib/dist/lib.js").read_bytes() == b"lib"
+    assert (dest / "other/other.min.js").read_bytes() == b"other"
+
+
+@pytest.mark.asyncio
+async def test_sync_from_named_http_mirror(
+    mock_project_root, mock_pyproject, respx_mock
+):
+    mock_pyproject("""
+[tool.django-js-vendor.providers]
+internal = "https://mirror.internal/unpkg"
+
+[tool.django-js-vendor.dependencies]
+lib = { version = "1.0.0", files = ["dist/lib.js"], provider = "internal" }
+    """)
+    route = respx_mock.get("https://mirror.internal/unpkg/lib@1.0.0/dist/lib.js").mock(
+        return_value=Response(200, content=b"lib")
+    )
+    manager = VendorManager(project_root=mock_project_root)
+
+    await manager.sync()
+
+    assert route.call_count == 1
+    dest = mock_project_root / "static/vendor/lib/dist/lib.js"
+    assert dest.read_bytes() == b"lib"
+
+
+@pytest.mark.asyncio
+async def test_sync_skips_provider_that_resolves_nothing(
+    mock_project_root, mock_pyproject, respx_mock
+):
+    def pyproject(providers: str) -> str:
+        return f"""
+[tool.django-js-vendor]
+default_provider = {providers}
+
+[tool.django-js-vendor.dependencies]
+foo = {{ files = ["foo.js"] }}
+    """
+
+    respx_mock.get("https://unpkg.com/foo/foo.js").mock(
+        return_value=Response(200, content=b"foo")
+    )
+    dest = mock_project_root / "static/vendor/foo/foo.js"
+    mock_pyproject(pyproject('["unpkg", "cdnjs"]'))
+    await VendorManager(project_root=mock_project_root).sync()
+    assert dest.read_bytes() == b"foo"
+
+    # 没有版本时 cdnjs 无法解析，由下一个 provider 接替
+    mock_pyproject(pyproject('["cdnjs", "unpkg"]'))
+    await VendorManager(project_root=mock_project_root).sync()
+    assert dest.read_bytes() == b"foo"
+    lock = json.loads((mock_project_root / "js-vendor.lock").read_text())
+    assert [f["path"] for f in lock["foo"]["files"]] == ["static/vendor/foo/foo.js"]
+
+    # 所有 provider 都无法解析时报错，保留已有的文件与 lock 记录
+    mock_pyproject(pyproject('["cdnjs"]'))
+    with pytest.raises(VendorError, match="No provider can resolve files for foo"):
+        await VendorManager(project_root=mock_project_root).sync()
+    assert dest.read_bytes() == b"foo"
+    assert json.loads((mock_project_root / "js-vendor.lock").read_text()) == lock
+
+
+@pytest.mark.asyncio
+async def test_sync_explicit_url_with_npm_provider(
+    mock_project_root, mock_pyproject, respx_mock
+):
+    mock_pyproject("""
+[tool.django-js-vendor]
+default_provider = "npm"
+
+[tool.django-js-vendor.dependencies]
+foo = { url = "https://cdn.test/foo.js" }
+    """)
+    respx_mock.get("https://cdn.test/foo.js").mock(
+        return_value=Response(200, content=b"foo")
+    )
+
+    await VendorManager(project_root=mock_project_root).sync()
+
+    dest = mock_project_root / "static/vendor/foo/foo.js"
+    assert dest.read_bytes() == b"foo"
@@ -0,0 +1,124 @@
+import httpx
+import pytest
+from httpx import Response
+
+from django_js_vendor.config import RetryConfig, VendorConfig
+from django_js_vendor.core import VendorError, VendorManager
+from django_js_vendor.retry import RetryPolicy, parse_retry_after
+
+URL = "https://unpkg.com/lib@1.0.0/dist/lib.js"
+
+PYPROJECT = """
+[tool.django-js-vendor]
+{extra}
+
+[tool.django-js-vendor.dependencies]
+lib = {{ version = "1.0.0", files = ["dist/lib.js"] }}
+"""
+
+
+def status_error(status: int, headers: dict | None = None) -> httpx.HTTPStatusError:
+    request = httpx.Request("GET", URL)
+    response = Response(status, headers=headers, request=request)
+    return httpx.HTTPStatusError("error", request=request, response=response)
+
+
+def test_retry_config(mock_pyproject, mock_project_root):
+    mock_pyproject("""
+[tool.django-js-vendor.retry]
+attempts = 5
+backoff = 0.1
+jitter = false
+deadline = 120
+    """)
+    config = VendorConfig.from_toml(mock_project_root / "pyproject.toml")
+    assert config.retry == RetryConfig(
+        attempts=5, backoff=0.1, jitter=False, deadline=120
+    )
+
+
+def test_classification_and_backoff():
+    policy = RetryPolicy(RetryConfig(backoff=1, max_backoff=3, jitter=False))
+
+    assert policy.is_retryable(status_error(503))
+    assert policy.is_retryable(status_error(429))
+    assert policy.is_retryable(status_error(408))
+    assert not policy.is_retryable(status_error(404))
+    assert policy.is_retryable(httpx.ConnectError("boom"))
+
+    assert [policy.delay(n) for n in (1, 2, 3)] == [1, 2, 3]
+    assert policy.delay(1, status_error(429, {"Retry-After": "2"})) == 2
+    # Retry-After 同样不超过 max_backoff
+    assert policy.delay(1, status_error(429, {"Retry-After": "3600"})) == 3
+
+    jittered = RetryPolicy(RetryConfig(backoff=1, jitter=True))
+    assert all(0 <= jittered.delay(3) <= 4 for _ in range(20))
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("12") == 12
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(None) is None
+
+
+@pytest.mark.asyncio
+async def test_client_errors_fail_fast(
+    mock_project_root, mock_pyproject, respx_mock, mocker
+):
+    sleep = mocker.patch("django_js_vendor.core.asyncio.sleep")
+    mock_pyproject(PYPROJECT.format(extra=""))
+    route = respx_mock.get(URL).mock(return_value=Response(404))
+    manager = VendorManager(project_root=mock_project_root)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        await manager.sync()
+
+    assert route.call_count == 1
+    sleep.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_retry_after_is_honoured(
+    mock_project_root, mock_pyproject, respx_mock, mocker, capsys
+):
+    sleep = mocker.patch("django_js_vendor.core.asyncio.sleep")
+    mock_pyproject(PYPROJECT.format(extra=""))
+    route = respx_mock.get(URL).mock(
+        side_effect=[
+            Response(429, headers={"Retry-After": "7"}),
+            Response(200, content=b"lib"),
+        ]
+    )
+    manager = VendorManager(project_root=mock_project_root)
+
+    await manager.sync()
+
+    assert route.call_count == 2
+    sleep.assert_awaited_once_with(7.0)
+    assert "Retried 1 requests" in capsys.readouterr().out
+
+
+@pytest.mark.asyncio
+async def test_deadline_stops_retries(
+    mock_project_root, mock_pyproject, respx_mock, mocker
+):
+    sleep = mocker.patch("django_js_vendor.core.asyncio.sleep")
+    mock_pyproject(
+        PYPROJECT.format(extra="[tool.django-js-vendor.retry]\ndeadline = 5")
+    )
+    route = respx_mock.get(URL).mock(
+        return_value=Response(503, headers={"Retry-After": "60"})
+    )
+    manager = VendorManager(project_root=mock_project_root)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        await manager.sync()
+
+    # Retry-After 超过剩余时间，不再等待
+    assert route.call_count == 1
+    sleep.assert_not_called()
+
+    manager.config.retry.deadline = 0
+    with pytest.raises(VendorError, match="deadline"):
+        await manager.sync()
@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+
+from django_js_vendor.scheduler import DownloadScheduler
+
+
+class _StatusError(Exception):
+    def __init__(self, status_code):
+        self.response = type("Resp", (), {"status_code": status_code})()
+
+
+async def _track(scheduler, url, state):
+    async with scheduler.slot(url):
+        state["active"] += 1
+        state["peak"] = max(state["peak"], state["active"])
+        await asyncio.sleep(0.01)
+        state["active"] -= 1
+
+
+@pytest.mark.asyncio
+async def test_global_limit():
+    """全局并发数不超过 limit"""
+    scheduler = DownloadScheduler(limit=3, per_host=10)
+    state = {"active": 0, "peak": 0}
+    urls = [f"https://host{i}.example/file.js" for i in range(12)]
+    await asyncio.gather(*(_track(scheduler, url, state) for url in urls))
+    assert state["peak"] == 3
+
+
+@pytest.mark.asyncio
+async def test_per_host_limit():
+    """同一主机的并发数不超过 per_host"""
+    scheduler = DownloadScheduler(limit=10, per_host=2)
+    state = {"active": 0, "peak": 0}
+    urls = [f"https://unpkg.com/lib/{i}.js" for i in range(8)]
+    await asyncio.gather(*(_track(scheduler, url, state) for url in urls))
+    assert state["peak"] == 2
+
+
+@pytest.mark.asyncio
+async def test_adaptive_backs_off_on_throttling():
+    """自适应模式下遇到 429 时并发减半，失败的请求仍释放槽位"""
+    scheduler = DownloadScheduler(limit=16, adaptive=True)
+    assert scheduler.limit == 8
+
+    with pytest.raises(_StatusError):
+        async with scheduler.slot("https://unpkg.com/a.js"):
+            raise _StatusError(429)
+
+    assert scheduler.limit == 4
+    assert scheduler._active == 0
+
+
+def test_adaptive_grows_on_success():
+    """自适应模式下连续成功一轮后并发加一，且不超过上限"""
+    scheduler = DownloadScheduler(limit=4, adaptive=True)
+    assert scheduler.limit == 2
+    for _ in range(10):
+        scheduler.record(0.1, 200)
+    assert scheduler.limit == 4
+
+
+def test_adaptive_ignores_client_errors():
+    """4xx (429 除外) 不影响并发数"""
+    scheduler = DownloadScheduler(limit=8, adaptive=True)
+    scheduler.record(0.1, 404)
+    assert scheduler.limit == 4
@@ -0,0 +1,92 @@
+import json
+
+import pytest
+from httpx import Response
+
+from django_js_vendor import staging
+from django_js_vendor.core import VendorManager
+from django_js_vendor.lockfile import write_lockfile
+
+PYPROJECT = """
+[tool.django-js-vendor.dependencies]
+a = {{ version = "{version}", files = ["{a_file}"] }}
+b = {{ version = "{version}", files = ["b.js"] }}
+"""
+
+
+@pytest.mark.asyncio
+async def test_failed_package_keeps_previous_files(
+    mock_project_root, mock_pyproject, respx_mock
+):
+    mock_pyproject(PYPROJECT.format(version="1.0.0", a_file="a.js"))
+    respx_mock.get("https://unpkg.com/a@1.0.0/a.js").mock(
+        return_value=Response(200, content=b"a1")
+    )
+    respx_mock.get("https://unpkg.com/b@1.0.0/b.js").mock(
+        return_value=Response(200, content=b"b1")
+    )
+    manager = VendorManager(project_root=mock_project_root)
+    await manager.sync()
+    old_lock = manager.load_lockfile()
+
+    mock_pyproject(PYPROJECT.format(version="2.0.0", a_file="dist/a.min.js"))
+    respx_mock.get("https://unpkg.com/a@2.0.0/dist/a.min.js").mock(
+        return_value=Response(200, content=b"a2")
+    )
+    respx_mock.get("https://unpkg.com/b@2.0.0/b.js").mock(return_value=Response(404))
+    manager = VendorManager(project_root=mock_project_root)
+    with pytest.raises(Exception):
+        await manager.sync()
+
+    vendor = mock_project_root / "static/vendor"
+    lock = manager.load_lockfile()
+    # 成功的包整体替换，旧文件不会残留
+    assert sorted(p.relative_to(vendor).as_posix() for p in vendor.rglob("*.js")) == [
+        "a/dist/a.min.js",
+        "b/b.js",
+    ]
+    assert lock["a"]["files"][0]["path"] == "static/vendor/a/dist/a.min.js"
+    # 失败的包保留原来的文件与 lock 记录
+    assert (vendor / "b/b.js").read_bytes() == b"b1"
+    assert lock["b"] == old_lock["b"]
+    assert not (vendor / ".a.staging").exists()
+
+
+def test_recover_interrupted_swap(tmp_path):
+    live = tmp_path / "lib"
+    old = staging.backup_dir(live)
+    old.mkdir()
+    (old / "lib.js").write_text("old")
+
+    # 旧目录已移走、新目录尚未就位
+    staging.recover(live)
+    assert (live / "lib.js").read_text() == "old"
+    assert not old.exists()
+
+
+def test_prepare_links_existing_files_and_keeps_partials(tmp_path):
+    live = tmp_path / "lib"
+    (live / "dist").mkdir(parents=True)
+    (live / "dist/lib.js").write_text("lib")
+    stage = staging.staging_dir(live)
+    stage.mkdir()
+    (stage / "stale.js").write_text("stale")
+    (stage / "big.wasm.part").write_text("partial")
+
+    assert staging.prepare(live) == stage
+
+    assert (stage / "dist/lib.js").stat().st_ino == (live / "dist/lib.js").stat().st_ino
+    assert (stage / "big.wasm.part").exists()
+    assert not (stage / "stale.js").exists()
+
+
+def test_write_lockfile_is_atomic(tmp_path, mocker):
+    path = tmp_path / "js-vendor.lock"
+    write_lockfile(path, {"lib": {"files": []}})
+
+    mocker.patch("django_js_vendor.lockfile.json.dump", side_effect=KeyboardInterrupt)
+    with pytest.raises(KeyboardInterrupt):
+        write_lockfile(path, {"other": {}})
+
+    assert json.loads(path.read_text()) == {"lib": {"files": []}}
+    assert [p.name for p in tmp_path.iterdir()] == ["js-vendor.lock"]
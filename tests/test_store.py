@@ -0,0 +1,107 @@
+import pytest
+from httpx import Response
+
+from django_js_vendor.core import VendorManager
+from django_js_vendor.store import ContentStore
+from django_js_vendor.utils import calculate_content_sha256
+
+
+def _integrity(content: bytes) -> str:
+    return f"sha256-{calculate_content_sha256(content)}"
+
+
+def test_import_and_materialize(tmp_path):
+    """加入存储后可以硬链接到其他项目"""
+    store = ContentStore(tmp_path / "store")
+    src = tmp_path / "a" / "lib.js"
+    src.parent.mkdir()
+    src.write_bytes(b"lib")
+    integrity = _integrity(b"lib")
+
+    store.import_file(src, integrity)
+    assert store.has(integrity)
+
+    dest = tmp_path / "b" / "lib.js"
+    assert store.materialize(integrity, dest) == "hardlink"
+    assert dest.read_bytes() == b"lib"
+    assert dest.stat().st_ino == src.stat().st_ino
+
+
+def test_materialize_missing(tmp_path):
+    """存储中没有内容时返回 None"""
+    store = ContentStore(tmp_path / "store")
+    assert store.materialize("sha256-" + "0" * 64, tmp_path / "x.js") is None
+
+
+def test_prune_removes_unreferenced(tmp_path):
+    """prune 只删除没有被项目引用的内容"""
+    store = ContentStore(tmp_path / "store")
+    kept = tmp_path / "kept.js"
+    kept.write_bytes(b"kept")
+    dropped = tmp_path / "dropped.js"
+    dropped.write_bytes(b"dropped")
+    store.import_file(kept, _integrity(b"kept"))
+    store.import_file(dropped, _integrity(b"dropped"))
+    dropped.unlink()
+
+    assert store.prune() == (1, len(b"dropped"))
+    assert store.has(_integrity(b"kept"))
+    assert not store.has(_integrity(b"dropped"))
+
+
+@pytest.mark.asyncio
+async def test_sync_uses_store(tmp_path, monkeypatch, respx_mock):
+    """第二个项目同步时从存储链接文件，不访问网络"""
+    monkeypatch.setenv("DJANGO_JS_VENDOR_STORE", str(tmp_path / "store"))
+    content = """
+[tool.django-js-vendor.dependencies]
+lib = { version = "1.0.0", files = ["dist/lib.js"] }
+    """
+    route = respx_mock.get("https://unpkg.com/lib@1.0.0/dist/lib.js").mock(
+        return_value=Response(200, content=b"console.log('lib')")
+    )
+
+    first = tmp_path / "first"
+    first.mkdir()
+    (first / "pyproject.toml").write_text(content, encoding="utf-8")
+    await VendorManager(project_root=first).sync()
+    assert route.call_count == 1
+
+    second = tmp_path / "second"
+    second.mkdir()
+    (second / "pyproject.toml").write_text(content, encoding="utf-8")
+    (second / "js-vendor.lock").write_bytes((first / "js-vendor.lock").read_bytes())
+    await VendorManager(project_root=second).sync()
+
+    assert route.call_count == 1
+    dest = second / "static/vendor/lib/dist/lib.js"
+    assert dest.read_bytes() == b"console.log('lib')"
+
+
+@pytest.mark.asyncio
+async def test_sync_uses_store_url_index(tmp_path, monkeypatch, respx_mock):
+    """没有 lock 文件的项目通过精确版本 URL 索引命中存储"""
+    monkeypatch.setenv("DJANGO_JS_VENDOR_STORE", str(tmp_path / "store"))
+    content = """
+[tool.django-js-vendor.dependencies]
+test-lib = "1.0.0"
+    """
+    respx_mock.get("https://unpkg.com/test-lib@1.0.0").mock(
+        return_value=Response(
+            302,
+            headers={"Location": "https://unpkg.com/test-lib@1.0.0/dist/test-lib.js"},
+        )
+    )
+    route = respx_mock.get("https://unpkg.com/test-lib@1.0.0/dist/test-lib.js").mock(
+        return_value=Response(200, content=b"lib")
+    )
+
+    for project in ("first", "second"):
+        root = tmp_path / project
+        root.mkdir()
+        (root / "pyproject.toml").write_text(content, encoding="utf-8")
+        await VendorManager(project_root=root).sync()
+
+    assert route.call_count == 1
+    dest = tmp_path / "second/static/vendor/test-lib/test-lib.js"
+    assert dest.read_bytes() == b"lib"
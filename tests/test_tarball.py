@@ -0,0 +1,149 @@
+import base64
+
+import pytest
+
+from django_js_vendor.core import VendorError, VendorManager
+from django_js_vendor.tarball import (
+    extract_files,
+    is_safe_path,
+    metadata_url,
+    parse_sri,
+)
+
+
+@pytest.fixture
+def manager(mock_project_root, mock_pyproject, npm_registry):
+    def _create(deps: str):
+        mock_pyproject(f"""
+[tool.django-js-vendor]
+registry = "{npm_registry.url}"
+
+[tool.django-js-vendor.dependencies]
+{deps}
+        """)
+        return VendorManager(project_root=mock_project_root)
+
+    return _create
+
+
+def test_metadata_url():
+    registry = "https://registry.test"
+    assert metadata_url(registry, "lib", "1.0.0") == f"{registry}/lib/1.0.0"
+    assert (
+        metadata_url(registry, "@scope/lib", None) == f"{registry}/@scope%2Flib/latest"
+    )
+
+
+def test_parse_sri_prefers_strongest():
+    sha256 = base64.b64encode(b"\x01" * 32).decode()
+    sha512 = base64.b64encode(b"\x02" * 64).decode()
+    assert parse_sri(f"sha256-{sha256} sha512-{sha512}") == ("sha512", "02" * 64)
+
+
+@pytest.mark.asyncio
+async def test_sync_npm_tarball(manager, npm_registry, make_tarball):
+    vm = manager(
+        'lib = { version = "1.0.0", provider = "npm", '
+        'files = ["dist/a.js", "dist/b.css"] }'
+    )
+    tarball = make_tarball(
+        {
+            "package.json": b"{}",
+            "dist/a.js": b"console.log('a')",
+            "dist/b.css": b"body{}",
+            "dist/unused.js": b"unused",
+        }
+    )
+    route = npm_registry.publish("lib", "1.0.0", tarball)
+
+    await vm.sync()
+
+    assert route.call_count == 1
+    dest_dir = vm.project_root / "static/vendor/lib"
+    assert (dest_dir / "dist/a.js").read_bytes() == b"console.log('a')"
+    assert (dest_dir / "dist/b.css").read_bytes() == b"body{}"
+    assert not (dest_dir / "dist/unused.js").exists()
+    assert not list(dest_dir.rglob("*.part"))
+
+    files = vm.load_lockfile()["lib"]["files"]
+    assert {f["path"] for f in files} == {
+        "static/vendor/lib/dist/a.js",
+        "static/vendor/lib/dist/b.css",
+    }
+
+    # 第二次同步不访问网络
+    await vm.sync()
+    assert route.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_sync_npm_default_entry(manager, npm_registry, make_tarball):
+    vm = manager('lib = { version = "1.0.0", provider = "npm" }')
+    tarball = make_tarball({"lib.min.js": b"lib"})
+    npm_registry.publish("lib", "1.0.0", tarball, unpkg="./lib.min.js")
+
+    await vm.sync()
+
+    assert (vm.project_root / "static/vendor/lib/lib.min.js").read_bytes() == b"lib"
+
+
+@pytest.mark.asyncio
+async def test_sync_npm_tarball_integrity_failure(manager, npm_registry, make_tarball):
+    vm = manager('lib = { version = "1.0.0", provider = "npm", files = ["a.js"] }')
+    tarball = make_tarball({"a.js": b"a"})
+    bad = "sha512-" + base64.b64encode(b"\x00" * 64).decode()
+    npm_registry.publish("lib", "1.0.0", tarball, integrity=bad)
+
+    with pytest.raises(VendorError, match="Tarball integrity check failed"):
+        await vm.sync()
+
+    assert not (vm.project_root / "static/vendor/lib/a.js").exists()
+
+
+@pytest.mark.asyncio
+async def test_sync_npm_missing_file(manager, npm_registry, make_tarball):
+    vm = manager('lib = { version = "1.0.0", provider = "npm", files = ["nope.js"] }')
+    npm_registry.publish("lib", "1.0.0", make_tarball({"a.js": b"a"}))
+
+    with pytest.raises(VendorError, match="nope.js"):
+        await vm.sync()
+
+
+def test_is_safe_path():
+    assert is_safe_path("dist/a.js")
+    assert is_safe_path("./dist/../a.js")
+    for path in ("", ".", "..", "../a.js", "a/../../b.js", "/etc/a.js", "C:/a.js"):
+        assert not is_safe_path(path)
+
+
+def test_extract_files_rejects_escaping_paths(tmp_path, make_tarball):
+    tarball = tmp_path / "lib.tgz"
+    tarball.write_bytes(make_tarball({"../pwned.js": b"x"}))
+    dest = tmp_path / "pkg"
+    dest.mkdir()
+
+    with pytest.raises(ValueError, match="Unsafe path"):
+        extract_files(tarball, dest, ["../pwned.js"])
+    # 指向包目录之外的符号链接
+    (dest / "link").symlink_to(tmp_path)
+    with pytest.raises(ValueError, match="Unsafe path"):
+        extract_files(tarball, dest, ["link/pwned.js"])
+    assert not list(tmp_path.glob("pwned.js*"))
+
+
+@pytest.mark.asyncio
+async def test_sync_npm_rejects_entry_outside_package(
+    manager, npm_registry, make_tarball
+):
+    vm = manager('lib = { version = "1.0.0", provider = "npm" }')
+    evil = "../../../../pwned.js"
+    tarball = make_tarball({evil: b"pwned", "lib.js": b"lib"})
+    npm_registry.publish("lib", "1.0.0", tarball, main=evil)
+
+    with pytest.raises(VendorError, match="Unsafe file paths for lib"):
+        await vm.sync()
+
+    root = vm.project_root
+    for parent in (root, *root.parents[:3]):
+        assert not list(parent.glob("pwned.js*"))
+    assert "lib" not in vm.load_lockfile()
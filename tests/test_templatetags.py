@@ -1,7 +1,14 @@
 import json
 from pathlib import Path
 
-from django_js_vendor.templatetags.vendor_tags import render_vendor_assets
+from django.test import override_settings
+
+from django_js_vendor.manifest import clear_manifest_cache, get_manifest
+from django_js_vendor.templatetags.vendor_tags import (
+    render_vendor_assets,
+    render_vendor_importmap,
+    render_vendor_preloads,
+)
 
 
 def test_render_vendor_assets_empty(mock_project_root):
@@ -141,3 +148,176 @@ dependencies = { foo = "1.0" }
     # not stripped
     # static url: /static/assets/vendor/foo/foo.js
     assert 'src="/static/assets/vendor/foo/foo.js"' in output
+
+
+def test_manifest_cached_until_lock_changes(mock_project_root, mock_pyproject):
+    """Test that the compiled manifest is reused until the lockfile changes."""
+
+    mock_pyproject("""
+[tool.django-js-vendor]
+dependencies = { foo = "1.0" }
+    """)
+    lock_path = mock_project_root / "js-vendor.lock"
+    lock_path.write_text(
+        json.dumps({"foo": {"files": [{"path": "static/vendor/foo/foo.js"}]}}),
+        encoding="utf-8",
+    )
+
+    manifest = get_manifest(mock_project_root)
+    assert get_manifest(mock_project_root) is manifest
+    assert "foo.js" in render_vendor_assets()
+
+    lock_path.write_text(
+        json.dumps({"foo": {"files": [{"path": "static/vendor/foo/foo.min.js"}]}}),
+        encoding="utf-8",
+    )
+
+    assert get_manifest(mock_project_root) is not manifest
+    assert "foo.min.js" in render_vendor_assets()
+
+
+def test_manifest_frozen_mode(mock_project_root, mock_pyproject):
+    """Test that frozen mode never rebuilds the manifest."""
+
+    mock_pyproject("""
+[tool.django-js-vendor]
+dependencies = { foo = "1.0" }
+    """)
+    lock_path = mock_project_root / "js-vendor.lock"
+    lock_path.write_text(
+        json.dumps({"foo": {"files": [{"path": "static/vendor/foo/foo.js"}]}}),
+        encoding="utf-8",
+    )
+
+    with override_settings(JS_VENDOR_FROZEN=True):
+        assert "foo.js" in render_vendor_assets()
+        lock_path.write_text(json.dumps({}), encoding="utf-8")
+        assert "foo.js" in render_vendor_assets()
+
+    assert render_vendor_assets() == ""
+
+
+def test_render_vendor_preloads_and_sri(mock_project_root, mock_pyproject):
+    """Test preload hints and integrity attributes from the lock file."""
+
+    mock_pyproject("""
+[tool.django-js-vendor]
+dependencies = { foo = "1.0" }
+    """)
+    lock_data = {
+        "foo": {
+            "files": [
+                {"path": "static/vendor/foo/foo.css", "sri": "sha384-abc"},
+                {"path": "static/vendor/foo/foo.js", "sri": "sha384-def"},
+                {"path": "static/vendor/foo/foo.mjs"},
+            ]
+        }
+    }
+    (mock_project_root / "js-vendor.lock").write_text(
+        json.dumps(lock_data), encoding="utf-8"
+    )
+
+    assert render_vendor_preloads("foo").split("\n") == [
+        '<link rel="preload" href="/static/vendor/foo/foo.css" as="style"'
+        ' integrity="sha384-abc" crossorigin="anonymous">',
+        '<link rel="preload" href="/static/vendor/foo/foo.js" as="script"'
+        ' integrity="sha384-def" crossorigin="anonymous">',
+        '<link rel="modulepreload" href="/static/vendor/foo/foo.mjs">',
+    ]
+    assert (
+        '<script src="/static/vendor/foo/foo.js" integrity="sha384-def"'
+        ' crossorigin="anonymous" defer></script>'
+    ) in render_vendor_assets()
+
+    with override_settings(JS_VENDOR_CROSSORIGIN="use-credentials"):
+        clear_manifest_cache()
+        assert 'crossorigin="use-credentials"' in render_vendor_assets()
+    clear_manifest_cache()
+
+
+def test_render_vendor_importmap(mock_project_root, mock_pyproject):
+    """Test the import map for ES module packages."""
+
+    mock_pyproject("""
+[tool.django-js-vendor]
+dependencies = { lit = "3.0", htmx = "1.0" }
+    """)
+    lock_data = {
+        "lit": {
+            "files": [
+                {"path": "static/vendor/lit/index.js", "specifiers": ["lit"]},
+            ]
+        },
+        "htmx": {"files": [{"path": "static/vendor/htmx/htmx.js"}]},
+    }
+    (mock_project_root / "js-vendor.lock").write_text(
+        json.dumps(lock_data), encoding="utf-8"
+    )
+
+    assert render_vendor_importmap() == (
+        '<script type="importmap">\n'
+        '{\n  "imports": {\n    "lit": "/static/vendor/lit/index.js"\n  }\n}\n'
+        "</script>"
+    )
+    assert render_vendor_importmap("htmx") == ""
+
+
+def test_render_vendor_assets_inline(mock_project_root, mock_pyproject):
+    """Test inlining small files, escaping and CSP nonces."""
+
+    mock_pyproject("""
+[tool.django-js-vendor]
+inline_threshold = 100
+
+[tool.django-js-vendor.dependencies]
+reset = "1.0"
+poly = "1.0"
+big = { version = "1.0", inline = true }
+skip = { version = "1.0", inline = false }
+    """)
+    files = {
+        "static/vendor/reset/reset.css": b"body { background: url(img/bg.png) }",
+        "static/vendor/poly/poly.js": (
+            b"var s = '</SCRIPT><!--';\n"
+            b"var re = /^<!--/u, ok = a<scriptCount;\n"
+            b"//# sourceMappingURL=poly.js.map\n"
+        ),
+        "static/vendor/big/big.js": b"var big = 1;" * 20,
+        "static/vendor/skip/skip.js": b"var skip = 1;",
+    }
+    lock_data = {}
+    for path, content in files.items():
+        (mock_project_root / path).parent.mkdir(parents=True, exist_ok=True)
+        (mock_project_root / path).write_bytes(content)
+        name = path.split("/")[2]
+        lock_data[name] = {
+            "files": [{"path": path, "size": len(content), "sri": "sha384-abc"}]
+        }
+    (mock_project_root / "js-vendor.lock").write_text(
+        json.dumps(lock_data), encoding="utf-8"
+    )
+
+    # 相对路径的 url() 改写为 static URL
+    reset = "body { background: url(/static/vendor/reset/img/bg.png) }"
+    assert render_vendor_assets().split("\n") == [
+        f"<style>{reset}</style>",
+        "<script>var s = '\\x3C/SCRIPT>\\x3C!--';",
+        # 在 u 模式的正则表达式中仍然有效，小于运算符保持不变
+        "var re = /^\\x3C!--/u, ok = a<scriptCount;",
+        "",
+        "</script>",
+        "<script>" + "var big = 1;" * 20 + "</script>",
+        '<script src="/static/vendor/skip/skip.js" integrity="sha384-abc"'
+        ' crossorigin="anonymous" defer></script>',
+    ]
+    assert render_vendor_assets("reset", "skip", nonce="n0nce").split("\n") == [
+        f'<style nonce="n0nce">{reset}</style>',
+        '<script src="/static/vendor/skip/skip.js" integrity="sha384-abc"'
+        ' crossorigin="anonymous" nonce="n0nce" defer></script>',
+    ]
+    # 内联的文件不需要预加载
+    assert "reset" not in render_vendor_preloads()
+
+    # 内容在构建清单时读取一次
+    (mock_project_root / "static/vendor/reset/reset.css").unlink()
+    assert render_vendor_assets("reset") == f"<style>{reset}</style>"
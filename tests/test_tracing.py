@@ -0,0 +1,112 @@
+import json
+from io import StringIO
+from unittest.mock import AsyncMock
+
+import pytest
+from django.core.management import call_command
+from httpx import Response
+
+from django_js_vendor.core import VendorManager
+from django_js_vendor.tracing import Tracer
+
+URL = "https://unpkg.com/lib@1.0.0/dist/lib.js"
+
+PYPROJECT = """
+[tool.django-js-vendor.dependencies]
+lib = { version = "1.0.0", files = ["dist/lib.js"] }
+"""
+
+
+@pytest.mark.asyncio
+async def test_sync_records_file_timeline(
+    mock_project_root, mock_pyproject, respx_mock, mocker
+):
+    mocker.patch("django_js_vendor.core.asyncio.sleep")
+    mock_pyproject(PYPROJECT)
+    respx_mock.get(URL).mock(
+        side_effect=[Response(503), Response(200, content=b"x" * 1000)]
+    )
+    manager = VendorManager(project_root=mock_project_root)
+    events = []
+    manager.tracer = Tracer(hooks=[events.append])
+
+    await manager.sync()
+
+    (trace,) = manager.tracer.files
+    assert (trace.package, trace.url) == ("lib", URL)
+    assert trace.bytes == 1000
+    assert trace.retries == 1
+    assert trace.error is None
+    names = [span.name for span in trace.spans]
+    assert names.count("queue") == 2
+    assert names.count("ttfb") == 2
+    assert "backoff" in names
+    assert names[-2:] == ["transfer", "write"]
+    assert {"hash", "write"} <= set(trace.durations)
+
+    # 钩子收到每个阶段，最后是整个文件
+    assert [e.name for e in events[:-1]] == names
+    assert events[-1].name == "file"
+    assert events[-1].attrs["bytes"] == 1000
+    assert events[-1].attrs["retries"] == 1
+
+
+@pytest.mark.asyncio
+async def test_chrome_trace_and_report(
+    mock_project_root, mock_pyproject, respx_mock, tmp_path
+):
+    mock_pyproject(PYPROJECT)
+    respx_mock.get(URL).mock(return_value=Response(200, content=b"lib"))
+    manager = VendorManager(project_root=mock_project_root)
+    manager.tracer = Tracer()
+
+    await manager.sync()
+
+    path = tmp_path / "trace.json"
+    manager.tracer.write_chrome_trace(path)
+    events = json.loads(path.read_text())["traceEvents"]
+    assert events[0]["ph"] == "M"
+    assert events[0]["args"]["name"] == f"lib: {URL}"
+    spans = [e for e in events if e["ph"] == "X"]
+    assert spans[0]["cat"] == "file"
+    assert all(e["dur"] >= 0 and e["ts"] >= 0 for e in spans)
+    assert {"queue", "ttfb", "transfer"} <= {e["name"] for e in spans}
+
+    summary = manager.tracer.summary()
+    assert summary["files"] == 1
+    assert summary["bytes"] == 3
+    assert summary["phases"]["transfer"]["files"] == 1
+    report = manager.tracer.format_report()
+    assert "transfer" in report
+    assert "Slowest files:" in report
+
+
+@pytest.mark.asyncio
+async def test_no_tracing_by_default(mock_project_root, mock_pyproject, respx_mock):
+    mock_pyproject(PYPROJECT)
+    route = respx_mock.get(URL).mock(return_value=Response(200, content=b"lib"))
+    manager = VendorManager(project_root=mock_project_root)
+
+    await manager.sync()
+
+    assert manager.tracer is None
+    assert "trace" not in route.calls.last.request.extensions
+
+
+def test_command_trace_and_report(mocker, tmp_path):
+    mock_manager_cls = mocker.patch(
+        "django_js_vendor.management.commands.vendor.VendorManager"
+    )
+    mock_instance = mock_manager_cls.return_value
+    mock_instance.sync = AsyncMock()
+    path = tmp_path / "trace.json"
+
+    out = StringIO()
+    call_command("vendor", "sync", "--trace", str(path), "--report", stdout=out)
+
+    assert isinstance(mock_instance.tracer, Tracer)
+    assert json.loads(path.read_text()) == {
+        "traceEvents": [],
+        "displayTimeUnit": "ms",
+    }
+    assert "Phase" in out.getvalue()
@@ -0,0 +1,49 @@
+import base64
+import hashlib
+
+from django_js_vendor import utils
+from django_js_vendor.utils import (
+    calculate_sha256,
+    calculate_sri,
+    is_immutable_url,
+    sri_from_integrity,
+)
+
+
+def test_is_immutable_url():
+    """路径中包含精确版本号的 URL 视为不可变"""
+    assert is_immutable_url("https://unpkg.com/htmx.org@1.9.10")
+    assert is_immutable_url("https://unpkg.com/htmx.org@1.9.10/dist/htmx.min.js")
+    assert is_immutable_url("https://unpkg.com/@scope/pkg@2.0.0-beta.1/index.js")
+    assert is_immutable_url(
+        "https://cdnjs.cloudflare.com/ajax/libs/htmx/1.9.10/htmx.min.js"
+    )
+    assert not is_immutable_url("https://unpkg.com/htmx.org")
+    assert not is_immutable_url("https://unpkg.com/htmx.org@1/dist/htmx.min.js")
+    assert not is_immutable_url("https://unpkg.com/htmx.org@latest")
+
+
+def test_calculate_sha256_mmap(tmp_path, monkeypatch):
+    """大文件通过 mmap 计算哈希，结果与逐块读取一致"""
+    path = tmp_path / "big.bin"
+    content = bytes(range(256)) * 100
+    path.write_bytes(content)
+    expected = hashlib.sha256(content).hexdigest()
+
+    assert calculate_sha256(path) == expected
+    monkeypatch.setattr(utils, "MMAP_THRESHOLD", 1)
+    assert calculate_sha256(path) == expected
+
+
+def test_calculate_sri(tmp_path):
+    """SRI 哈希使用 base64 编码，sha256 可由 lock 中的十六进制哈希转换"""
+    path = tmp_path / "app.js"
+    content = b"alert(1)"
+    path.write_bytes(content)
+    sha384 = base64.b64encode(hashlib.sha384(content).digest()).decode()
+
+    assert calculate_sri(path) == f"sha384-{sha384}"
+    assert sri_from_integrity(
+        f"sha256-{hashlib.sha256(content).hexdigest()}"
+    ) == calculate_sri(path, "sha256")
+    assert sri_from_integrity("sha256-not-hex") is None
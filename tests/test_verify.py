@@ -0,0 +1,97 @@
+import hashlib
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from django_js_vendor.core import VendorManager
+from django_js_vendor.lockfile import (
+    file_matches,
+    integrity_matches,
+    stat_matches,
+    write_lockfile,
+)
+
+
+@pytest.fixture
+def vendored(mock_project_root):
+    """两个已安装的文件以及对应的 lock 文件"""
+    dest = mock_project_root / "static/vendor/lib"
+    dest.mkdir(parents=True)
+    entries = []
+    for name, content in (("a.js", b"a" * 10), ("b.js", b"b" * 20)):
+        path = dest / name
+        path.write_bytes(content)
+        st = path.stat()
+        entries.append(
+            {
+                "url": f"https://unpkg.com/lib@1.0.0/{name}",
+                "path": f"static/vendor/lib/{name}",
+                "integrity": f"sha256-{hashlib.sha256(content).hexdigest()}",
+                "size": st.st_size,
+                "mtime": st.st_mtime_ns,
+            }
+        )
+    write_lockfile(mock_project_root / "js-vendor.lock", {"lib": {"files": entries}})
+    return dest
+
+
+def test_verify_clean(vendored, mock_project_root):
+    report = VendorManager(project_root=mock_project_root).verify()
+    assert report.clean
+    assert report.ok == ["static/vendor/lib/a.js", "static/vendor/lib/b.js"]
+
+
+@pytest.mark.parametrize("processes", [False, True])
+def test_verify_reports_problems(vendored, mock_project_root, processes):
+    (vendored / "a.js").write_bytes(b"x" * 10)  # 大小相同，内容不同
+    (vendored / "b.js").unlink()
+    (vendored / "stray.js").write_bytes(b"stray")
+
+    report = VendorManager(project_root=mock_project_root).verify(
+        workers=2, processes=processes
+    )
+
+    assert not report.clean
+    assert report.modified == ["static/vendor/lib/a.js"]
+    assert report.missing == ["static/vendor/lib/b.js"]
+    assert report.extra == ["static/vendor/lib/stray.js"]
+
+
+def test_verify_quick_trusts_size_and_mtime(vendored, mock_project_root, mocker):
+    spy = mocker.patch("django_js_vendor.verify.calculate_sha256")
+    report = VendorManager(project_root=mock_project_root).verify(quick=True)
+    assert report.clean
+    spy.assert_not_called()
+
+
+def test_lock_record_matching(vendored, mock_project_root):
+    """sync、bundle 与 verify 共用的 size/mtime 快速路径"""
+    entry = json.loads((mock_project_root / "js-vendor.lock").read_text())["lib"][
+        "files"
+    ][0]
+    path = mock_project_root / entry["path"]
+
+    assert file_matches(path, entry)
+    assert not file_matches(path, entry, paranoid=True)
+    assert not file_matches(path, {**entry, "mtime": entry["mtime"] + 1})
+    assert not file_matches(vendored / "missing.js", entry)
+    assert not stat_matches(None, entry)
+    assert integrity_matches(path, entry)
+    assert not integrity_matches(vendored / "b.js", entry)
+
+
+def test_verify_command(vendored, mock_project_root):
+    out = StringIO()
+    call_command("vendor", "verify", stdout=out)
+    assert "Verified 2 files: 0 missing, 0 modified, 0 extra." in out.getvalue()
+
+    (vendored / "b.js").write_bytes(b"changed")
+    out = StringIO()
+    with pytest.raises(CommandError) as exc_info:
+        call_command("vendor", "verify", "--json", stdout=out)
+    assert exc_info.value.returncode == 1
+    report = json.loads(out.getvalue())
+    assert report["clean"] is False
+    assert report["modified"] == ["static/vendor/lib/b.js"]